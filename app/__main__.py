@@ -0,0 +1,35 @@
+"""
+Runs the app from pre-forked, warmed-up workers.
+
+    python -m app --workers 4
+"""
+
+import argparse
+import sys
+from typing import Optional
+
+from app.server import SERVER_HOST, SERVER_PORT, SERVER_WORKERS, PreforkServer
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app",
+        description=__doc__.split("\n\n")[0].strip(),
+    )
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=int(SERVER_PORT))
+    parser.add_argument("--workers", type=int, default=int(SERVER_WORKERS))
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    server = PreforkServer(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level=args.log_level,
+    )
+    return server.run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
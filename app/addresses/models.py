@@ -7,7 +7,7 @@ class AddressModel(Base):
     __tablename__ = "addresses"
 
     id = Column(Integer, primary_key=True, index=True)
-    organization_id = Column(Integer, ForeignKey("organizations.id"))
+    organization_id = Column(Integer, ForeignKey("organizations.id"), index=True)
     street_address1 = Column(String)
     street_address2 = Column(String)
     city = Column(String)
@@ -1,5 +1,9 @@
-from sqlalchemy.orm import Session
+from typing import Any, AsyncIterator, Optional
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.bulk import bulk_insert
+from app.organizations.repo import OrganizationRepo
 from app.addresses.models import AddressModel
 from app.addresses.schemas import (
     AddressCreateSchema,
@@ -11,9 +15,9 @@ class AddressRepo:
     def __init__(self) -> None:
         pass
 
-    def create(
+    async def create(
         self,
-        db: Session,
+        db: AsyncSession,
         org_id: int,
         addr: AddressCreateSchema,
     ):
@@ -25,7 +29,25 @@ class AddressRepo:
         setattr(addr_in_db, "organization_id", org_id)
 
         db.add(addr_in_db)
-        db.commit()
-        db.refresh(addr_in_db)
+        await OrganizationRepo.touch(db=db, org_id=org_id)
+        await db.commit()
+        await db.refresh(addr_in_db)
+
+        return OutputAddressModelSchema.model_validate(addr_in_db)
 
-        return OutputAddressModelSchema.model_validate(addr_in_db)
\ No newline at end of file
+    async def bulk_create(
+        self,
+        db: AsyncSession,
+        org_id: int,
+        rows: AsyncIterator[tuple[int, Any, Optional[str]]],
+        batch_size: int,
+    ):
+        return await bulk_insert(
+            db=db,
+            rows=rows,
+            schema=AddressCreateSchema,
+            model=AddressModel,
+            extra_values={"organization_id": org_id},
+            batch_size=batch_size,
+            before_commit=lambda: OrganizationRepo.touch(db=db, org_id=org_id),
+        )
@@ -1,8 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm.session import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.bulk import (
+    BULK_REQUEST_BODY,
+    MAX_BULK_BATCH_SIZE,
+    iter_request_rows,
+    resolve_batch_size,
+)
 from app.db import get_db
+from app.etags import make_etag, matches, not_modified, set_etag
+from app.responses import ValidatedResponseRoute
+from app.schemas import BulkIngestResultSchema
 
 from app.addresses.schemas import (
     AddressBaseSchema,
@@ -13,9 +22,9 @@ from app.addresses.schemas import (
 from app.addresses.repo import AddressRepo
 from app.organizations.repo import OrganizationRepo
 
-from typing import List
+from typing import List, Optional
 
-router = APIRouter()
+router = APIRouter(route_class=ValidatedResponseRoute)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -31,13 +40,38 @@ org_repo = OrganizationRepo()
 async def create_address(
     request_addr: AddressCreateSchema,
     org_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme),
 ):
-    addr = addr_repo.create(db=db, org_id=org_id, addr=request_addr)
+    addr = await addr_repo.create(db=db, org_id=org_id, addr=request_addr)
     return addr
 
 
+@router.post(
+    "/address/bulk",
+    response_model=BulkIngestResultSchema,
+    status_code=200,
+    openapi_extra=BULK_REQUEST_BODY,
+)
+async def bulk_create_addresses(
+    request: Request,
+    org_id: int,
+    batch_size: Optional[int] = Query(default=None, ge=1, le=MAX_BULK_BATCH_SIZE),
+    db: AsyncSession = Depends(get_db),
+    token: str = Depends(oauth2_scheme),
+):
+    await org_repo.ensure_exists(db=db, org_id=org_id)
+
+    result = await addr_repo.bulk_create(
+        db=db,
+        org_id=org_id,
+        rows=iter_request_rows(request),
+        batch_size=resolve_batch_size(batch_size),
+    )
+
+    return result
+
+
 @router.get(
     "/address/{org_id}",
     response_model=List[AddressBaseSchema],
@@ -45,12 +79,26 @@ async def create_address(
 )
 async def fetch_addresses_for_organization(
     org_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme),
 ):
-    org = org_repo.fetch_organizations_by_id(
+    # Address writes bump the organization's version, so it versions these.
+    version = await org_repo.fetch_version(db=db, org_id=org_id)
+
+    if version is not None:
+        etag = make_etag(request, version)
+        if matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+
+    org = await org_repo.fetch_organizations_by_id(
         db=db,
         org_id=org_id,
+        fields=("id",),
+        expand=("addresses",),
+        version=version,
     )
 
     if org.addresses is None:
@@ -1,15 +1,23 @@
 from passlib.context import CryptContext
+from passlib.registry import get_crypt_handler
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 import datetime
+import math
+import statistics
+import time
 from datetime import timedelta
-from typing import Any, Optional
+import uuid
+from typing import Any, Callable, Optional, TypeVar
 import jwt
 import os
 from fastapi import HTTPException, status
 
-from dotenv import load_dotenv
+from app.metrics import timed
+from app.settings import load_env
 
 # Load the .env file with the secrets.
-load_dotenv()
+load_env()
 
 SECRET_KEY: str | None = os.getenv("SECRET_KEY")
 ALGORITHM: str = os.getenv(
@@ -25,8 +33,234 @@ REFRESH_TOKEN_EXPIRE_DAYS: str | int = os.getenv(
     default=15,
 )
 
-# Passlib and bcrypt are used to has plain passwords using secret key
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
+
+# bcrypt is CPU bound, so it runs on a bounded pool instead of the event loop.
+PASSWORD_HASH_EXECUTOR: str = os.getenv(
+    "PASSWORD_HASH_EXECUTOR",
+    default="thread",
+)
+PASSWORD_HASH_WORKERS: str | int = os.getenv(
+    "PASSWORD_HASH_WORKERS",
+    default=os.cpu_count() or 1,
+)
+PASSWORD_HASH_MAX_PENDING: str | int = os.getenv(
+    "PASSWORD_HASH_MAX_PENDING",
+    default=64,
+)
+
+# Schemes new hashes may use. Hashes in any of them verify whichever is
+# configured; argon2 needs the argon2-cffi package.
+PASSWORD_HASH_SCHEMES = ("bcrypt", "pbkdf2_sha256", "argon2")
+
+# The scheme and cost of new hashes. Rounds are the bcrypt cost factor (a
+# power of two), pbkdf2 iterations or the argon2 time cost; pick them with
+# `python -m app.users calibrate-hash`. Left unset, passlib's default is
+# used and existing hashes are only upgraded when the scheme changes.
+PASSWORD_HASH_SCHEME: str = os.getenv(
+    "PASSWORD_HASH_SCHEME",
+    default="bcrypt",
+)
+PASSWORD_HASH_ROUNDS: str | None = os.getenv("PASSWORD_HASH_ROUNDS") or None
+
+# Hashed when calibrating; its length does not change the cost.
+CALIBRATION_PASSWORD = "calibration-password"
+
+
+def build_password_context(scheme: str, rounds: Optional[int]) -> CryptContext:
+    """
+    Hashes with `scheme` at `rounds` and verifies every known scheme.
+
+    Hashes in another scheme, or with other rounds when `rounds` is set,
+    are reported by needs_update so they can be replaced on login.
+    """
+    if scheme not in PASSWORD_HASH_SCHEMES:
+        raise ValueError(
+            f"PASSWORD_HASH_SCHEME must be one of {', '.join(PASSWORD_HASH_SCHEMES)}, "
+            f"got {scheme!r}"
+        )
+
+    settings: dict[str, int] = {}
+    if rounds is not None:
+        handler = get_crypt_handler(scheme)
+        if not handler.min_rounds <= rounds <= handler.max_rounds:
+            raise ValueError(
+                f"PASSWORD_HASH_ROUNDS for {scheme} must be between "
+                f"{handler.min_rounds} and {handler.max_rounds}, got {rounds}"
+            )
+        for key in ("default_rounds", "min_rounds", "max_rounds"):
+            settings[f"{scheme}__{key}"] = rounds
+
+    return CryptContext(
+        schemes=[scheme, *(other for other in PASSWORD_HASH_SCHEMES if other != scheme)],
+        default=scheme,
+        deprecated="auto",
+        **settings,
+    )
+
+
+pwd_context = build_password_context(
+    PASSWORD_HASH_SCHEME,
+    int(PASSWORD_HASH_ROUNDS) if PASSWORD_HASH_ROUNDS is not None else None,
+)
+
+
+def time_hash(scheme: str, rounds: int, samples: int) -> float:
+    """Median seconds one hash with `scheme` at `rounds` takes here."""
+    hasher = get_crypt_handler(scheme).using(rounds=rounds)
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        hasher.hash(CALIBRATION_PASSWORD)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def calibrate_rounds(scheme: str, budget: float, samples: int) -> tuple[int, float]:
+    """
+    The highest rounds for `scheme` whose hash fits in `budget` seconds on
+    this machine, with its measured time.
+
+    The cost is extrapolated from passlib's default rounds, then measured
+    and stepped down until it fits. Never below the scheme's minimum, even
+    if that does not fit.
+    """
+    handler = get_crypt_handler(scheme)
+    rounds = handler.default_rounds
+    seconds = time_hash(scheme, rounds, samples)
+
+    def estimate(rounds: int, seconds: float) -> int:
+        if handler.rounds_cost == "log2":
+            rounds += math.floor(math.log2(budget / seconds))
+        else:
+            rounds = int(rounds * budget / seconds)
+        return max(handler.min_rounds, min(rounds, handler.max_rounds))
+
+    rounds = estimate(rounds, seconds)
+    seconds = time_hash(scheme, rounds, samples)
+
+    while seconds > budget and rounds > handler.min_rounds:
+        # A log2 cost goes down one step; a linear one is scaled to the
+        # overshoot, a little under so it does not land just over again.
+        if handler.rounds_cost == "log2":
+            rounds -= 1
+        else:
+            rounds = max(
+                handler.min_rounds,
+                min(rounds - 1, int(rounds * budget / seconds * 0.95)),
+            )
+        seconds = time_hash(scheme, rounds, samples)
+
+    return rounds, seconds
+
+
+T = TypeVar("T")
+
+
+class PasswordHashPool:
+    """
+    Runs password hashing on a thread or process pool.
+
+    At most `workers` calls run at once; up to `max_pending` more may wait for
+    a slot, anything beyond that is rejected with a 503 instead of queueing.
+    """
+
+    def __init__(self, kind: str, workers: int, max_pending: int) -> None:
+        if kind not in ("thread", "process"):
+            raise ValueError(
+                f"PASSWORD_HASH_EXECUTOR must be 'thread' or 'process', got {kind!r}"
+            )
+        if workers < 1:
+            raise ValueError("PASSWORD_HASH_WORKERS must be at least 1")
+        if max_pending < 0:
+            raise ValueError("PASSWORD_HASH_MAX_PENDING must not be negative")
+
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+
+        # Created on first use so nothing is started at import time.
+        self._executor: Executor | None = None
+        self._slots: asyncio.Semaphore | None = None
+
+        self.queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.busy_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="password-hash",
+                )
+        return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        return self._slots
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        slots = self._get_slots()
+
+        if slots.locked() and self.queued >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many pending password operations, try again later",
+                headers={"Retry-After": "1"},
+            )
+
+        enqueued_at = time.perf_counter()
+        self.queued += 1
+        try:
+            await slots.acquire()
+        finally:
+            self.queued -= 1
+
+        started_at = time.perf_counter()
+        self.wait_seconds += started_at - enqueued_at
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self.busy_seconds += time.perf_counter() - started_at
+            slots.release()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "wait_seconds": self.wait_seconds,
+            "busy_seconds": self.busy_seconds,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hash_pool = PasswordHashPool(
+    kind=PASSWORD_HASH_EXECUTOR,
+    workers=int(PASSWORD_HASH_WORKERS),
+    max_pending=int(PASSWORD_HASH_MAX_PENDING),
+)
 
 
 class Authenticator:
@@ -38,7 +272,28 @@ class Authenticator:
     def get_password_hash(password: str) -> str:
         return pwd_context.hash(password)
 
+    @staticmethod
+    def password_needs_rehash(hashed_password: str) -> bool:
+        """True when the hash is not in the configured scheme and rounds."""
+        return pwd_context.needs_update(hashed_password)
+
+    # Non-blocking variants for request handlers, backed by hash_pool.
+    @staticmethod
+    @timed("verify_password")
+    async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+        return await hash_pool.run(
+            Authenticator.verify_password,
+            plain_password,
+            hashed_password,
+        )
+
+    @staticmethod
+    @timed("hash_password")
+    async def get_password_hash_async(password: str) -> str:
+        return await hash_pool.run(Authenticator.get_password_hash, password)
+
     # Encode data into 2 tokens: access, and refresh token
+    @timed("create_tokens")
     def create_tokens(
         self, data: dict[str, Any], expires_delta: Optional[timedelta] = None
     ) -> dict[str, str]:
@@ -53,17 +308,22 @@ class Authenticator:
         expire_refresh = datetime.datetime.now(datetime.UTC) + timedelta(
             days=float(REFRESH_TOKEN_EXPIRE_DAYS)
         )
+        # Every token gets its own id; refresh tokens are revoked by it.
         to_encode_access.update(
             {
                 "exp": expire_access,
+                "jti": uuid.uuid4().hex,
+                "type": ACCESS_TOKEN_TYPE,
             },
         )
         to_encode_refresh.update(
             {
                 "exp": expire_refresh,
+                "jti": uuid.uuid4().hex,
+                "type": REFRESH_TOKEN_TYPE,
             },
         )
-        
+
         access_token: str = jwt.encode(
             payload=to_encode_access,
             key=SECRET_KEY,
@@ -80,8 +340,8 @@ class Authenticator:
             "refresh": refresh_token,
         }
 
-    # Decode the access token to check validity of request
-    def decode_access_token(self, token: str):
+    @staticmethod
+    def _decode(token: str) -> dict[str, Any]:
         try:
             return jwt.decode(
                 token,
@@ -98,3 +358,34 @@ class Authenticator:
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid token",
             )
+
+    # Decode the access token to check validity of request
+    @timed("decode_access_token")
+    def decode_access_token(self, token: str):
+        payload = self._decode(token)
+
+        # Tokens issued before the type claim existed are treated as access
+        # tokens; a refresh token is never accepted in place of one.
+        if payload.get("type", ACCESS_TOKEN_TYPE) != ACCESS_TOKEN_TYPE:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid token",
+            )
+
+        return payload
+
+    @timed("decode_refresh_token")
+    def decode_refresh_token(self, token: str):
+        payload = self._decode(token)
+
+        if (
+            payload.get("type") != REFRESH_TOKEN_TYPE
+            or not payload.get("jti")
+            or not payload.get("sub")
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid refresh token",
+            )
+
+        return payload
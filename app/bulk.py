@@ -0,0 +1,326 @@
+import codecs
+import csv
+import json
+import os
+import zlib
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional
+
+from fastapi import HTTPException, Request, status
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas import BulkIngestResultSchema, BulkRowErrorSchema
+from app.settings import load_env
+
+load_env()
+
+BULK_BATCH_SIZE: str | int = os.getenv(
+    "BULK_BATCH_SIZE",
+    default=1000,
+)
+MAX_BULK_BATCH_SIZE = 10000
+
+NDJSON_CONTENT_TYPES = {
+    "application/x-ndjson",
+    "application/ndjson",
+    "application/jsonl",
+}
+CSV_CONTENT_TYPES = {
+    "text/csv",
+    "application/csv",
+}
+
+# Bytes read at a time from files given to the command line importers.
+FILE_CHUNK_SIZE = 64 * 1024
+
+# Documents the raw request body of bulk endpoints, which read the request
+# themselves instead of declaring a body parameter.
+BULK_REQUEST_BODY: dict[str, Any] = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": {"type": "array", "items": {"type": "object"}},
+            },
+            "application/x-ndjson": {
+                "schema": {"type": "string", "description": "One JSON object per line"},
+            },
+            "text/csv": {
+                "schema": {"type": "string", "description": "Header row, then one row per item"},
+            },
+        },
+    },
+}
+
+
+def resolve_batch_size(batch_size: Optional[int]) -> int:
+    return batch_size if batch_size is not None else int(BULK_BATCH_SIZE)
+
+
+class NdjsonRows:
+    """Parses NDJSON fed in chunks of any size into rows."""
+
+    def __init__(self) -> None:
+        self.row = 0
+        self.buffer = b""
+
+    def _parse(self, line: bytes) -> tuple[int, Any, Optional[str]]:
+        self.row += 1
+        try:
+            return self.row, json.loads(line), None
+        except ValueError as e:
+            return self.row, None, f"Invalid JSON: {e}"
+
+    def feed(self, chunk: bytes) -> Iterator[tuple[int, Any, Optional[str]]]:
+        self.buffer += chunk
+        *lines, self.buffer = self.buffer.split(b"\n")
+
+        for line in lines:
+            if line.strip():
+                yield self._parse(line)
+
+    def close(self) -> Iterator[tuple[int, Any, Optional[str]]]:
+        if self.buffer.strip():
+            yield self._parse(self.buffer)
+        self.buffer = b""
+
+
+class CsvRows:
+    """
+    Parses CSV fed in chunks of any size into rows keyed by the header row.
+
+    A record ends at the first newline outside quotes, so quoted fields may
+    contain newlines. Empty cells become None, like a key left out of a
+    JSON row.
+    """
+
+    def __init__(self) -> None:
+        self.row = 0
+        self.header: Optional[list[str]] = None
+        # Strips the byte order mark spreadsheet exports often start with.
+        self.decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self.buffer = ""
+        self.record = ""
+
+    def _parse(self, record: str) -> Optional[tuple[int, Any, Optional[str]]]:
+        values = next(csv.reader([record]))
+
+        if self.header is None:
+            self.header = [name.strip() for name in values]
+            return None
+
+        self.row += 1
+        if len(values) != len(self.header):
+            return (
+                self.row,
+                None,
+                f"Expected {len(self.header)} columns, got {len(values)}",
+            )
+        return (
+            self.row,
+            {name: value if value != "" else None for name, value in zip(self.header, values)},
+            None,
+        )
+
+    def _lines(self, lines: list[str]) -> Iterator[tuple[int, Any, Optional[str]]]:
+        for line in lines:
+            self.record += line + "\n"
+            # An odd number of quotes means a quoted field is still open.
+            if self.record.count('"') % 2:
+                continue
+
+            record, self.record = self.record, ""
+            if record.strip():
+                parsed = self._parse(record)
+                if parsed is not None:
+                    yield parsed
+
+    def feed(self, chunk: bytes) -> Iterator[tuple[int, Any, Optional[str]]]:
+        self.buffer += self.decoder.decode(chunk)
+        *lines, self.buffer = self.buffer.split("\n")
+        yield from self._lines(lines)
+
+    def close(self) -> Iterator[tuple[int, Any, Optional[str]]]:
+        self.buffer += self.decoder.decode(b"", final=True)
+        lines, self.buffer = [self.buffer], ""
+        yield from self._lines(lines)
+
+        if self.record.strip():
+            self.row += 1
+            yield self.row, None, "Unterminated quoted field"
+        self.record = ""
+
+
+def _streaming_parser(content_type: str):
+    if content_type in NDJSON_CONTENT_TYPES:
+        return NdjsonRows()
+    if content_type in CSV_CONTENT_TYPES:
+        return CsvRows()
+    return None
+
+
+async def _request_chunks(request: Request) -> AsyncIterator[bytes]:
+    """The request body as it streams in, decompressed if it was gzipped."""
+    encoding = request.headers.get("content-encoding", "identity").strip().lower()
+
+    if encoding == "identity":
+        async for chunk in request.stream():
+            yield chunk
+        return
+
+    if encoding not in ("gzip", "x-gzip"):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Unsupported Content-Encoding {encoding!r}",
+        )
+
+    decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    try:
+        async for chunk in request.stream():
+            # Output is capped per call, so a small chunk that inflates to a
+            # lot of data is still handed on a piece at a time.
+            while chunk:
+                yield decompressor.decompress(chunk, FILE_CHUNK_SIZE)
+                chunk = decompressor.unconsumed_tail
+        yield decompressor.flush()
+    except zlib.error as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Request body is not valid gzip: {e}",
+        )
+
+
+async def iter_request_rows(
+    request: Request,
+) -> AsyncIterator[tuple[int, Any, Optional[str]]]:
+    """
+    Yields (row number, payload, parse error) for every row in the body.
+
+    NDJSON and CSV bodies are parsed as they stream in, so memory use does
+    not depend on the size of the upload. Anything else must be a single
+    JSON array. Bodies sent with `Content-Encoding: gzip` are decompressed
+    as they arrive.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+
+    parser = _streaming_parser(content_type)
+    if parser is not None:
+        async for chunk in _request_chunks(request):
+            for parsed in parser.feed(chunk):
+                yield parsed
+        for parsed in parser.close():
+            yield parsed
+        return
+
+    try:
+        rows = json.loads(b"".join([chunk async for chunk in _request_chunks(request)]))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Request body is not valid JSON: {e}",
+        )
+
+    if not isinstance(rows, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Request body must be a JSON array or NDJSON",
+        )
+
+    for row, payload in enumerate(rows, start=1):
+        yield row, payload, None
+
+
+# File extensions the command line importers accept, by the content type
+# they are parsed as.
+FILE_CONTENT_TYPES = {
+    ".csv": "text/csv",
+    ".ndjson": "application/x-ndjson",
+    ".jsonl": "application/x-ndjson",
+}
+
+
+async def iter_file_rows(path: str) -> AsyncIterator[tuple[int, Any, Optional[str]]]:
+    """Like iter_request_rows, for a .csv, .ndjson or .jsonl file."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FILE_CONTENT_TYPES:
+        raise ValueError(
+            f"Unsupported file type {extension!r}, expected one of "
+            f"{', '.join(FILE_CONTENT_TYPES)}"
+        )
+
+    parser = _streaming_parser(FILE_CONTENT_TYPES[extension])
+    with open(path, "rb") as source:
+        while chunk := source.read(FILE_CHUNK_SIZE):
+            for parsed in parser.feed(chunk):
+                yield parsed
+    for parsed in parser.close():
+        yield parsed
+
+
+async def bulk_insert(
+    db: AsyncSession,
+    rows: AsyncIterator[tuple[int, Any, Optional[str]]],
+    schema: type[BaseModel],
+    model: type,
+    extra_values: dict[str, Any],
+    batch_size: int,
+    before_commit: Optional[Callable[[], Awaitable[Any]]] = None,
+) -> BulkIngestResultSchema:
+    """
+    Validates rows against `schema` and inserts them into `model`'s table.
+
+    Every `batch_size` valid rows are written with a single executemany and
+    committed together, after awaiting `before_commit` in the same
+    transaction. Rows that fail validation, or that belong to a batch the
+    database rejects, are reported instead of aborting the whole upload.
+    """
+    result = BulkIngestResultSchema()
+    batch: list[tuple[int, dict[str, Any]]] = []
+
+    async def flush() -> None:
+        if not batch:
+            return
+
+        try:
+            await db.execute(insert(model), [values for _, values in batch])
+            if before_commit is not None:
+                await before_commit()
+            await db.commit()
+            result.inserted += len(batch)
+        except SQLAlchemyError as e:
+            await db.rollback()
+            result.failed += len(batch)
+            result.errors.extend(
+                BulkRowErrorSchema(row=row, errors=[str(getattr(e, "orig", None) or e)])
+                for row, _ in batch
+            )
+
+        batch.clear()
+
+    async for row, payload, error in rows:
+        result.received += 1
+
+        if error is not None:
+            result.failed += 1
+            result.errors.append(BulkRowErrorSchema(row=row, errors=[error]))
+            continue
+
+        try:
+            item = schema.model_validate(payload)
+        except ValidationError as e:
+            result.failed += 1
+            result.errors.append(
+                BulkRowErrorSchema(row=row, errors=json.loads(e.json(include_url=False)))
+            )
+            continue
+
+        batch.append((row, {**item.model_dump(), **extra_values}))
+
+        if len(batch) >= batch_size:
+            await flush()
+
+    await flush()
+
+    return result
@@ -0,0 +1,203 @@
+import asyncio
+from collections import OrderedDict
+import threading
+import time
+from typing import Any, Awaitable, Callable, Generic, Hashable, Optional, Protocol, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Bounded in-process LRU where every entry also carries its own deadline.
+
+    Expired entries are dropped lazily on access; when the cache is full the
+    least recently used entry is evicted.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        if ttl <= 0:
+            raise ValueError("ttl must be positive")
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: K) -> Optional[V]:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: K) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CacheBackend(Protocol[V]):
+    async def get(self, key: str) -> Optional[V]: ...
+
+    async def set(self, key: str, value: V, ttl: float) -> None: ...
+
+
+class MemoryCacheBackend(Generic[V]):
+    """Per-process backend; values are kept as live objects, not serialized."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._entries: TTLCache[str, V] = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str) -> Optional[V]:
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: V, ttl: float) -> None:
+        self._entries.set(key, value, ttl=ttl)
+
+
+class RedisCacheBackend(Generic[V]):
+    """
+    Out-of-process backend shared by every worker. Talks the Redis protocol,
+    so any compatible local server can stand in for Redis. Needs the optional
+    `redis` package.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        encode: Callable[[V], str],
+        decode: Callable[[str], V],
+        prefix: str = "",
+    ) -> None:
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError(
+                "The redis cache backend needs the 'redis' package: pip install redis"
+            ) from e
+
+        self._client = redis.from_url(url)
+        self._encode = encode
+        self._decode = decode
+        self._prefix = prefix
+
+    async def get(self, key: str) -> Optional[V]:
+        raw = await self._client.get(self._prefix + key)
+        return None if raw is None else self._decode(raw)
+
+    async def set(self, key: str, value: V, ttl: float) -> None:
+        await self._client.set(
+            self._prefix + key,
+            self._encode(value),
+            px=max(1, int(ttl * 1000)),
+        )
+
+
+class ReadThroughCache(Generic[V]):
+    """
+    Loads values through a backend, counting hits and misses.
+
+    Concurrent misses on the same key share a single load; if the caller
+    running it is cancelled, a waiting caller runs it instead. Nothing is
+    ever evicted explicitly, so keys must change whenever their value would,
+    as versioned keys do; old keys age out of the backend.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend[V]], ttl: float) -> None:
+        self.backend = backend
+        self.ttl = ttl
+
+        self._loading: dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def get_or_load(self, key: str, load: Callable[[], Awaitable[V]]) -> V:
+        if self.backend is None:
+            return await load()
+
+        value = await self.backend.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+
+        while (pending := self._loading.get(key)) is not None:
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # The caller running the load was cancelled, say by its
+                # client disconnecting; one waiter takes the load over.
+                if not pending.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+
+        try:
+            value = await load()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting.
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            del self._loading[key]
+
+        await self.backend.set(key, value, self.ttl)
+
+        return value
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
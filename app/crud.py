@@ -1,5 +1,9 @@
-from sqlalchemy.orm import Session
+from typing import Any, AsyncIterator, Optional
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.bulk import bulk_insert
+from app.organizations.repo import OrganizationRepo
 from app.models import CustomFieldModel
 from app.schemas import CustomFieldCreateSchema, OutputCustomFieldModelSchema
 
@@ -10,9 +14,9 @@ class CustomFieldRepo:
     def __init__(self) -> None:
         pass
 
-    def create(
+    async def create(
         self,
-        db: Session,
+        db: AsyncSession,
         org_id: int,
         custom_field: CustomFieldCreateSchema,
     ):
@@ -24,7 +28,25 @@ class CustomFieldRepo:
         setattr(custom_field_in_db, "organization_id", org_id)
 
         db.add(custom_field_in_db)
-        db.commit()
-        db.refresh(custom_field_in_db)
+        await OrganizationRepo.touch(db=db, org_id=org_id)
+        await db.commit()
+        await db.refresh(custom_field_in_db)
 
         return OutputCustomFieldModelSchema.model_validate(custom_field_in_db)
+
+    async def bulk_create(
+        self,
+        db: AsyncSession,
+        org_id: int,
+        rows: AsyncIterator[tuple[int, Any, Optional[str]]],
+        batch_size: int,
+    ):
+        return await bulk_insert(
+            db=db,
+            rows=rows,
+            schema=CustomFieldCreateSchema,
+            model=CustomFieldModel,
+            extra_values={"organization_id": org_id},
+            batch_size=batch_size,
+            before_commit=lambda: OrganizationRepo.touch(db=db, org_id=org_id),
+        )
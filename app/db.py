@@ -1,23 +1,177 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.sql.dml import UpdateBase
 import os
-from dotenv import load_dotenv
+from typing import Any
 
-load_dotenv()
+from app.metrics import instrument_engine
+from app.pool import InstrumentedAsyncQueuePool, instrument_pool, pool_options
+from app.replicas import (
+    READ_YOUR_WRITES_SECONDS,
+    REPLICA_CHECK_INTERVAL_SECONDS,
+    REPLICA_CHECK_TIMEOUT_SECONDS,
+    ReadRouter,
+    current_client,
+    is_reading,
+)
+from app.settings import get_settings
 
-database_url: str = os.getenv("DATABASE_URL", "sqlite:///test.db")
+database_url: str = get_settings().database_url
+database_read_urls: list[str] = get_settings().database_read_urls
 
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Sync drivers and the asyncio drivers that replace them on the request path.
+ASYNC_DRIVERS: dict[str, str] = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    parsed = make_url(url)
+    drivername = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+# The sync engine is kept for schema management and offline tooling only.
 engine = create_engine(database_url)
 
 sessionLocal = sessionmaker(bind=engine)
 
-Base = declarative_base()
 
+def async_engine_options(url: str) -> dict[str, Any]:
+    parsed = make_url(url)
+
+    # An in-memory SQLite database only exists on its one connection, so it
+    # keeps the dialect's default single-connection pool.
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (
+        None,
+        "",
+        ":memory:",
+    ):
+        return {}
+
+    return {"poolclass": InstrumentedAsyncQueuePool, **pool_options()}
+
+
+def create_instrumented_engine(url: str):
+    async_engine = create_async_engine(
+        to_async_url(url),
+        **async_engine_options(url),
+    )
+    instrument_pool(async_engine.pool)
+    instrument_engine(async_engine.sync_engine)
+    return async_engine
+
+
+async_engine = create_instrumented_engine(database_url)
+
+read_router = ReadRouter(
+    [create_instrumented_engine(url) for url in database_read_urls],
+    sticky_seconds=float(READ_YOUR_WRITES_SECONDS),
+    check_interval=float(REPLICA_CHECK_INTERVAL_SECONDS),
+    check_timeout=float(REPLICA_CHECK_TIMEOUT_SECONDS),
+)
+
+
+class RoutingSession(Session):
+    """
+    Sends the reads of read-only repo calls to a replica, everything else
+    to the primary.
+
+    A call is read-only when it is decorated with app.replicas.read_only,
+    or when its session was opened with `info={"read_only": True}`. Once a
+    session has written, it reads from the primary until its transaction
+    ends, so it sees its own uncommitted rows. A transaction holds on to
+    the replica it picked first, so its reads agree with each other.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.info["wrote"] = True
+            return async_engine.sync_engine
+
+        if (
+            read_router.enabled
+            and (is_reading() or self.info.get("read_only"))
+            and not self.info.get("wrote")
+        ):
+            if "replica" not in self.info:
+                self.info["replica"] = read_router.pick(current_client.get())
+
+            replica = self.info["replica"]
+            if replica is not None:
+                return replica.sync_engine
 
-def get_db():
-    db = sessionLocal()
+        return async_engine.sync_engine
 
-    try:
+
+@event.listens_for(RoutingSession, "after_commit")
+def _after_commit(session: Session) -> None:
+    # The client's next reads go to the primary until replicas catch up.
+    if session.info.get("wrote"):
+        read_router.wrote(current_client.get())
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _after_transaction_end(session: Session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop("wrote", None)
+        session.info.pop("replica", None)
+
+
+# Objects stay usable after commit so repos can validate them without
+# triggering an implicit (and in asyncio, illegal) lazy reload.
+async_session_local = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    expire_on_commit=False,
+)
+
+Base = declarative_base()
+
+
+async def get_db():
+    async with async_session_local() as db:
         yield db
-    finally:
-        db.close()
+
+
+async def create_schema() -> None:
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def check_schema_is_current() -> None:
+    """Fails startup when the database is behind the latest migration."""
+    # Imported here so workers that never manage the schema do not pay for it.
+    from alembic.config import Config
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    config = Config(os.path.join(PROJECT_ROOT, "alembic.ini"))
+    heads = set(ScriptDirectory.from_config(config).get_heads())
+
+    async with async_engine.connect() as conn:
+        current = await conn.run_sync(
+            lambda sync_conn: set(
+                MigrationContext.configure(sync_conn).get_current_heads()
+            )
+        )
+
+    if current != heads:
+        raise RuntimeError(
+            f"Database schema is at {sorted(current) or 'no revision'}, expected "
+            f"{sorted(heads)}. Run `alembic upgrade head` before starting the app."
+        )
+
+
+async def manage_schema(mode: str) -> None:
+    if mode == "create_all":
+        await create_schema()
+    elif mode == "alembic":
+        await check_schema_is_current()
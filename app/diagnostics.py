@@ -0,0 +1,164 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import authentication as auth
+from app.db import async_engine, get_db, read_router
+from app.jobs.queue import job_queue
+from app.organizations.cache import org_detail_cache
+from app.metrics import REGISTRY, GaugeCollector
+from app.pool import pool_stats
+from app.ratelimit import login_limiter
+from app.revocation import revoked_tokens
+from app.users.rehash import password_rehasher
+
+router = APIRouter()
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _engines():
+    yield "primary", async_engine
+    for replica in read_router.replicas:
+        yield replica.name, replica.engine
+
+
+def _pool_gauges():
+    for name, engine in _engines():
+        stats = pool_stats(engine.pool)
+        for key in ("size", "in_use", "overflow", "checked_in"):
+            if key in stats:
+                yield {"engine": name, "state": key}, stats[key]
+
+
+def _replica_gauges():
+    for replica in read_router.replicas:
+        yield {"replica": replica.name}, int(replica.healthy)
+
+
+def _hash_pool_gauges():
+    stats = auth.hash_pool.stats()
+    for key in ("queued", "in_flight", "rejected"):
+        yield {"state": key}, stats[key]
+
+
+def _login_limit_gauges():
+    stats = login_limiter.stats()
+    yield {"result": "admitted"}, stats["admitted"]
+    for reason, count in stats["limited"].items():
+        yield {"result": f"limited_{reason}"}, count
+
+
+def _cache_gauges():
+    stats = org_detail_cache.stats()
+    for key in ("hits", "misses"):
+        yield {"cache": "organization_detail", "result": key}, stats[key]
+
+
+def _job_gauges():
+    stats = job_queue.stats()
+    for key in ("completed", "retried", "failed"):
+        yield {"result": key}, stats[key]
+
+
+REGISTRY.register(
+    GaugeCollector(
+        "db_pool_connections",
+        "Connection pool gauges per engine.",
+        _pool_gauges,
+    )
+)
+REGISTRY.register(
+    GaugeCollector(
+        "db_replica_healthy",
+        "1 while a read replica is in rotation, 0 while it is down.",
+        _replica_gauges,
+    )
+)
+REGISTRY.register(
+    GaugeCollector(
+        "password_hash_pool",
+        "Password hashing pool queue depth, in-flight calls and rejections.",
+        _hash_pool_gauges,
+    )
+)
+REGISTRY.register(
+    GaugeCollector(
+        "login_attempts",
+        "Login attempts admitted, and shed by each limit.",
+        _login_limit_gauges,
+    )
+)
+REGISTRY.register(
+    GaugeCollector(
+        "cache_lookups",
+        "Read-through cache hits and misses.",
+        _cache_gauges,
+    )
+)
+REGISTRY.register(
+    GaugeCollector(
+        "background_jobs",
+        "Background jobs this process completed, retried and gave up on.",
+        _job_gauges,
+    )
+)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@router.get("/internal/pool")
+async def connection_pool_stats(
+    token: str = Depends(oauth2_scheme),
+):
+    return {name: pool_stats(engine.pool) for name, engine in _engines()}
+
+
+@router.get("/internal/replicas")
+async def read_replica_stats(
+    token: str = Depends(oauth2_scheme),
+):
+    return read_router.stats()
+
+
+@router.get("/internal/password-hashing")
+async def password_hashing_stats(
+    token: str = Depends(oauth2_scheme),
+):
+    return {
+        **auth.hash_pool.stats(),
+        "scheme": auth.PASSWORD_HASH_SCHEME,
+        "rounds": auth.pwd_context.handler().default_rounds,
+        "rehash": password_rehasher.stats(),
+    }
+
+
+@router.get("/internal/login-limits")
+async def login_limit_stats(
+    token: str = Depends(oauth2_scheme),
+):
+    return login_limiter.stats()
+
+
+@router.get("/internal/cache")
+async def cache_stats(
+    token: str = Depends(oauth2_scheme),
+):
+    return {
+        "organization_detail": org_detail_cache.stats(),
+        "revoked_refresh_tokens": revoked_tokens.stats(),
+    }
+
+
+@router.get("/internal/jobs")
+async def job_queue_stats(
+    db: AsyncSession = Depends(get_db),
+    token: str = Depends(oauth2_scheme),
+):
+    return {"worker": job_queue.stats(), "queued": await job_queue.counts(db)}
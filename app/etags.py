@@ -0,0 +1,55 @@
+import hashlib
+
+from fastapi import Request, Response, status
+
+# Authenticated data: shared caches must not keep it, and clients must
+# revalidate before reusing it, which If-None-Match makes cheap.
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(request: Request, *versions: object) -> str:
+    """
+    Strong ETag for what `request` returns while its rows are at `versions`.
+
+    Query parameters such as fields, expand, filters and cursors change the
+    body served for the same rows, so the path and query are hashed in too;
+    their order does not matter.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(request.url.path.encode())
+
+    for key, value in sorted(request.query_params.multi_items()):
+        digest.update(f"\0{key}={value}".encode())
+
+    digest.update(b"\0\0")
+    digest.update(",".join(str(version) for version in versions).encode())
+
+    return f'"{digest.hexdigest()}"'
+
+
+def matches(request: Request, etag: str) -> bool:
+    """True when the request's If-None-Match names `etag`, or is `*`."""
+    header = request.headers.get("if-none-match")
+
+    if header is None:
+        return False
+
+    if header.strip() == "*":
+        return True
+
+    # If-None-Match compares weakly, so a W/ prefix does not matter.
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in header.split(",")
+    )
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
@@ -0,0 +1,57 @@
+"""
+Runs background job workers without serving HTTP.
+
+    python -m app.jobs --workers 4
+
+Lets provisioning scale apart from request handling: run web processes with
+JOB_WORKERS=0 and as many of these as the queue needs.
+"""
+
+import argparse
+import asyncio
+import logging
+import signal
+import sys
+from typing import Optional
+
+from app.db import async_engine
+from app.jobs.queue import JOB_WORKERS, job_queue
+
+# Registers the job handlers.
+import app.organizations.jobs  # noqa: F401
+
+
+async def run(workers: int) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    job_queue.start(workers)
+    try:
+        await stop.wait()
+    finally:
+        await job_queue.stop()
+        await async_engine.dispose()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.jobs",
+        description=__doc__.split("\n\n")[0].strip(),
+    )
+    parser.add_argument("--workers", type=int, default=max(int(JOB_WORKERS), 1))
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=args.log_level.upper(),
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+
+    asyncio.run(run(args.workers))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+from sqlalchemy import JSON, Column, DateTime, Index, Integer, String, func
+from app.db import Base
+
+# Job states. A finished job's row is deleted in the transaction that did
+# its work, so there is no "done" state.
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_FAILED = "failed"
+
+
+class JobModel(Base):
+    __tablename__ = "jobs"
+
+    # Workers claim due jobs of one kind (see JobQueue._claim); a running
+    # job whose lease ran out is due again.
+    __table_args__ = (
+        Index("ix_jobs_kind_status_run_after", "kind", "status", "run_after"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(String, nullable=False, default=JOB_PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    # When a pending job may run next, or when a running job's lease ends.
+    run_after = Column(DateTime, nullable=False)
+    # Set on every claim, so only the worker holding the lease can finish it.
+    claim_token = Column(String)
+    last_error = Column(String)
+    created_at = Column(DateTime, default=func.now())
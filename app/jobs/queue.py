@@ -0,0 +1,372 @@
+import asyncio
+import logging
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Optional, Sequence
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import async_session_local
+from app.jobs.models import JOB_FAILED, JOB_PENDING, JOB_RUNNING, JobModel
+from app.settings import load_env
+
+load_env()
+
+# Worker tasks per web process. 0 leaves the queue to `python -m app.jobs`.
+JOB_WORKERS: str | int = os.getenv(
+    "JOB_WORKERS",
+    default=1,
+)
+# Most jobs of one kind handled in a single transaction.
+JOB_BATCH_SIZE: str | int = os.getenv(
+    "JOB_BATCH_SIZE",
+    default=100,
+)
+# How long an idle worker sleeps when it is not woken by an enqueue in its
+# own process.
+JOB_POLL_SECONDS: str | int = os.getenv(
+    "JOB_POLL_SECONDS",
+    default=1,
+)
+JOB_MAX_ATTEMPTS: str | int = os.getenv(
+    "JOB_MAX_ATTEMPTS",
+    default=8,
+)
+JOB_RETRY_BASE_SECONDS: str | int = os.getenv(
+    "JOB_RETRY_BASE_SECONDS",
+    default=2,
+)
+JOB_RETRY_MAX_SECONDS: str | int = os.getenv(
+    "JOB_RETRY_MAX_SECONDS",
+    default=300,
+)
+# A claimed job that is not finished within this long is handed to another
+# worker, e.g. after its process died.
+JOB_LEASE_SECONDS: str | int = os.getenv(
+    "JOB_LEASE_SECONDS",
+    default=300,
+)
+
+# Keeps stored errors from growing with long tracebacks or payloads.
+MAX_ERROR_LENGTH = 1000
+
+logger = logging.getLogger("uvicorn.error")
+
+# Handles a batch of payloads of one kind. It must only write through `db`
+# and never commit: the queue commits its writes together with the removal
+# of the jobs, so a batch is applied exactly once or not at all.
+JobHandler = Callable[[AsyncSession, list[Any]], Awaitable[None]]
+
+
+class LeaseLost(Exception):
+    """Another worker claimed the job after its lease ran out."""
+
+
+def _utcnow() -> datetime:
+    # Naive UTC, like the other DateTime columns.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class JobQueue:
+    """
+    Durable queue of background jobs, stored in the `jobs` table.
+
+    Jobs are enqueued in the caller's transaction, so they exist exactly
+    when the change that asked for them was committed. Worker tasks claim
+    due jobs of one kind at a time, up to `batch_size`, and hand them to the
+    kind's handler in a single transaction with their own session. A batch
+    that fails is retried one job at a time, so one bad job only delays
+    itself; each failure is retried with exponential backoff and jitter,
+    up to `max_attempts`, after which the job is kept as failed.
+
+    Claims are atomic (FOR UPDATE SKIP LOCKED on Postgres, a single write
+    transaction on SQLite), so any number of workers, in any number of
+    processes, can share the table.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        poll_seconds: float,
+        max_attempts: int,
+        retry_base_seconds: float,
+        retry_max_seconds: float,
+        lease_seconds: float,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError("JOB_BATCH_SIZE must be at least 1")
+        if max_attempts < 1:
+            raise ValueError("JOB_MAX_ATTEMPTS must be at least 1")
+        if poll_seconds <= 0 or lease_seconds <= 0:
+            raise ValueError("JOB_POLL_SECONDS and JOB_LEASE_SECONDS must be positive")
+
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.lease_seconds = lease_seconds
+
+        self.handlers: dict[str, JobHandler] = {}
+
+        # Created on first use so nothing is bound to an event loop at import.
+        self._wake: Optional[asyncio.Event] = None
+        self._tasks: list[asyncio.Task] = []
+        self._stopping = False
+
+        self.batches = 0
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self.handlers[kind] = handler
+
+    def _get_wake(self) -> asyncio.Event:
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        return self._wake
+
+    def enqueue(self, db: AsyncSession, kind: str, payload: Any) -> None:
+        """Adds a job to `db`'s transaction; it runs once that commits."""
+        if kind not in self.handlers:
+            raise ValueError(f"No handler registered for job kind {kind!r}")
+
+        db.add(
+            JobModel(
+                kind=kind,
+                payload=payload,
+                status=JOB_PENDING,
+                attempts=0,
+                run_after=_utcnow(),
+            )
+        )
+
+    def notify(self) -> None:
+        """Wakes this process' idle workers, e.g. after committing an enqueue."""
+        if self._tasks:
+            self._get_wake().set()
+
+    async def _claim(self, kind: str) -> tuple[str, list[Any]]:
+        now = _utcnow()
+        token = uuid.uuid4().hex
+
+        due = (
+            select(JobModel.id)
+            .where(
+                JobModel.kind == kind,
+                JobModel.status.in_((JOB_PENDING, JOB_RUNNING)),
+                JobModel.run_after <= now,
+            )
+            .order_by(JobModel.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+
+        async with async_session_local() as db:
+            result = await db.execute(
+                update(JobModel)
+                .where(JobModel.id.in_(due.scalar_subquery()))
+                .values(
+                    status=JOB_RUNNING,
+                    attempts=JobModel.attempts + 1,
+                    run_after=now + timedelta(seconds=self.lease_seconds),
+                    claim_token=token,
+                )
+                .returning(JobModel.id, JobModel.payload, JobModel.attempts)
+                .execution_options(synchronize_session=False)
+            )
+            jobs = sorted(result.all(), key=lambda job: job.id)
+            await db.commit()
+
+        return token, jobs
+
+    async def _finish(
+        self,
+        db: AsyncSession,
+        token: str,
+        ids: Sequence[int],
+    ) -> None:
+        result = await db.execute(
+            delete(JobModel)
+            .where(JobModel.id.in_(ids), JobModel.claim_token == token)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != len(ids):
+            raise LeaseLost()
+
+    async def _run_batch(self, kind: str, token: str, jobs: Sequence[Any]) -> None:
+        async with async_session_local() as db:
+            await self.handlers[kind](db, [job.payload for job in jobs])
+            await self._finish(db, token, [job.id for job in jobs])
+            await db.commit()
+
+    def _retry_delay(self, attempts: int) -> float:
+        delay = min(
+            self.retry_max_seconds,
+            self.retry_base_seconds * 2 ** (attempts - 1),
+        )
+        # Jitter keeps jobs that failed together from retrying together.
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _release(
+        self,
+        kind: str,
+        token: str,
+        job: Any,
+        error: Exception,
+    ) -> None:
+        give_up = job.attempts >= self.max_attempts
+        values: dict[str, Any] = {
+            "claim_token": None,
+            "last_error": f"{type(error).__name__}: {error}"[:MAX_ERROR_LENGTH],
+        }
+        if give_up:
+            values["status"] = JOB_FAILED
+        else:
+            values["status"] = JOB_PENDING
+            values["run_after"] = _utcnow() + timedelta(
+                seconds=self._retry_delay(job.attempts)
+            )
+
+        async with async_session_local() as db:
+            result = await db.execute(
+                update(JobModel)
+                .where(JobModel.id == job.id, JobModel.claim_token == token)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+        if result.rowcount == 0:
+            return
+        if give_up:
+            self.failed += 1
+            logger.error(
+                "Job %d (%s) failed after %d attempts: %s",
+                job.id,
+                kind,
+                job.attempts,
+                values["last_error"],
+            )
+        else:
+            self.retried += 1
+
+    async def _process(self, kind: str, token: str, jobs: Sequence[Any]) -> None:
+        try:
+            await self._run_batch(kind, token, jobs)
+            self.completed += len(jobs)
+            return
+        except LeaseLost:
+            # Whoever holds the lease now runs these; nothing was committed.
+            return
+        except Exception as error:
+            if len(jobs) == 1:
+                await self._release(kind, token, jobs[0], error)
+                return
+
+        # Retried alone, so the jobs that are fine are not held back.
+        for job in jobs:
+            await self._process(kind, token, [job])
+
+    async def run_once(self, kind: str) -> int:
+        """Claims and runs one batch of `kind`; returns how many jobs it claimed."""
+        token, jobs = await self._claim(kind)
+        if not jobs:
+            return 0
+
+        started = time.perf_counter()
+        self.batches += 1
+        try:
+            await self._process(kind, token, jobs)
+        finally:
+            self.busy_seconds += time.perf_counter() - started
+
+        return len(jobs)
+
+    async def _work(self) -> None:
+        wake = self._get_wake()
+
+        while not self._stopping:
+            # Cleared before looking, so an enqueue that lands while this
+            # worker is busy still wakes it afterwards.
+            wake.clear()
+            claimed = 0
+            try:
+                for kind in list(self.handlers):
+                    claimed += await self.run_once(kind)
+            except Exception:
+                # The database may be briefly unavailable; jobs stay queued.
+                logger.exception("Job worker failed to claim jobs")
+
+            if claimed == 0 and not self._stopping:
+                try:
+                    await asyncio.wait_for(wake.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self, workers: int) -> None:
+        if workers < 0:
+            raise ValueError("JOB_WORKERS must not be negative")
+
+        self._stopping = False
+        self._tasks = [
+            asyncio.create_task(self._work(), name=f"job-worker-{i}")
+            for i in range(workers)
+        ]
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Lets workers finish their current batch, then cancels stragglers."""
+        if not self._tasks:
+            return
+
+        self._stopping = True
+        self._get_wake().set()
+
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            # An interrupted batch is rolled back and retried once its
+            # lease runs out.
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        self._tasks = []
+        self._wake = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "workers": len(self._tasks),
+            "batch_size": self.batch_size,
+            "kinds": sorted(self.handlers),
+            "batches": self.batches,
+            "completed": self.completed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "busy_seconds": self.busy_seconds,
+        }
+
+    async def counts(self, db: AsyncSession) -> dict[str, dict[str, int]]:
+        """Jobs in the table, by kind and status."""
+        result = await db.execute(
+            select(JobModel.kind, JobModel.status, func.count())
+            .group_by(JobModel.kind, JobModel.status)
+        )
+        counts: dict[str, dict[str, int]] = {}
+        for kind, job_status, count in result.all():
+            counts.setdefault(kind, {})[job_status] = count
+        return counts
+
+
+job_queue = JobQueue(
+    batch_size=int(JOB_BATCH_SIZE),
+    poll_seconds=float(JOB_POLL_SECONDS),
+    max_attempts=int(JOB_MAX_ATTEMPTS),
+    retry_base_seconds=float(JOB_RETRY_BASE_SECONDS),
+    retry_max_seconds=float(JOB_RETRY_MAX_SECONDS),
+    lease_seconds=float(JOB_LEASE_SECONDS),
+)
@@ -1,38 +1,85 @@
-from fastapi import FastAPI, HTTPException, status, Depends
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response, status, Depends
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm.session import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import authentication as auth
-from app.db import engine, get_db
+from app.bulk import (
+    BULK_REQUEST_BODY,
+    MAX_BULK_BATCH_SIZE,
+    iter_request_rows,
+    resolve_batch_size,
+)
+from app.db import async_engine, get_db, manage_schema, read_router
+from app.etags import make_etag, matches, not_modified, set_etag
 from app.crud import CustomFieldRepo
 import app.models as models
 from app.schemas import (
+    BulkIngestResultSchema,
     CustomFieldCreateSchema,
+    CustomFieldBaseSchema,
     OutputCustomFieldModelSchema,
 )
 
 from app.users.routers import router as user_router
 from app.organizations.routers import router as org_router
 from app.addresses.routers import router as address_router
-
+from app.search.routers import router as search_router
+from app.diagnostics import router as diagnostics_router
+from app.jobs.queue import JOB_WORKERS, job_queue
+from app.metrics import MetricsMiddleware
+from app.ratelimit import login_limiter
+from app.replicas import ClientMiddleware
+from app.revocation import revoked_tokens
+from app.settings import get_settings
+
+from app.users.importer import user_importer
+from app.users.rehash import password_rehasher
 from app.users.repo import UserRepo
 from app.organizations.repo import OrganizationRepo
 
 from datetime import timedelta
-import jwt
-from typing import List
+from typing import List, Optional
 
 from fastapi.staticfiles import StaticFiles
 
-app = FastAPI(title="RiffRaff Inventory")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup work lives here rather than at import, so importing the app
+    # (workers, tooling, tests) never touches the database.
+    await manage_schema(get_settings().schema_management)
+    revoked_tokens.load()
+    user_importer.start()
+    job_queue.start(int(JOB_WORKERS))
+    read_router.start()
+    yield
+    await read_router.stop()
+    await job_queue.stop()
+    await password_rehasher.drain()
+    auth.hash_pool.shutdown()
+    user_importer.shutdown()
+    await async_engine.dispose()
+
+
+app = FastAPI(title="RiffRaff Inventory", lifespan=lifespan)
+
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ClientMiddleware)
 
 app.include_router(user_router, tags=["Users"])
 app.include_router(org_router, tags=["Organization"])
 app.include_router(address_router, tags=["Address"])
-
-app.mount("/static", StaticFiles(directory="static"), name="static")
-
-models.Base.metadata.create_all(bind=engine)
+app.include_router(search_router, tags=["Search"])
+app.include_router(diagnostics_router, tags=["Diagnostics"])
+
+# The directory is checked on first use instead of at import.
+app.mount(
+    "/static",
+    StaticFiles(directory="static", check_dir=False),
+    name="static",
+)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -49,10 +96,14 @@ c_fields_repo = CustomFieldRepo()
 
 @app.post("/token")
 async def generate_access_token(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    user = user_repo.login(db, form_data.username, form_data.password)
+    # Over-limit attempts are refused before bcrypt runs.
+    client_ip = request.client.host if request.client else None
+    async with login_limiter.admit(client_ip, form_data.username):
+        user = await user_repo.login(db, form_data.username, form_data.password)
 
     access_token_expires = timedelta(
         minutes=float(auth.ACCESS_TOKEN_EXPIRE_MINUTES),
@@ -74,26 +125,21 @@ async def generate_access_token(
 @app.post("/token/refresh")
 async def token_refresh(
     token: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    try:
-        authenticator = auth.Authenticator()
-        payload = authenticator.decode_access_token(token)
-        username: str = payload.get("sub")
-        if username.strip() == "":
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User credential mismatch",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-    except jwt.PyJWTError as e:
+    authenticator = auth.Authenticator()
+    claims = authenticator.decode_refresh_token(token)
+
+    # Refresh tokens are single use: redeeming one revokes it, and a token
+    # that was already redeemed or revoked is refused.
+    if not await revoked_tokens.claim_async(claims["jti"], claims["exp"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=f"Could not validate credentials | details={e}",
+            detail="Refresh token has been revoked",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = user_repo.fetch_user_by_username(db=db, username=username)
+    user = await user_repo.fetch_user_by_username(db=db, username=claims["sub"])
 
     access_token_expires = timedelta(minutes=float(auth.ACCESS_TOKEN_EXPIRE_MINUTES))
 
@@ -103,11 +149,20 @@ async def token_refresh(
 
     return {
         "access_token": tokens["access"],
-        "refresh_token": token,
+        "refresh_token": tokens["refresh"],
         "token_type": "bearer",
     }
 
 
+@app.post("/token/revoke", status_code=204)
+async def token_revoke(
+    token: str,
+):
+    claims = auth.Authenticator().decode_refresh_token(token)
+
+    await revoked_tokens.revoke_async(claims["jti"], claims["exp"])
+
+
 @app.post(
     "/custom_fields",
     response_model=OutputCustomFieldModelSchema,
@@ -116,10 +171,10 @@ async def token_refresh(
 async def create_custom_field(
     request_custom_field: CustomFieldCreateSchema,
     org_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme),
 ):
-    custom_field = c_fields_repo.create(
+    custom_field = await c_fields_repo.create(
         db=db,
         custom_field=request_custom_field,
         org_id=org_id,
@@ -128,17 +183,58 @@ async def create_custom_field(
     return custom_field
 
 
+@app.post(
+    "/custom_fields/bulk",
+    response_model=BulkIngestResultSchema,
+    status_code=200,
+    openapi_extra=BULK_REQUEST_BODY,
+)
+async def bulk_create_custom_fields(
+    request: Request,
+    org_id: int,
+    batch_size: Optional[int] = Query(default=None, ge=1, le=MAX_BULK_BATCH_SIZE),
+    db: AsyncSession = Depends(get_db),
+    token: str = Depends(oauth2_scheme),
+):
+    await org_repo.ensure_exists(db=db, org_id=org_id)
+
+    result = await c_fields_repo.bulk_create(
+        db=db,
+        org_id=org_id,
+        rows=iter_request_rows(request),
+        batch_size=resolve_batch_size(batch_size),
+    )
+
+    return result
+
+
 @app.get(
     "/custom_fields/{org_id}",
-    response_model=List[OutputCustomFieldModelSchema],
-    status_code=201,
+    response_model=List[CustomFieldBaseSchema],
+    status_code=200,
 )
 async def fetch_custom_fields_for_organization(
     org_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme),
 ):
-    org = org_repo.fetch_organizations_by_id(db=db, org_id=org_id)
+    version = await org_repo.fetch_version(db=db, org_id=org_id)
+
+    if version is not None:
+        etag = make_etag(request, version)
+        if matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+
+    org = await org_repo.fetch_organizations_by_id(
+        db=db,
+        org_id=org_id,
+        fields=("id",),
+        expand=("custom_fields",),
+        version=version,
+    )
 
     if org.custom_fields is None:
         raise HTTPException(
@@ -0,0 +1,352 @@
+import asyncio
+from contextvars import ContextVar
+import functools
+import math
+import threading
+import time
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Latency buckets in seconds, from sub-millisecond cache hits up to slow
+# bcrypt calls and long listings.
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+QUERY_COUNT_BUCKETS: tuple[float, ...] = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        f'{key}="{_escape(str(value))}"' for key, value in labels.items()
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            labels = _format_labels(dict(zip(self.labelnames, key)))
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> (per-bucket counts, sum, count)
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = ([0] * len(self.buckets), [0.0, 0.0])
+                self._series[key] = series
+            counts, totals = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            totals[0] += value
+            totals[1] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = [
+                (key, list(counts), list(totals))
+                for key, (counts, totals) in self._series.items()
+            ]
+        for key, counts, (total, count) in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(labels)} {_format_value(count)}"
+
+
+class GaugeCollector:
+    """Gauges read on every scrape from a callback yielding (labels, value)."""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        collect: Callable[[], Iterable[tuple[dict[str, str], float]]],
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.collect = collect
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        for labels, value in self.collect():
+            yield f"{self.name}{_format_labels(labels)} {_format_value(value)}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: list[Any] = []
+
+    def register(self, metric: Any) -> Any:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+http_request_duration = REGISTRY.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Request latency by route template and status code.",
+        labelnames=("method", "route", "status"),
+    )
+)
+http_request_db_queries = REGISTRY.register(
+    Histogram(
+        "http_request_db_queries",
+        "Number of SQL statements issued per request.",
+        labelnames=("method", "route"),
+        buckets=QUERY_COUNT_BUCKETS,
+    )
+)
+http_request_db_duration = REGISTRY.register(
+    Histogram(
+        "http_request_db_duration_seconds",
+        "Time spent executing SQL per request.",
+        labelnames=("method", "route"),
+    )
+)
+db_query_duration = REGISTRY.register(
+    Histogram(
+        "db_query_duration_seconds",
+        "Latency of individual SQL statements.",
+    )
+)
+auth_operation_duration = REGISTRY.register(
+    Histogram(
+        "auth_operation_duration_seconds",
+        "Latency of Authenticator operations.",
+        labelnames=("operation",),
+    )
+)
+auth_operation_errors = REGISTRY.register(
+    Counter(
+        "auth_operation_errors_total",
+        "Authenticator operations that raised.",
+        labelnames=("operation",),
+    )
+)
+
+
+class RequestStats:
+    __slots__ = ("db_queries", "db_seconds")
+
+    def __init__(self) -> None:
+        self.db_queries = 0
+        self.db_seconds = 0.0
+
+
+# Set by MetricsMiddleware for the lifetime of one request. SQLAlchemy runs
+# async driver calls in the caller's context, so engine hooks see it too.
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    "request_stats",
+    default=None,
+)
+
+
+def instrument_engine(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    def finish_query(conn) -> None:
+        started = conn.info.get("query_started_at")
+        if not started:
+            return
+
+        elapsed = time.perf_counter() - started.pop()
+        db_query_duration.observe(elapsed)
+
+        stats = request_stats.get()
+        if stats is not None:
+            stats.db_queries += 1
+            stats.db_seconds += elapsed
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        finish_query(conn)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        # A failed statement never reaches after_cursor_execute; without
+        # this its start time would stay on the pooled connection.
+        if context.connection is not None:
+            finish_query(context.connection)
+
+
+def timed(operation: str):
+    """Records the duration of a sync or async callable as an auth span."""
+
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                except Exception:
+                    auth_operation_errors.inc(operation=operation)
+                    raise
+                finally:
+                    auth_operation_duration.observe(
+                        time.perf_counter() - started,
+                        operation=operation,
+                    )
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                auth_operation_errors.inc(operation=operation)
+                raise
+            finally:
+                auth_operation_duration.observe(
+                    time.perf_counter() - started,
+                    operation=operation,
+                )
+
+        return wrapper
+
+    return decorator
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency and DB usage per route template.
+
+    The route is read from the scope after routing, so `/address/{org_id}` is
+    one series no matter how many organizations are requested.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            request_stats.reset(token)
+
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+
+            http_request_duration.observe(
+                elapsed,
+                method=method,
+                route=route_path,
+                status=str(status_code),
+            )
+            http_request_db_queries.observe(
+                stats.db_queries,
+                method=method,
+                route=route_path,
+            )
+            http_request_db_duration.observe(
+                stats.db_seconds,
+                method=method,
+                route=route_path,
+            )
@@ -7,7 +7,7 @@ class CustomFieldModel(Base):
     __tablename__ = "custom_fields"
 
     id = Column(Integer, primary_key=True, index=True)
-    organization_id = Column(Integer, ForeignKey("organizations.id"))
+    organization_id = Column(Integer, ForeignKey("organizations.id"), index=True)
     index = Column(Integer)
     value = Column(String)
     label = Column(String)
@@ -0,0 +1,71 @@
+import os
+from typing import Optional
+
+from app.cache import (
+    CacheBackend,
+    MemoryCacheBackend,
+    ReadThroughCache,
+    RedisCacheBackend,
+)
+from app.organizations.schemas import OutputOrganizationModelSchema
+from app.settings import load_env
+
+load_env()
+
+# "memory" keeps a per-worker LRU, "redis" shares entries between workers and
+# "none" turns the cache off.
+ORG_CACHE_BACKEND: str = os.getenv(
+    "ORG_CACHE_BACKEND",
+    default="memory",
+)
+ORG_CACHE_URL: str = os.getenv(
+    "ORG_CACHE_URL",
+    default="redis://localhost:6379/0",
+)
+ORG_CACHE_TTL_SECONDS: str | int = os.getenv(
+    "ORG_CACHE_TTL_SECONDS",
+    default=300,
+)
+ORG_CACHE_MAX_ENTRIES: str | int = os.getenv(
+    "ORG_CACHE_MAX_ENTRIES",
+    default=10000,
+)
+
+
+def build_backend(
+    kind: str,
+) -> Optional[CacheBackend[OutputOrganizationModelSchema]]:
+    if kind == "none":
+        return None
+
+    if kind == "memory":
+        return MemoryCacheBackend(
+            maxsize=int(ORG_CACHE_MAX_ENTRIES),
+            ttl=float(ORG_CACHE_TTL_SECONDS),
+        )
+
+    if kind == "redis":
+        return RedisCacheBackend(
+            url=ORG_CACHE_URL,
+            encode=lambda org: org.model_dump_json(),
+            decode=OutputOrganizationModelSchema.model_validate_json,
+            prefix="riffraff:",
+        )
+
+    raise ValueError(
+        f"ORG_CACHE_BACKEND must be 'memory', 'redis' or 'none', got {kind!r}"
+    )
+
+
+# Keys carry the organization's version, which every write bumps, so an entry
+# is never stale: writes need not reach the cache, even another worker's.
+# Superseded versions age out through the TTL and LRU.
+def org_detail_key(org_id: int, version: int) -> str:
+    return f"org:{org_id}:v{version}"
+
+
+# Fully expanded organization details, as served by fetch_organizations_by_id.
+org_detail_cache: ReadThroughCache[OutputOrganizationModelSchema] = ReadThroughCache(
+    backend=build_backend(ORG_CACHE_BACKEND),
+    ttl=float(ORG_CACHE_TTL_SECONDS),
+)
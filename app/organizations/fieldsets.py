@@ -0,0 +1,50 @@
+from typing import Iterable, Optional
+
+from fastapi import HTTPException, status
+
+from app.organizations.schemas import OutputOrganizationModelSchema
+
+ORGANIZATION_RELATIONSHIPS: tuple[str, ...] = ("addresses", "custom_fields")
+
+ORGANIZATION_FIELDS: tuple[str, ...] = tuple(
+    name
+    for name in OutputOrganizationModelSchema.model_fields
+    if name not in ORGANIZATION_RELATIONSHIPS
+)
+
+
+def _split(value: str) -> list[str]:
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def _reject_unknown(names: Iterable[str], allowed: tuple[str, ...], param: str):
+    unknown = sorted(set(names) - set(allowed))
+
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown {param}: {', '.join(unknown)}. Allowed: {', '.join(allowed)}",
+        )
+
+
+# `?fields=name,is_org_active` -> ("id", "name", "is_org_active"). The id is
+# always returned since clients and keyset cursors depend on it.
+def parse_fields(value: Optional[str]) -> Optional[tuple[str, ...]]:
+    if value is None:
+        return None
+
+    names = _split(value)
+    _reject_unknown(names, ORGANIZATION_FIELDS, "fields")
+
+    return tuple(dict.fromkeys(["id", *names]))
+
+
+# `?expand=addresses,custom_fields`; nothing is expanded by default.
+def parse_expand(value: Optional[str]) -> tuple[str, ...]:
+    if value is None:
+        return ()
+
+    names = _split(value)
+    _reject_unknown(names, ORGANIZATION_RELATIONSHIPS, "expand")
+
+    return tuple(dict.fromkeys(names))
@@ -0,0 +1,218 @@
+import json
+from typing import Any, AsyncIterator, Optional
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.addresses.models import AddressModel
+from app.addresses.schemas import AddressCreateSchema
+from app.models import CustomFieldModel
+from app.organizations.export import ADDRESS, CUSTOM_FIELD, ORGANIZATION
+from app.organizations.models import OrganizationModel
+from app.organizations.schemas import (
+    OrganizationCreateSchema,
+    OrganizationImportResultSchema,
+)
+from app.schemas import BulkRowErrorSchema, CustomFieldCreateSchema
+
+# Child record types: their schema, table, and the key an organization
+# record may also list them under inline.
+CHILD_RECORDS: dict[str, tuple[type[BaseModel], type, str]] = {
+    ADDRESS: (AddressCreateSchema, AddressModel, "addresses"),
+    CUSTOM_FIELD: (CustomFieldCreateSchema, CustomFieldModel, "custom_fields"),
+}
+
+
+class _Owner:
+    """An imported organization, which the child records after it belong to."""
+
+    def __init__(self, row: int, exported_id: Any) -> None:
+        self.row = row
+        self.exported_id = exported_id
+        self.new_id: Optional[int] = None
+        self.failed = False
+
+
+class TenantImporter:
+    """
+    Imports the NDJSON that TenantExporter writes.
+
+    Organizations get new ids. The addresses and custom fields following an
+    organization record are attached to its new id, so only the current
+    organization is remembered and memory does not grow with the import.
+    Records are written in batches: one executemany per table and one
+    commit per `batch_size` records. Records that fail validation, or that
+    belong to a batch the database rejects, are reported instead of
+    aborting the import.
+    """
+
+    @staticmethod
+    def _fail(
+        result: OrganizationImportResultSchema,
+        row: int,
+        errors: list[Any],
+    ) -> None:
+        result.failed += 1
+        result.errors.append(BulkRowErrorSchema(row=row, errors=errors))
+
+    async def run(
+        self,
+        db: AsyncSession,
+        rows: AsyncIterator[tuple[int, Any, Optional[str]]],
+        batch_size: int,
+    ) -> OrganizationImportResultSchema:
+        result = OrganizationImportResultSchema()
+
+        owner: Optional[_Owner] = None
+        orgs: list[tuple[int, dict[str, Any], _Owner]] = []
+        children: dict[str, list[tuple[int, dict[str, Any], _Owner]]] = {
+            record_type: [] for record_type in CHILD_RECORDS
+        }
+
+        def pending() -> int:
+            return len(orgs) + sum(len(batch) for batch in children.values())
+
+        async def flush() -> None:
+            if not pending():
+                return
+
+            try:
+                if orgs:
+                    inserted = await db.execute(
+                        insert(OrganizationModel).returning(
+                            OrganizationModel.id, sort_by_parameter_order=True
+                        ),
+                        [values for _, values, _ in orgs],
+                    )
+                    for (_, _, org_owner), new_id in zip(orgs, inserted.scalars()):
+                        org_owner.new_id = new_id
+
+                for record_type, batch in children.items():
+                    if batch:
+                        await db.execute(
+                            insert(CHILD_RECORDS[record_type][1]),
+                            [
+                                {**values, "organization_id": child_owner.new_id}
+                                for _, values, child_owner in batch
+                            ],
+                        )
+
+                await db.commit()
+            except SQLAlchemyError as e:
+                await db.rollback()
+
+                # Children still to come cannot attach to these. An
+                # organization committed in an earlier batch has lost the
+                # children in this one, so the rest of it is refused too.
+                for _, _, org_owner in orgs:
+                    org_owner.failed = True
+                for batch in children.values():
+                    for _, _, child_owner in batch:
+                        child_owner.failed = True
+
+                batch_rows = {row for row, _, _ in orgs}
+                for batch in children.values():
+                    batch_rows.update(row for row, _, _ in batch)
+                for row in sorted(batch_rows):
+                    self._fail(result, row, [str(getattr(e, "orig", None) or e)])
+            else:
+                result.organizations += len(orgs)
+                result.addresses += len(children[ADDRESS])
+                result.custom_fields += len(children[CUSTOM_FIELD])
+                result.inserted += pending()
+
+            orgs.clear()
+            for batch in children.values():
+                batch.clear()
+
+        async for row, payload, error in rows:
+            result.received += 1
+
+            if error is not None:
+                self._fail(result, row, [error])
+                continue
+
+            if not isinstance(payload, dict):
+                self._fail(result, row, ["Expected a JSON object"])
+                continue
+
+            record_type = payload.get("type")
+
+            if record_type == ORGANIZATION:
+                owner = _Owner(row, payload.get("id"))
+
+                try:
+                    org = OrganizationCreateSchema.model_validate(payload)
+                except ValidationError as e:
+                    owner.failed = True
+                    self._fail(result, row, json.loads(e.json(include_url=False)))
+                    continue
+
+                orgs.append(
+                    (row, org.model_dump(exclude={"addresses", "custom_fields"}), owner)
+                )
+
+                # Children may also be listed inline, as the API returns them.
+                for child_type, (_, _, key) in CHILD_RECORDS.items():
+                    for child in getattr(org, key) or []:
+                        children[child_type].append((row, child.model_dump(), owner))
+
+            elif record_type in CHILD_RECORDS:
+                organization_id = payload.get("organization_id")
+
+                if owner is None:
+                    self._fail(
+                        result, row, [f"{record_type} records must follow their organization"]
+                    )
+                    continue
+
+                if "organization_id" in payload and organization_id != owner.exported_id:
+                    self._fail(
+                        result,
+                        row,
+                        [
+                            f"Belongs to organization {organization_id!r} but follows "
+                            f"organization {owner.exported_id!r} (row {owner.row})"
+                        ],
+                    )
+                    continue
+
+                if owner.failed:
+                    self._fail(
+                        result, row, [f"Organization at row {owner.row} failed to import"]
+                    )
+                    continue
+
+                schema = CHILD_RECORDS[record_type][0]
+                try:
+                    child = schema.model_validate(payload)
+                except ValidationError as e:
+                    self._fail(result, row, json.loads(e.json(include_url=False)))
+                    continue
+
+                children[record_type].append((row, child.model_dump(), owner))
+
+            else:
+                self._fail(
+                    result,
+                    row,
+                    [
+                        f"Unknown record type {record_type!r}; expected one of "
+                        f"{', '.join([ORGANIZATION, *CHILD_RECORDS])}"
+                    ],
+                )
+                continue
+
+            if pending() >= batch_size:
+                await flush()
+
+        await flush()
+
+        # Rows of a rejected batch are reported after later rows' errors.
+        result.errors.sort(key=lambda error: error.row)
+        return result
+
+
+tenant_importer = TenantImporter()
@@ -0,0 +1,25 @@
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.jobs.queue import job_queue
+from app.organizations.repo import OrganizationRepo
+from app.organizations.schemas import OrganizationCreateSchema
+
+# Creates the organization a newly registered user starts with.
+PROVISION_DEFAULT_ORGANIZATION = "provision_default_organization"
+
+org_repo = OrganizationRepo()
+
+
+async def provision_default_organizations(
+    db: AsyncSession,
+    payloads: list[Any],
+) -> None:
+    await org_repo.add_many(
+        db=db,
+        orgs=[OrganizationCreateSchema.model_validate(payload) for payload in payloads],
+    )
+
+
+job_queue.register(PROVISION_DEFAULT_ORGANIZATION, provision_default_organizations)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, func, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, func, Boolean, Index
 from sqlalchemy.orm import relationship
 from app.db import Base
 
@@ -6,6 +6,16 @@ from app.db import Base
 class OrganizationModel(Base):
     __tablename__ = "organizations"
 
+    # Listings filter on one of these columns and page through the result by
+    # id (see OrganizationRepo.fetch_organizations), so each index leads with
+    # the filter column and ends with id to serve both the filter and the
+    # keyset order.
+    __table_args__ = (
+        Index("ix_organizations_is_org_active_id", "is_org_active", "id"),
+        Index("ix_organizations_industry_type_id", "industry_type", "id"),
+        Index("ix_organizations_currency_code_id", "currency_code", "id"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     fiscal_year_start_month = Column(String)
@@ -36,5 +46,21 @@ class OrganizationModel(Base):
     email = Column(String)
     is_org_active = Column(Boolean, default=True)
 
-    addresses = relationship("AddressModel", back_populates="organization")
-    custom_fields = relationship("CustomFieldModel", back_populates="organization")
+    # Bumped by every repo write to the organization and to its addresses and
+    # custom fields, so it alone versions everything the organization's GET
+    # routes return; their ETags are derived from it (see app.etags).
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    # Loading is always explicit in OrganizationRepo; an implicit lazy load
+    # here would be an N+1 query, so it raises instead.
+    addresses = relationship(
+        "AddressModel",
+        back_populates="organization",
+        lazy="raise_on_sql",
+    )
+    custom_fields = relationship(
+        "CustomFieldModel",
+        back_populates="organization",
+        lazy="raise_on_sql",
+    )
@@ -1,15 +1,26 @@
+from typing import Sequence
 from typing_extensions import Optional
 from fastapi import status
 from fastapi.exceptions import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, load_only, selectinload
 
 from app.models import CustomFieldModel
+from app.pagination import decode_cursor, encode_cursor
+from app.replicas import read_only
 
+from app.organizations.cache import org_detail_cache, org_detail_key
+from app.organizations.fieldsets import ORGANIZATION_FIELDS, ORGANIZATION_RELATIONSHIPS
 from app.organizations.models import OrganizationModel
+from app.users.cache import current_user_cache
 from app.users.models import UserModel
 from app.addresses.models import AddressModel 
+from app.addresses.schemas import AddressBaseSchema
+from app.schemas import CustomFieldBaseSchema
 from app.organizations.schemas import (
     OrganizationCreateSchema,
+    OrganizationPageSchema,
     OrganizationUpdateSchema,
     OutputOrganizationModelSchema,
 )
@@ -19,69 +30,335 @@ class OrganizationRepo:
     def __init__(self) -> None:
         pass
 
-    def create(
+    # Relationships are never lazy loaded (see OrganizationModel), so every
+    # read path states up front how it loads the ones it returns.
+    #
+    # Listings select-in each expanded collection: one extra query per
+    # relationship however many organizations are on the page.
+    LIST_LOADERS = {
+        "addresses": selectinload(OrganizationModel.addresses),
+        "custom_fields": selectinload(OrganizationModel.custom_fields),
+    }
+
+    # A single organization joins its addresses into the main query and
+    # selects its custom fields separately, which avoids an addresses x
+    # custom fields cartesian product.
+    DETAIL_LOADERS = {
+        "addresses": joinedload(OrganizationModel.addresses),
+        "custom_fields": selectinload(OrganizationModel.custom_fields),
+    }
+
+    @staticmethod
+    def _projection(
+        loaders: dict,
+        fields: Optional[Sequence[str]],
+        expand: Sequence[str],
+    ):
+        options = [loaders[name] for name in expand]
+
+        # Only the requested columns are selected; relationships that were
+        # not expanded are never loaded at all.
+        if fields is not None:
+            options.append(
+                load_only(*(getattr(OrganizationModel, name) for name in fields))
+            )
+
+        return options
+
+    # Schemas for the expanded relationships.
+    RELATIONSHIP_SCHEMAS = {
+        "addresses": AddressBaseSchema,
+        "custom_fields": CustomFieldBaseSchema,
+    }
+
+    @classmethod
+    def _to_output(
+        cls,
+        org_in_db: OrganizationModel,
+        fields: Optional[Sequence[str]],
+        expand: Sequence[str],
+    ):
+        data = {
+            name: getattr(org_in_db, name)
+            for name in (fields if fields is not None else ORGANIZATION_FIELDS)
+        }
+
+        # Child rows are small and validate in pydantic-core faster than
+        # model_construct can copy them in Python.
+        for name in expand:
+            schema = cls.RELATIONSHIP_SCHEMAS[name]
+            data[name] = [
+                schema.model_validate(row) for row in getattr(org_in_db, name)
+            ]
+
+        # The organization row itself comes from our own table and was
+        # validated on the way in; constructing it skips the per-row email
+        # validation, which dominates listing cost. Only the keys present
+        # count as set, so routes that exclude unset fields return exactly
+        # the requested projection.
+        return OutputOrganizationModelSchema.model_construct(**data)
+
+    async def _fetch_one(
+        self,
+        db: AsyncSession,
+        org_id: int,
+        fields: Optional[Sequence[str]] = None,
+        expand: Sequence[str] = ORGANIZATION_RELATIONSHIPS,
+        populate_existing: bool = False,
+    ):
+        result = await db.execute(
+            select(OrganizationModel)
+            .options(*self._projection(self.DETAIL_LOADERS, fields, expand))
+            .filter(OrganizationModel.id == org_id)
+            .execution_options(populate_existing=populate_existing)
+        )
+
+        return result.unique().scalars().first()
+
+    async def _reload(
         self,
-        db: Session,
+        db: AsyncSession,
+        org_id: int,
+    ):
+        return await self._fetch_one(db=db, org_id=org_id, populate_existing=True)
+
+    async def create(
+        self,
+        db: AsyncSession,
         org: OrganizationCreateSchema,
     ):
         org_in_db = OrganizationModel()
 
-        for key, value in org:
+        for key, value in org.model_dump(
+            exclude={"addresses", "custom_fields"}
+        ).items():
             setattr(org_in_db, key, value)
 
-        db.add(org_in_db)
-        db.commit()
-        db.refresh(org_in_db)
+        # The organization and all of its children are written in a single
+        # transaction; child rows go out as one executemany per table.
+        try:
+            db.add(org_in_db)
+            await db.flush()
+
+            # Adding addresses if any
+            if org.addresses:
+                await db.execute(
+                    insert(AddressModel),
+                    [
+                        {**addr.model_dump(), "organization_id": org_in_db.id}
+                        for addr in org.addresses
+                    ],
+                )
+
+            # Adding custom fields if any
+            if org.custom_fields:
+                await db.execute(
+                    insert(CustomFieldModel),
+                    [
+                        {**custom_field.model_dump(), "organization_id": org_in_db.id}
+                        for custom_field in org.custom_fields
+                    ],
+                )
 
-        # Adding addresses if any
-        if org.addresses is not None:
-            for addr in org.addresses:
-                db_addr = AddressModel()
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
 
-                for key, value in addr:
-                    setattr(db_addr, key, value)
+        org_in_db = await self._reload(db=db, org_id=org_in_db.id)
 
-                setattr(db_addr, "organization_id", org_in_db.id)
+        return OutputOrganizationModelSchema.model_validate(org_in_db)
 
-                db.add(db_addr)
-                db.commit()
-                db.refresh(db_addr)
+    async def add_many(
+        self,
+        db: AsyncSession,
+        orgs: Sequence[OrganizationCreateSchema],
+    ) -> None:
+        """
+        Inserts organizations without children as one executemany.
 
-        # Adding custom fields if any
-        if org.custom_fields is not None:
-            for custom_field in org.custom_fields:
-                db_custom_field = CustomFieldModel()
+        Nothing is committed; the caller owns the transaction.
+        """
+        await db.execute(
+            insert(OrganizationModel),
+            [org.model_dump(exclude={"addresses", "custom_fields"}) for org in orgs],
+        )
 
-                for key, value in custom_field:
-                    setattr(db_custom_field, key, value)
+    @staticmethod
+    def _listing(
+        query,
+        limit: int,
+        cursor: Optional[str],
+        is_org_active: Optional[bool],
+        industry_type: Optional[str],
+        currency_code: Optional[str],
+    ):
+        # Keyset pagination: each page seeks past the last id it returned, so
+        # the cost of a page does not depend on how deep into the table it is.
+        if cursor is not None:
+            after_id = decode_cursor(cursor).get("id")
+            if not isinstance(after_id, int):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid pagination cursor",
+                )
+            query = query.filter(OrganizationModel.id > after_id)
 
-                setattr(db_custom_field, "organization_id", org_in_db.id)
+        if is_org_active is not None:
+            query = query.filter(OrganizationModel.is_org_active == is_org_active)
 
-                db.add(db_custom_field)
-                db.commit()
-                db.refresh(db_custom_field)
+        if industry_type is not None:
+            query = query.filter(OrganizationModel.industry_type == industry_type)
 
-        return OutputOrganizationModelSchema.model_validate(org_in_db)
+        if currency_code is not None:
+            query = query.filter(OrganizationModel.currency_code == currency_code)
 
-    def fetch_organizations(
+        # One extra row tells us whether another page exists.
+        return query.order_by(OrganizationModel.id).limit(limit + 1)
+
+    @read_only
+    async def fetch_organizations(
         self,
-        db: Session,
+        db: AsyncSession,
+        limit: int,
+        cursor: Optional[str] = None,
+        is_org_active: Optional[bool] = None,
+        industry_type: Optional[str] = None,
+        currency_code: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+        expand: Sequence[str] = ORGANIZATION_RELATIONSHIPS,
     ):
-        orgs_in_db = db.query(OrganizationModel).all()
+        query = select(OrganizationModel).options(
+            *self._projection(self.LIST_LOADERS, fields, expand)
+        )
+
+        result = await db.execute(
+            self._listing(
+                query, limit, cursor, is_org_active, industry_type, currency_code
+            )
+        )
+        orgs_in_db = result.scalars().all()
+
+        has_more = len(orgs_in_db) > limit
+        orgs_in_db = orgs_in_db[:limit]
 
         output_orgs_schemas = [
-            OutputOrganizationModelSchema.model_validate(org) for org in orgs_in_db
+            self._to_output(org, fields, expand) for org in orgs_in_db
         ]
 
-        return output_orgs_schemas
+        return OrganizationPageSchema(
+            items=output_orgs_schemas,
+            next=encode_cursor({"id": orgs_in_db[-1].id}) if has_more else None,
+        )
+
+    @read_only
+    async def fetch_listing_versions(
+        self,
+        db: AsyncSession,
+        limit: int,
+        cursor: Optional[str] = None,
+        is_org_active: Optional[bool] = None,
+        industry_type: Optional[str] = None,
+        currency_code: Optional[str] = None,
+    ) -> list[tuple[int, int]]:
+        """
+        (id, version) of each organization on the page fetch_organizations
+        would return, from the same filtered range and without loading rows
+        or children; versions cover children too (see touch).
+        """
+        query = select(OrganizationModel.id, OrganizationModel.version)
+
+        result = await db.execute(
+            self._listing(
+                query, limit, cursor, is_org_active, industry_type, currency_code
+            )
+        )
+
+        return [tuple(row) for row in result.all()]
+
+    @read_only
+    async def fetch_version(
+        self,
+        db: AsyncSession,
+        org_id: int,
+    ) -> Optional[int]:
+        """The organization's version, or None if it does not exist."""
+        result = await db.execute(
+            select(OrganizationModel.version).filter(OrganizationModel.id == org_id)
+        )
+
+        return result.scalar()
+
+    @staticmethod
+    async def touch(
+        db: AsyncSession,
+        org_id: int,
+    ) -> None:
+        """
+        Bumps the organization's version in the caller's transaction.
+
+        Every write to its addresses and custom fields calls this as well, so
+        a conditional GET of any of them only has to read this one row.
+        """
+        await db.execute(
+            update(OrganizationModel)
+            .where(OrganizationModel.id == org_id)
+            .values(version=OrganizationModel.version + 1)
+        )
 
-    def fetch_organizations_by_id(
+    @read_only
+    async def fetch_organizations_by_id(
         self,
-        db: Session,
+        db: AsyncSession,
         org_id: int,
+        fields: Optional[Sequence[str]] = None,
+        expand: Sequence[str] = ORGANIZATION_RELATIONSHIPS,
+        version: Optional[int] = None,
     ):
-        org_in_db = (
-            db.query(OrganizationModel).filter(OrganizationModel.id == org_id).first()
+        """
+        `version` is the organization's version as the caller already read
+        it, if it did; the cached detail for that version is served.
+        """
+        if not org_detail_cache.enabled:
+            return await self._fetch_detail(
+                db=db,
+                org_id=org_id,
+                fields=fields,
+                expand=expand,
+            )
+
+        if version is None:
+            version = await self.fetch_version(db=db, org_id=org_id)
+
+            if version is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Organization not found",
+                )
+
+        # The cache always holds the full detail; narrower reads are cut
+        # from it rather than cached separately, so one entry per version
+        # covers every projection. A detail loaded after `version` was read
+        # can only be newer than it, never older.
+        org = await org_detail_cache.get_or_load(
+            org_detail_key(org_id, version),
+            lambda: self._fetch_detail(db=db, org_id=org_id),
+        )
+
+        return self._project(org, fields, expand)
+
+    async def _fetch_detail(
+        self,
+        db: AsyncSession,
+        org_id: int,
+        fields: Optional[Sequence[str]] = None,
+        expand: Sequence[str] = ORGANIZATION_RELATIONSHIPS,
+    ):
+        org_in_db = await self._fetch_one(
+            db=db,
+            org_id=org_id,
+            fields=fields,
+            expand=expand,
         )
 
         if org_in_db is None:
@@ -90,21 +367,61 @@ class OrganizationRepo:
                 detail="Organization not found",
             )
 
-        return OutputOrganizationModelSchema.model_validate(org_in_db)
+        return self._to_output(org_in_db, fields, expand)
+
+    @staticmethod
+    def _project(
+        org: OutputOrganizationModelSchema,
+        fields: Optional[Sequence[str]],
+        expand: Sequence[str],
+    ):
+        if fields is None and tuple(expand) == ORGANIZATION_RELATIONSHIPS:
+            return org
+
+        keys = [*(fields if fields is not None else ORGANIZATION_FIELDS), *expand]
+
+        # Values come from an already validated model, so there is nothing
+        # left to check.
+        return OutputOrganizationModelSchema.model_construct(
+            _fields_set=set(keys),
+            **{key: getattr(org, key) for key in keys},
+        )
+
+    async def ensure_exists(
+        self,
+        db: AsyncSession,
+        org_id: int,
+    ) -> str:
+        """Returns the organization's name, which its members' users carry."""
+        result = await db.execute(
+            select(OrganizationModel.name).filter(OrganizationModel.id == org_id)
+        )
+        name = result.scalar()
+
+        if name is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Organization not found",
+            )
+
+        return name
 
-    def update_organization(
+    async def update_organization(
         self,
-        db: Session,
+        db: AsyncSession,
         id: int,
         usr_id: Optional[int] | None,
         org: OrganizationUpdateSchema,
     ):
-        org_in_db = (
-            db.query(OrganizationModel).filter(OrganizationModel.id == id).first()
+        result = await db.execute(
+            select(OrganizationModel).filter(OrganizationModel.id == id)
         )
+        org_in_db = result.scalars().first()
 
+        user_in_db = None
         if org.name is not None:
-            user_in_db = db.query(UserModel).filter(UserModel.id == id).first()
+            result = await db.execute(select(UserModel).filter(UserModel.id == id))
+            user_in_db = result.scalars().first()
             setattr(user_in_db, "organization", org.name)
 
         if org_in_db is None:
@@ -118,8 +435,12 @@ class OrganizationRepo:
         try:
             for key, value in update_data.items():
                 setattr(org_in_db, key, value)
-            db.commit()
-            db.refresh(org_in_db)
+            org_in_db.version = OrganizationModel.version + 1
+            await db.commit()
+            if user_in_db is not None:
+                # The user's organization changed under their cached entry.
+                current_user_cache.invalidate_user(user_in_db.id)
+            org_in_db = await self._reload(db=db, org_id=id)
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
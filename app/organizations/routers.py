@@ -1,42 +1,212 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm.session import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.bulk import (
+    BULK_REQUEST_BODY,
+    MAX_BULK_BATCH_SIZE,
+    iter_request_rows,
+    resolve_batch_size,
+)
 from app.db import get_db
+from app.etags import make_etag, matches, not_modified, set_etag
+from app.responses import ValidatedResponseRoute
 
 from app.users.schemas import OutputUserModelSchema
 import app.users.routers as user_router
 
 from app.organizations.schemas import(
     OrganizationCreateSchema,
+    OrganizationImportResultSchema,
+    OrganizationPageSchema,
     OrganizationUpdateSchema,
     OutputOrganizationModelSchema,
 )
+from app.organizations.export import NDJSON_MEDIA_TYPE, tenant_exporter
+from app.organizations.fieldsets import parse_expand, parse_fields
+from app.organizations.importer import tenant_importer
 from app.organizations.repo import OrganizationRepo
 
-from typing import List
+from typing import Optional
 
-router = APIRouter()
+router = APIRouter(route_class=ValidatedResponseRoute)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 org_repo = OrganizationRepo()
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+FIELDS_DESCRIPTION = "Comma separated columns to return; id is always included"
+EXPAND_DESCRIPTION = "Comma separated relationships to include: addresses, custom_fields"
+
+EXPORT_RESPONSES = {
+    200: {
+        "description": "One JSON record per line; gzipped when Accept-Encoding allows",
+        "content": {NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}}},
+    },
+}
+
 
 @router.get(
     "/organizations",
-    response_model=List[OutputOrganizationModelSchema],
+    response_model=OrganizationPageSchema,
+    response_model_exclude_unset=True,
     status_code=200,
 )
 async def fetch_organizations(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    is_org_active: Optional[bool] = None,
+    industry_type: Optional[str] = None,
+    currency_code: Optional[str] = None,
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    expand: Optional[str] = Query(default=None, description=EXPAND_DESCRIPTION),
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme),
 ):
-    orgs = org_repo.fetch_organizations(db=db)
+    fields = parse_fields(fields)
+    expand = parse_expand(expand)
+
+    # Versions are read before the page, so a write landing in between can
+    # only leave the ETag older than the body, which the next poll corrects.
+    versions = await org_repo.fetch_listing_versions(
+        db=db,
+        limit=limit,
+        cursor=cursor,
+        is_org_active=is_org_active,
+        industry_type=industry_type,
+        currency_code=currency_code,
+    )
+    etag = make_etag(request, *(f"{id}.{version}" for id, version in versions))
+
+    if matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    orgs = await org_repo.fetch_organizations(
+        db=db,
+        limit=limit,
+        cursor=cursor,
+        is_org_active=is_org_active,
+        industry_type=industry_type,
+        currency_code=currency_code,
+        fields=fields,
+        expand=expand,
+    )
 
     return orgs
 
 
+# Declared ahead of /organizations/{org_id}, which would otherwise match.
+@router.get(
+    "/organizations/export",
+    response_class=StreamingResponse,
+    responses=EXPORT_RESPONSES,
+)
+async def export_organizations(
+    request: Request,
+    admin: OutputUserModelSchema = Depends(user_router.require_admin),
+):
+    return tenant_exporter.response(
+        request,
+        org_id=None,
+        filename="organizations.ndjson",
+    )
+
+
+@router.post(
+    "/organizations/import",
+    response_model=OrganizationImportResultSchema,
+    status_code=200,
+    openapi_extra=BULK_REQUEST_BODY,
+)
+async def import_organizations(
+    request: Request,
+    batch_size: Optional[int] = Query(default=None, ge=1, le=MAX_BULK_BATCH_SIZE),
+    db: AsyncSession = Depends(get_db),
+    admin: OutputUserModelSchema = Depends(user_router.require_admin),
+):
+    result = await tenant_importer.run(
+        db=db,
+        rows=iter_request_rows(request),
+        batch_size=resolve_batch_size(batch_size),
+    )
+
+    return result
+
+
+@router.get(
+    "/organizations/{org_id}/export",
+    response_class=StreamingResponse,
+    responses=EXPORT_RESPONSES,
+)
+async def export_organization(
+    org_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    token: str = Depends(oauth2_scheme),
+):
+    _, user = await user_router.resolve_user_from_token(token=token, db=db)
+
+    # Checked up front: once streaming starts the status is already sent.
+    name = await org_repo.ensure_exists(db=db, org_id=org_id)
+
+    # A tenant's dump is for its own members, and for administrators.
+    if user.role != user_router.ADMIN_ROLE and user.organization != name:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only members of this organization can export it",
+        )
+
+    return tenant_exporter.response(
+        request,
+        org_id=org_id,
+        filename=f"organization-{org_id}.ndjson",
+    )
+
+
+@router.get(
+    "/organizations/{org_id}",
+    response_model=OutputOrganizationModelSchema,
+    response_model_exclude_unset=True,
+    status_code=200,
+)
+async def fetch_organization(
+    org_id: int,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    expand: Optional[str] = Query(default=None, description=EXPAND_DESCRIPTION),
+    db: AsyncSession = Depends(get_db),
+    token: str = Depends(oauth2_scheme),
+):
+    fields = parse_fields(fields)
+    expand = parse_expand(expand)
+
+    version = await org_repo.fetch_version(db=db, org_id=org_id)
+
+    if version is not None:
+        etag = make_etag(request, version)
+        if matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+
+    org = await org_repo.fetch_organizations_by_id(
+        db=db,
+        org_id=org_id,
+        fields=fields,
+        expand=expand,
+        version=version,
+    )
+
+    return org
+
+
 @router.post(
     "/organizations",
     response_model=OutputOrganizationModelSchema,
@@ -44,10 +214,10 @@ async def fetch_organizations(
 )
 async def create_organization(
     request_org: OrganizationCreateSchema,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme),
 ):
-    org = org_repo.create(db=db, org=request_org)
+    org = await org_repo.create(db=db, org=request_org)
 
     return org
 
@@ -60,12 +230,12 @@ async def create_organization(
 async def update_organization_details(
     org_id: int,
     request_org: OrganizationUpdateSchema,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme),
 ):
-    curr_usr = await user_router.fetch_current_user(db=db)
+    curr_usr = await user_router.fetch_current_user(token=token, db=db)
     curr_usr_id = curr_usr.id if curr_usr is OutputUserModelSchema else None
-    updated_org = org_repo.update_organization(
+    updated_org = await org_repo.update_organization(
         db=db,
         id=org_id,
         org=request_org,
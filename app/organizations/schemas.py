@@ -1,17 +1,24 @@
 from datetime import datetime
-from pydantic import BaseModel, EmailStr
+import functools
+from pydantic import BaseModel, EmailStr, Field
 from typing import List, Optional
 import tzlocal
 
 from app.addresses.schemas import AddressBaseSchema
-from app.schemas import CustomFieldBaseSchema
+from app.schemas import BulkIngestResultSchema, CustomFieldBaseSchema
+
+
+@functools.lru_cache(maxsize=None)
+def local_timezone_name() -> str:
+    # Resolved on first use rather than at import, then reused.
+    return tzlocal.get_localzone_name()
 
 
 class OrganizationBaseSchema(BaseModel):
     name: Optional[str] = None
     fiscal_year_start_month: Optional[str] = "Apr"
     currency_code: Optional[str] = "INR"
-    time_zone: Optional[str] = tzlocal.get_localzone_name()
+    time_zone: Optional[str] = Field(default_factory=local_timezone_name)
     date_format: Optional[str] = "ISO8601"  # Short Date, Long Date
     field_separator: Optional[str] = "-"
     language_code: Optional[str] = "En-In"
@@ -21,7 +28,7 @@ class OrganizationBaseSchema(BaseModel):
     org_address: Optional[str] = None
     remit_to_address: Optional[str] = None
     is_default_org: Optional[bool] = True
-    account_created_date: Optional[datetime] = datetime.now()
+    account_created_date: Optional[datetime] = Field(default_factory=datetime.now)
     contact_name: Optional[str] = None
     company_id_label: Optional[str] = None
     company_id_value: Optional[str] = None
@@ -53,3 +60,15 @@ class OrganizationUpdateSchema(OrganizationBaseSchema):
 
 class OutputOrganizationModelSchema(OrganizationBaseSchema):
     id: int
+
+
+class OrganizationPageSchema(BaseModel):
+    items: List[OutputOrganizationModelSchema]
+    next: Optional[str] = None
+
+
+class OrganizationImportResultSchema(BulkIngestResultSchema):
+    # Records inserted, by type; `inserted` is their total.
+    organizations: int = 0
+    addresses: int = 0
+    custom_fields: int = 0
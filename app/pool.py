@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+from app.settings import load_env
+
+load_env()
+
+DB_POOL_SIZE: str | int = os.getenv(
+    "DB_POOL_SIZE",
+    default=5,
+)
+DB_MAX_OVERFLOW: str | int = os.getenv(
+    "DB_MAX_OVERFLOW",
+    default=10,
+)
+DB_POOL_TIMEOUT: str | int = os.getenv(
+    "DB_POOL_TIMEOUT",
+    default=30,
+)
+DB_POOL_RECYCLE: str | int = os.getenv(
+    "DB_POOL_RECYCLE",
+    default=1800,
+)
+DB_POOL_PRE_PING: str = os.getenv(
+    "DB_POOL_PRE_PING",
+    default="true",
+)
+
+
+def _parse_int(name: str, value: str | int, minimum: int) -> int:
+    try:
+        parsed = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+
+    if parsed < minimum:
+        raise ValueError(f"{name} must be at least {minimum}, got {parsed}")
+
+    return parsed
+
+
+def _parse_bool(name: str, value: str) -> bool:
+    normalized = str(value).strip().lower()
+
+    if normalized in ("1", "true", "yes", "on"):
+        return True
+    if normalized in ("0", "false", "no", "off"):
+        return False
+
+    raise ValueError(f"{name} must be a boolean, got {value!r}")
+
+
+# Validated once at import so a bad setting fails the worker at startup
+# instead of on the first request.
+def pool_options() -> dict[str, Any]:
+    return {
+        "pool_size": _parse_int("DB_POOL_SIZE", DB_POOL_SIZE, 1),
+        "max_overflow": _parse_int("DB_MAX_OVERFLOW", DB_MAX_OVERFLOW, -1),
+        "pool_timeout": _parse_int("DB_POOL_TIMEOUT", DB_POOL_TIMEOUT, 0),
+        "pool_recycle": _parse_int("DB_POOL_RECYCLE", DB_POOL_RECYCLE, -1),
+        "pool_pre_ping": _parse_bool("DB_POOL_PRE_PING", DB_POOL_PRE_PING),
+    }
+
+
+class PoolTelemetry:
+    """Checkout wait times and connection lifecycle counters for one pool."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.connects = 0
+        self.invalidations = 0
+
+    def record_checkout(self, waited: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.checkout_timeouts += 1
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that times how long each checkout waits."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.telemetry = PoolTelemetry()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.telemetry.record_timeout()
+            raise
+
+        self.telemetry.record_checkout(time.perf_counter() - started)
+        return connection
+
+    def recreate(self) -> "InstrumentedAsyncQueuePool":
+        # dispose() swaps the pool for a fresh one; keep the counters.
+        pool = super().recreate()
+        pool.telemetry = self.telemetry
+        return pool
+
+
+def instrument_pool(pool: Pool) -> None:
+    if not isinstance(pool, InstrumentedAsyncQueuePool):
+        return
+
+    telemetry = pool.telemetry
+
+    # Pool listeners are carried over by recreate(), so this runs once per
+    # engine.
+    @event.listens_for(pool, "connect")
+    def on_connect(dbapi_connection, connection_record) -> None:
+        telemetry.connects += 1
+
+    @event.listens_for(pool, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception) -> None:
+        telemetry.invalidations += 1
+
+
+def pool_stats(pool: Pool) -> dict[str, Any]:
+    if not isinstance(pool, InstrumentedAsyncQueuePool):
+        return {"pool": type(pool).__name__}
+
+    telemetry = pool.telemetry
+
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "checked_in": pool.checkedin(),
+        "in_use": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "checkouts": telemetry.checkouts,
+        "checkout_timeouts": telemetry.checkout_timeouts,
+        "checkout_wait_seconds_total": telemetry.wait_seconds_total,
+        "checkout_wait_seconds_max": telemetry.wait_seconds_max,
+        "connects": telemetry.connects,
+        "invalidations": telemetry.invalidations,
+    }
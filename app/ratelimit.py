@@ -0,0 +1,285 @@
+import contextlib
+import logging
+import math
+import os
+import time
+from typing import Any, AsyncIterator, Optional, Protocol
+
+from fastapi import HTTPException, status
+
+from app.cache import TTLCache
+from app.settings import load_env
+
+load_env()
+
+logger = logging.getLogger(__name__)
+
+# "memory" keeps buckets per worker, "redis" shares them between workers and
+# hosts, "none" turns the limits off.
+LOGIN_RATE_LIMIT_BACKEND: str = os.getenv(
+    "LOGIN_RATE_LIMIT_BACKEND",
+    default="memory",
+)
+LOGIN_RATE_LIMIT_URL: str = os.getenv(
+    "LOGIN_RATE_LIMIT_URL",
+    default="redis://localhost:6379/0",
+)
+LOGIN_RATE_LIMIT_MAX_KEYS: str | int = os.getenv(
+    "LOGIN_RATE_LIMIT_MAX_KEYS",
+    default=100000,
+)
+
+# Token buckets: a burst of attempts, refilled at a steady rate.
+LOGIN_USERNAME_BURST: str | int = os.getenv(
+    "LOGIN_USERNAME_BURST",
+    default=5,
+)
+LOGIN_USERNAME_PER_MINUTE: str | int = os.getenv(
+    "LOGIN_USERNAME_PER_MINUTE",
+    default=5,
+)
+LOGIN_IP_BURST: str | int = os.getenv(
+    "LOGIN_IP_BURST",
+    default=20,
+)
+LOGIN_IP_PER_MINUTE: str | int = os.getenv(
+    "LOGIN_IP_PER_MINUTE",
+    default=60,
+)
+
+# Logins verifying a password at once in this process; 0 for no limit.
+LOGIN_MAX_IN_FLIGHT: str | int = os.getenv(
+    "LOGIN_MAX_IN_FLIGHT",
+    default=32,
+)
+
+
+class BucketStore(Protocol):
+    async def take(self, key: str, capacity: int, per_second: float) -> float:
+        """
+        Takes a token from the bucket at `key`, returning 0, or, when it is
+        empty, the seconds until it holds one again.
+        """
+        ...
+
+
+class MemoryBucketStore:
+    """Per-process buckets, least recently used dropped first when full."""
+
+    def __init__(self, maxsize: int) -> None:
+        # Each entry carries its own TTL: the time its bucket takes to fill
+        # up again, after which a missing entry and a full bucket agree.
+        self._buckets: TTLCache[str, tuple[float, float]] = TTLCache(
+            maxsize=maxsize,
+            ttl=math.inf,
+        )
+
+    async def take(self, key: str, capacity: int, per_second: float) -> float:
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+
+        if bucket is None:
+            tokens = float(capacity)
+        else:
+            tokens, updated = bucket
+            tokens = min(capacity, tokens + (now - updated) * per_second)
+
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / per_second
+
+        self._buckets.set(key, (tokens, now), ttl=(capacity - tokens) / per_second)
+        return wait
+
+
+# Refills and takes in one step on the server, timed by the server's clock
+# so workers on hosts with skewed clocks still agree.
+TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local per_second = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = capacity
+if bucket[1] then
+    tokens = math.min(capacity, tonumber(bucket[1]) + (now - tonumber(bucket[2])) * per_second)
+end
+
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / per_second
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.max(1, math.ceil((capacity - tokens) / per_second * 1000)))
+return tostring(wait)
+"""
+
+
+class RedisBucketStore:
+    """
+    Buckets shared by every worker, updated atomically by a server-side
+    script. Needs the optional `redis` package.
+    """
+
+    def __init__(self, url: str, prefix: str = "") -> None:
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError(
+                "The redis rate limit backend needs the 'redis' package: pip install redis"
+            ) from e
+
+        self._client = redis.from_url(url)
+        self._take = self._client.register_script(TAKE_SCRIPT)
+        self._prefix = prefix
+
+    async def take(self, key: str, capacity: int, per_second: float) -> float:
+        wait = await self._take(keys=[self._prefix + key], args=[capacity, per_second])
+        return float(wait)
+
+
+def build_store(kind: str) -> Optional[BucketStore]:
+    if kind == "none":
+        return None
+
+    if kind == "memory":
+        return MemoryBucketStore(maxsize=int(LOGIN_RATE_LIMIT_MAX_KEYS))
+
+    if kind == "redis":
+        return RedisBucketStore(url=LOGIN_RATE_LIMIT_URL, prefix="riffraff:login:")
+
+    raise ValueError(
+        f"LOGIN_RATE_LIMIT_BACKEND must be 'memory', 'redis' or 'none', got {kind!r}"
+    )
+
+
+class TokenBucket:
+    def __init__(self, name: str, burst: int, per_minute: float) -> None:
+        if burst < 1:
+            raise ValueError(f"The {name} burst must be at least 1")
+        if per_minute <= 0:
+            raise ValueError(f"The {name} rate must be positive")
+
+        self.name = name
+        self.capacity = burst
+        self.per_second = per_minute / 60
+
+
+class LoginLimiter:
+    """
+    Sheds login attempts before any password is verified.
+
+    Each attempt takes a token from its client address's bucket and from
+    its username's, so one client cannot try many accounts quickly and
+    many clients cannot hammer one account. On top of that, at most
+    `max_in_flight` attempts verify a password at once in this process.
+    An attempt over any limit gets a 429 with Retry-After right away.
+
+    When the bucket store cannot be reached, attempts are let through
+    rather than locking everyone out; the in-flight limit still holds.
+    """
+
+    def __init__(
+        self,
+        store: Optional[BucketStore],
+        per_ip: TokenBucket,
+        per_username: TokenBucket,
+        max_in_flight: int,
+    ) -> None:
+        if max_in_flight < 0:
+            raise ValueError("LOGIN_MAX_IN_FLIGHT must not be negative")
+
+        self.store = store
+        self.per_ip = per_ip
+        self.per_username = per_username
+        self.max_in_flight = max_in_flight
+
+        self.in_flight = 0
+        self.admitted = 0
+        self.limited: dict[str, int] = {
+            per_ip.name: 0,
+            per_username.name: 0,
+            "in_flight": 0,
+        }
+        self.store_errors = 0
+
+    @staticmethod
+    def _too_many(reason: str, retry_after: float) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Too many login attempts ({reason}), try again later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+    async def _take(self, bucket: TokenBucket, key: str) -> None:
+        try:
+            wait = await self.store.take(
+                f"{bucket.name}:{key}", bucket.capacity, bucket.per_second
+            )
+        except Exception as e:
+            self.store_errors += 1
+            logger.warning("Login rate limit store failed, not limiting: %s", e)
+            return
+
+        if wait > 0:
+            self.limited[bucket.name] += 1
+            raise self._too_many(f"per {bucket.name}", wait)
+
+    def _check_in_flight(self) -> None:
+        if self.max_in_flight and self.in_flight >= self.max_in_flight:
+            self.limited["in_flight"] += 1
+            raise self._too_many("server busy", 1)
+
+    @contextlib.asynccontextmanager
+    async def admit(self, client_ip: Optional[str], username: str) -> AsyncIterator[None]:
+        """Raises a 429, or holds an in-flight slot for the block."""
+        # A busy server turns attempts away without spending their tokens.
+        self._check_in_flight()
+
+        if self.store is not None:
+            if client_ip is not None:
+                await self._take(self.per_ip, client_ip)
+            await self._take(self.per_username, username)
+
+        # Again, as other attempts may have been admitted while a shared
+        # store was answering.
+        self._check_in_flight()
+
+        self.admitted += 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "backend": type(self.store).__name__ if self.store is not None else None,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "admitted": self.admitted,
+            "limited": dict(self.limited),
+            "store_errors": self.store_errors,
+        }
+
+
+login_limiter = LoginLimiter(
+    store=build_store(LOGIN_RATE_LIMIT_BACKEND),
+    per_ip=TokenBucket(
+        "ip",
+        burst=int(LOGIN_IP_BURST),
+        per_minute=float(LOGIN_IP_PER_MINUTE),
+    ),
+    per_username=TokenBucket(
+        "username",
+        burst=int(LOGIN_USERNAME_BURST),
+        per_minute=float(LOGIN_USERNAME_PER_MINUTE),
+    ),
+    max_in_flight=int(LOGIN_MAX_IN_FLIGHT),
+)
@@ -0,0 +1,270 @@
+import asyncio
+import functools
+import hashlib
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.cache import TTLCache
+from app.settings import load_env
+
+load_env()
+
+logger = logging.getLogger(__name__)
+
+# After a client writes, its reads stay on the primary this long, which
+# should exceed the replicas' usual replication lag.
+READ_YOUR_WRITES_SECONDS: str | int = os.getenv(
+    "READ_YOUR_WRITES_SECONDS",
+    default=5,
+)
+
+# How often each replica is probed, and how long a probe may take before
+# the replica is taken out of rotation.
+REPLICA_CHECK_INTERVAL_SECONDS: str | int = os.getenv(
+    "REPLICA_CHECK_INTERVAL_SECONDS",
+    default=5,
+)
+REPLICA_CHECK_TIMEOUT_SECONDS: str | int = os.getenv(
+    "REPLICA_CHECK_TIMEOUT_SECONDS",
+    default=2,
+)
+
+# Clients remembered as having written recently; the oldest are forgotten
+# first, which only sends their reads back to a replica early.
+STICKY_CLIENTS_MAXSIZE = 100_000
+
+# True while a read-only repo call runs (see read_only).
+_reading: ContextVar[bool] = ContextVar("reading", default=False)
+
+# Who is making the current request (see ClientMiddleware).
+current_client: ContextVar[Optional[str]] = ContextVar(
+    "current_client",
+    default=None,
+)
+
+
+def read_only(fn):
+    """
+    Marks an async repo method as only reading, so RoutingSession may send
+    its queries to a replica. Anything it calls inherits the mark.
+    """
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        token = _reading.set(True)
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            _reading.reset(token)
+
+    return wrapper
+
+
+def is_reading() -> bool:
+    return _reading.get()
+
+
+def client_key(scope: dict) -> Optional[str]:
+    """
+    The bearer token a request carries, hashed, or else its address.
+
+    Tokens are not kept in memory as they are; the hash only has to tell
+    clients apart.
+    """
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            return hashlib.blake2b(value, digest_size=16).hexdigest()
+
+    client = scope.get("client")
+    return client[0] if client else None
+
+
+class ClientMiddleware:
+    """Pure ASGI middleware setting current_client for each request."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = current_client.set(client_key(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_client.reset(token)
+
+
+class Replica:
+    def __init__(self, name: str, engine: AsyncEngine) -> None:
+        self.name = name
+        self.engine = engine
+        self.healthy = True
+        self.reads = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        self.probing = False
+
+
+class ReadRouter:
+    """
+    Picks the replica a read-only session reads from.
+
+    Healthy replicas take turns. A replica leaves the rotation when a probe
+    fails or times out, or when one of its connections fails mid-request,
+    and rejoins once a probe succeeds. With no healthy replica, or none
+    configured, reads stay on the primary.
+
+    Clients that committed a write in the last `sticky_seconds` read from
+    the primary, so they see their own writes whatever the replicas' lag.
+    Writes are remembered per process; behind a load balancer spreading one
+    client over several hosts the window only holds on the host it wrote
+    through.
+    """
+
+    def __init__(
+        self,
+        engines: list[AsyncEngine],
+        sticky_seconds: float,
+        check_interval: float,
+        check_timeout: float,
+    ) -> None:
+        self.replicas = [
+            Replica(f"replica-{index}", engine) for index, engine in enumerate(engines)
+        ]
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+
+        self._sticky: Optional[TTLCache[str, bool]] = (
+            TTLCache(maxsize=STICKY_CLIENTS_MAXSIZE, ttl=sticky_seconds)
+            if sticky_seconds > 0
+            else None
+        )
+        self._next = 0
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+        self.fallback_reads = 0
+        self.sticky_reads = 0
+
+        for replica in self.replicas:
+            self._watch_errors(replica)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def _watch_errors(self, replica: Replica) -> None:
+        @event.listens_for(replica.engine.sync_engine, "handle_error")
+        def on_error(context) -> None:
+            # Failing to connect, or losing the connection, says the
+            # replica is down; a bad query says nothing about it. A failing
+            # probe reports itself.
+            if replica.probing:
+                return
+            if context.is_disconnect or context.connection is None:
+                self._mark_down(replica, context.original_exception)
+
+    def _mark_down(self, replica: Replica, error: BaseException) -> None:
+        replica.failures += 1
+        error = getattr(error, "orig", None) or error
+        replica.last_error = f"{type(error).__name__}: {error}"
+        if replica.healthy:
+            replica.healthy = False
+            logger.warning("Read replica %s is down: %s", replica.name, replica.last_error)
+
+    def wrote(self, client: Optional[str]) -> None:
+        if self._sticky is not None and client is not None:
+            self._sticky.set(client, True)
+
+    def pick(self, client: Optional[str]) -> Optional[AsyncEngine]:
+        """The replica to read from, or None to read from the primary."""
+        if not self.replicas:
+            return None
+
+        if (
+            self._sticky is not None
+            and client is not None
+            and self._sticky.get(client) is not None
+        ):
+            self.sticky_reads += 1
+            return None
+
+        with self._lock:
+            for _ in range(len(self.replicas)):
+                replica = self.replicas[self._next % len(self.replicas)]
+                self._next += 1
+                if replica.healthy:
+                    replica.reads += 1
+                    return replica.engine
+
+            self.fallback_reads += 1
+            return None
+
+    async def _check(self, replica: Replica) -> None:
+        replica.probing = True
+        try:
+            async with asyncio.timeout(self.check_timeout):
+                async with replica.engine.connect() as conn:
+                    await conn.exec_driver_sql("SELECT 1")
+        except Exception as e:
+            self._mark_down(replica, e)
+        else:
+            if not replica.healthy:
+                logger.info("Read replica %s is back", replica.name)
+            replica.healthy = True
+        finally:
+            replica.probing = False
+            replica.checked_at = time.time()
+
+    async def check(self) -> None:
+        """Probes every replica once."""
+        await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+
+    async def _run(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_interval)
+
+    def start(self) -> None:
+        if self.replicas and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "fallback_reads": self.fallback_reads,
+            "sticky_reads": self.sticky_reads,
+            "sticky_clients": len(self._sticky) if self._sticky is not None else 0,
+            "replicas": {
+                replica.name: {
+                    "healthy": replica.healthy,
+                    "reads": replica.reads,
+                    "failures": replica.failures,
+                    "last_error": replica.last_error,
+                    "checked_at": replica.checked_at,
+                }
+                for replica in self.replicas
+            },
+        }
@@ -0,0 +1,101 @@
+import asyncio
+import functools
+from typing import Any, Callable, List, Union, get_args, get_origin
+
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, TypeAdapter
+from starlette.responses import Response
+
+
+def _is_validated(value: Any, annotation: Any) -> bool:
+    """True when `value` is already an instance of the declared model type."""
+    origin = get_origin(annotation)
+
+    if origin in (list, List):
+        (item_type,) = get_args(annotation)
+        return (
+            isinstance(value, list)
+            and isinstance(item_type, type)
+            and issubclass(item_type, BaseModel)
+            and all(isinstance(item, item_type) for item in value)
+        )
+
+    if origin is Union:
+        return False
+
+    return (
+        isinstance(annotation, type)
+        and issubclass(annotation, BaseModel)
+        and isinstance(value, annotation)
+    )
+
+
+class ValidatedResponseRoute(APIRoute):
+    """
+    Route class that skips FastAPI's response re-validation for values the
+    endpoint already built as its response_model.
+
+    FastAPI dumps a returned model to a dict, validates the dict against
+    response_model again and only then encodes it. Repos here already
+    return validated (or trusted, constructed) schema instances, so for
+    those the route serializes straight to JSON bytes with pydantic-core,
+    honouring the route's response_model_* options. Anything else, such as
+    ORM objects, dicts or Response instances, still takes FastAPI's normal
+    path.
+
+    Opt in per router with `APIRouter(route_class=ValidatedResponseRoute)`.
+    Headers and a status code set on an injected `Response` parameter are
+    applied to fast-path responses too, as FastAPI would.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        super().__init__(path, endpoint, **kwargs)
+
+        if self.response_model is None or not asyncio.iscoroutinefunction(
+            self.dependant.call
+        ):
+            return
+
+        self._adapter = TypeAdapter(self.response_model)
+
+        # The request handler calls dependant.call on every request, so
+        # wrapping it here keeps `self.endpoint` untouched for include_router.
+        self.dependant.call = self._serialize_validated(self.dependant.call)
+
+    def _serialize_validated(
+        self,
+        call: Callable[..., Any],
+    ) -> Callable[..., Any]:
+        @functools.wraps(call)
+        async def endpoint(**values: Any) -> Any:
+            content = await call(**values)
+
+            if not _is_validated(content, self.response_model):
+                return content
+
+            sub_response = values.get(self.dependant.response_param_name or "")
+
+            response = Response(
+                content=self._adapter.dump_json(
+                    content,
+                    include=self.response_model_include,
+                    exclude=self.response_model_exclude,
+                    by_alias=self.response_model_by_alias,
+                    exclude_unset=self.response_model_exclude_unset,
+                    exclude_defaults=self.response_model_exclude_defaults,
+                    exclude_none=self.response_model_exclude_none,
+                ),
+                status_code=(
+                    getattr(sub_response, "status_code", None)
+                    or self.status_code
+                    or 200
+                ),
+                media_type="application/json",
+            )
+
+            if sub_response is not None:
+                response.headers.raw.extend(sub_response.headers.raw)
+
+            return response
+
+        return endpoint
@@ -0,0 +1,230 @@
+import asyncio
+import contextlib
+import os
+import threading
+import time
+from typing import Any, BinaryIO, Iterator, Optional
+
+from app.settings import load_env
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, one worker only.
+    fcntl = None
+
+load_env()
+
+# Append-only log of revoked refresh token IDs, shared by every worker on the
+# host. Unset, revocations are kept in memory, which only holds for a single
+# worker.
+TOKEN_REVOCATION_LOG: str = os.getenv(
+    "TOKEN_REVOCATION_LOG",
+    default="",
+)
+TOKEN_REVOCATION_BUCKET_SECONDS: str | int = os.getenv(
+    "TOKEN_REVOCATION_BUCKET_SECONDS",
+    default=3600,
+)
+
+
+class RevocationStore:
+    """
+    Set of revoked token IDs (`jti`), bucketed by the token's expiry.
+
+    A token is only ever looked up in the bucket for its own `exp`, so a check
+    is one set membership test however many tokens have been revoked. Once
+    every token in a bucket has expired the bucket is dropped whole; JWT
+    validation rejects those tokens anyway.
+
+    Revocations are appended to a log as `<exp> <jti>` lines. Each claim
+    first applies whatever other workers appended, which costs a single
+    fstat when nothing changed. The log is compacted in place on load when
+    most of it has expired.
+
+    Waiting for the log's flock can take as long as another worker holds
+    it, so request handlers use the `_async` methods, which answer from
+    memory when they can and otherwise wait on a thread.
+    """
+
+    def __init__(self, path: Optional[str], bucket_seconds: int) -> None:
+        if bucket_seconds < 1:
+            raise ValueError("TOKEN_REVOCATION_BUCKET_SECONDS must be at least 1")
+
+        self.path = path or None
+        self.bucket_seconds = bucket_seconds
+
+        self._buckets: dict[int, set[bytes]] = {}
+        self._offset = 0
+        self._inode: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _bucket(self, exp: float) -> int:
+        return int(exp) // self.bucket_seconds
+
+    def _contains(self, jti: bytes, exp: float) -> bool:
+        bucket = self._buckets.get(self._bucket(exp))
+        return bucket is not None and jti in bucket
+
+    def _add(self, jti: bytes, exp: float) -> None:
+        self._buckets.setdefault(self._bucket(exp), set()).add(jti)
+
+    def _expire(self) -> None:
+        current = self._bucket(time.time())
+        for key in [key for key in self._buckets if key < current]:
+            del self._buckets[key]
+
+    def _open_locked(self) -> BinaryIO:
+        while True:
+            log = open(self.path, "a+b")
+            if fcntl is None:
+                return log
+
+            fcntl.flock(log, fcntl.LOCK_EX)
+            # The log may have been replaced by a compaction while we waited
+            # for the lock; only the file currently at `path` counts.
+            try:
+                if os.stat(self.path).st_ino == os.fstat(log.fileno()).st_ino:
+                    return log
+            except FileNotFoundError:
+                pass
+            log.close()
+
+    @contextlib.contextmanager
+    def _locked_log(self) -> Iterator[Optional[BinaryIO]]:
+        """Serializes access within this process and, via flock, the host."""
+        with self._lock:
+            if self.path is None:
+                yield None
+                return
+
+            # Closing the file releases the flock.
+            with self._open_locked() as log:
+                self._catch_up(log)
+                yield log
+
+    def _catch_up(self, log: BinaryIO) -> None:
+        """Applies lines appended since the last read."""
+        stat = os.fstat(log.fileno())
+
+        if stat.st_ino != self._inode:
+            # First read, or another worker compacted the log: start over.
+            self._buckets.clear()
+            self._offset = 0
+            self._inode = stat.st_ino
+
+        if stat.st_size == self._offset:
+            return
+
+        log.seek(self._offset)
+        data = log.read()
+        self._offset += len(data)
+
+        now = time.time()
+        for line in data.splitlines():
+            exp, _, jti = line.partition(b" ")
+            try:
+                expires_at = float(exp)
+            except ValueError:
+                continue
+            if expires_at > now and jti:
+                self._add(jti, expires_at)
+
+    def _append(self, log: Optional[BinaryIO], jti: bytes, exp: float) -> None:
+        if log is None:
+            return
+
+        log.write(b"%d %s\n" % (int(exp), jti))
+        log.flush()
+        self._offset = log.tell()
+
+    def load(self) -> None:
+        """Reads the whole log at startup, compacting it if mostly expired."""
+        self._inode = None
+
+        with self._locked_log() as log:
+            if log is None:
+                return
+
+            log.seek(0)
+            lines = log.read().count(b"\n")
+            self._expire()
+            live = sum(len(bucket) for bucket in self._buckets.values())
+
+            if lines > 2 * live:
+                self._compact()
+
+    def _compact(self) -> None:
+        # Written aside and swapped in. Workers blocked on the old file's lock
+        # see that the inode changed, reopen the path and reread it.
+        temporary = f"{self.path}.compact"
+        with open(temporary, "wb") as compacted:
+            for key, bucket in self._buckets.items():
+                # Tokens in a bucket all expire before its end, so that is a
+                # safe stand-in for their original exp.
+                exp = (key + 1) * self.bucket_seconds
+                for jti in bucket:
+                    compacted.write(b"%d %s\n" % (exp, jti))
+            compacted.flush()
+            os.fsync(compacted.fileno())
+
+        os.replace(temporary, self.path)
+
+        stat = os.stat(self.path)
+        self._inode = stat.st_ino
+        self._offset = stat.st_size
+
+    def is_revoked(self, jti: str, exp: float) -> bool:
+        """
+        Answers from memory without touching the log, so revocations other
+        workers made since this one last claimed a token may be missed.
+        """
+        return self._contains(jti.encode(), exp)
+
+    def claim(self, jti: str, exp: float) -> bool:
+        """
+        Revokes `jti` unless it already was; returns whether this call did.
+
+        The check and the revocation happen under one lock. If several
+        requests, from any worker on the host, present the same token at
+        once, only one of them can use it.
+        """
+        key = jti.encode()
+
+        with self._locked_log() as log:
+            if self._contains(key, exp):
+                return False
+
+            if exp > time.time():
+                self._add(key, exp)
+                self._append(log, key, exp)
+            self._expire()
+            return True
+
+    async def claim_async(self, jti: str, exp: float) -> bool:
+        # A token this worker already knows is revoked needs no lock.
+        if self.is_revoked(jti, exp):
+            return False
+
+        return await asyncio.to_thread(self.claim, jti, exp)
+
+    def revoke(self, jti: str, exp: float) -> None:
+        self.claim(jti, exp)
+
+    async def revoke_async(self, jti: str, exp: float) -> None:
+        await self.claim_async(jti, exp)
+
+    def stats(self) -> dict[str, Any]:
+        # Not under the lock, which a thread may hold while it waits for
+        # the log; a slightly stale count is fine here.
+        buckets = list(self._buckets.values())
+        return {
+            "log": self.path,
+            "buckets": len(buckets),
+            "revoked": sum(len(bucket) for bucket in buckets),
+        }
+
+
+revoked_tokens = RevocationStore(
+    path=TOKEN_REVOCATION_LOG,
+    bucket_seconds=int(TOKEN_REVOCATION_BUCKET_SECONDS),
+)
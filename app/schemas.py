@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Any, List, Optional
 
 
 class CustomFieldBaseSchema(BaseModel):
@@ -20,4 +20,16 @@ class CustomFieldUpdateSchema(CustomFieldBaseSchema):
 
 
 class OutputCustomFieldModelSchema(CustomFieldBaseSchema):
-    id: int
\ No newline at end of file
+    id: int
+
+
+class BulkRowErrorSchema(BaseModel):
+    row: int
+    errors: List[Any]
+
+
+class BulkIngestResultSchema(BaseModel):
+    received: int = 0
+    inserted: int = 0
+    failed: int = 0
+    errors: List[BulkRowErrorSchema] = []
@@ -0,0 +1,88 @@
+from sqlalchemy import DDL, Index, event, func
+
+from app.db import Base
+from app.organizations.models import OrganizationModel
+from app.users.models import UserModel
+
+# Columns each search index covers, by table.
+SEARCH_COLUMNS: dict[str, tuple[str, ...]] = {
+    OrganizationModel.__tablename__: ("name", "portal_name", "email"),
+    UserModel.__tablename__: ("username", "email"),
+}
+
+
+def search_table_name(table: str) -> str:
+    return f"{table}_search"
+
+
+def sqlite_search_ddl(table: str, columns: tuple[str, ...]) -> list[str]:
+    """
+    An external-content FTS5 table over `columns` and the triggers that keep
+    it in sync with `table`.
+
+    The trigram tokenizer indexes every three-character window, so a
+    MATCH phrase finds any substring of three or more characters, prefixes
+    included, case-insensitively. Only rowids are stored: the text is read
+    back from `table` itself.
+    """
+    search_table = search_table_name(table)
+    names = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+
+    insert_new = (
+        f"INSERT INTO {search_table}(rowid, {names}) VALUES (new.id, {new_values});"
+    )
+    delete_old = (
+        f"INSERT INTO {search_table}({search_table}, rowid, {names}) "
+        f"VALUES ('delete', old.id, {old_values});"
+    )
+
+    return [
+        f"CREATE VIRTUAL TABLE {search_table} USING fts5({names}, "
+        f"content='{table}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER {search_table}_insert AFTER INSERT ON {table} "
+        f"BEGIN {insert_new} END",
+        f"CREATE TRIGGER {search_table}_delete AFTER DELETE ON {table} "
+        f"BEGIN {delete_old} END",
+        f"CREATE TRIGGER {search_table}_update AFTER UPDATE OF {names} ON {table} "
+        f"BEGIN {delete_old} {insert_new} END",
+        # Indexes rows that already exist.
+        f"INSERT INTO {search_table}({search_table}) VALUES ('rebuild')",
+    ]
+
+
+# create_all builds the same search indexes as the migrations: FTS5 tables
+# on SQLite, trigram GIN indexes on Postgres.
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+for table_name, columns in SEARCH_COLUMNS.items():
+    table = Base.metadata.tables[table_name]
+
+    for statement in sqlite_search_ddl(table_name, columns):
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    event.listen(
+        table,
+        "after_drop",
+        DDL(f"DROP TABLE IF EXISTS {search_table_name(table_name)}").execute_if(
+            dialect="sqlite"
+        ),
+    )
+
+    for column in columns:
+        # Serves exact matches, and prefix matches on Postgres.
+        Index(
+            f"ix_{table_name}_{column}_lower",
+            func.lower(table.c[column]).label(f"{column}_lower"),
+            postgresql_ops={f"{column}_lower": "text_pattern_ops"},
+        )
+        Index(
+            f"ix_{table_name}_{column}_trgm",
+            table.c[column],
+            postgresql_using="gin",
+            postgresql_ops={column: "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql")
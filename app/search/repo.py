@@ -0,0 +1,176 @@
+from typing import Any, Optional, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, and_, column, func, literal_column, or_, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.organizations.models import OrganizationModel
+from app.pagination import decode_cursor, encode_cursor
+from app.replicas import read_only
+from app.search.models import SEARCH_COLUMNS, search_table_name
+from app.search.schemas import SearchHitSchema, SearchKind, SearchPageSchema
+from app.users.models import UserModel
+
+# Trigram indexes cannot narrow anything shorter.
+MIN_QUERY_LENGTH = 3
+
+# How well a row matched: the best of its columns.
+EXACT_MATCH = 0
+PREFIX_MATCH = 1
+SUBSTRING_MATCH = 2
+RANKS = (EXACT_MATCH, PREFIX_MATCH, SUBSTRING_MATCH)
+
+SEARCH_SOURCES: dict[str, tuple[Any, Any]] = {
+    # kind: (model, column shown as the hit's label)
+    "organization": (OrganizationModel, OrganizationModel.name),
+    "user": (UserModel, UserModel.username),
+}
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class SearchRepo:
+    def __init__(self) -> None:
+        pass
+
+    @staticmethod
+    def _none_of(columns: Sequence[Any], conditions: Sequence[Any]):
+        # NOT on a NULL column is NULL, which would drop the row.
+        return and_(*(or_(c.is_(None), ~cond) for c, cond in zip(columns, conditions)))
+
+    def _tier(
+        self,
+        dialect: str,
+        kind: str,
+        rank: int,
+        q: str,
+        after_id: int,
+    ) -> Select:
+        """
+        Rows of `kind` whose best match is `rank`, in id order from `after_id`.
+
+        Every tier is read from an index in id order, so a page stops after
+        the rows it returns, plus any a better tier has already claimed.
+        """
+        model, label = SEARCH_SOURCES[kind]
+        columns = [getattr(model, name) for name in SEARCH_COLUMNS[model.__tablename__]]
+        lowered = q.lower()
+
+        exact = [func.lower(c) == lowered for c in columns]
+
+        query = select(model.id, label.label("label"), model.email)
+        order_key = model.id
+
+        if rank == EXACT_MATCH:
+            query = query.where(or_(*exact))
+        elif dialect == "sqlite":
+            # The trigram FTS table serves both other tiers, streamed in rowid
+            # order: ^ anchors a phrase to the start of a column.
+            search_table = table(search_table_name(model.__tablename__), column("rowid"))
+            phrase = '"' + q.replace('"', '""') + '"'
+            expression = f"^{phrase}" if rank == PREFIX_MATCH else f"{phrase} NOT ^{phrase}"
+            order_key = search_table.c.rowid
+            query = (
+                query.select_from(search_table)
+                .join(model, model.id == search_table.c.rowid)
+                .where(literal_column(search_table.name).op("MATCH")(expression))
+            )
+            if rank == PREFIX_MATCH:
+                query = query.where(self._none_of(columns, exact))
+        else:
+            # Prefixes are served by the text_pattern_ops index on
+            # lower(column), substrings by the trigram GIN index.
+            prefix = [
+                func.lower(c).like(f"{_escape_like(lowered)}%", escape="\\")
+                for c in columns
+            ]
+            if rank == PREFIX_MATCH:
+                query = query.where(or_(*prefix), self._none_of(columns, exact))
+            else:
+                pattern = f"%{_escape_like(q)}%"
+                query = query.where(
+                    or_(*(c.ilike(pattern, escape="\\") for c in columns)),
+                    self._none_of(columns, prefix),
+                )
+
+        # Always bounded, even on a first page: without a range on the id,
+        # SQLite prefers walking the primary key for the ORDER BY over the
+        # OR of index lookups.
+        return query.where(order_key > after_id).order_by(order_key)
+
+    @read_only
+    async def search(
+        self,
+        db: AsyncSession,
+        q: str,
+        limit: int,
+        kinds: Sequence[SearchKind] = tuple(SEARCH_SOURCES),
+        cursor: Optional[str] = None,
+    ):
+        """
+        Organizations and users with `q` in a searchable column.
+
+        Exact matches come first, then prefix matches, then any other
+        substring; ties are broken by kind and id. Pages are keyset
+        paginated on that same order, one query per (rank, kind) until the
+        page is full.
+        """
+        q = q.strip()
+        if len(q) < MIN_QUERY_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Search needs at least {MIN_QUERY_LENGTH} characters",
+            )
+
+        after = None
+        if cursor is not None:
+            position = decode_cursor(cursor)
+            after = (position.get("rank"), position.get("kind"), position.get("id"))
+            if not (
+                after[0] in RANKS
+                and after[1] in SEARCH_SOURCES
+                and isinstance(after[2], int)
+            ):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid pagination cursor",
+                )
+
+        dialect = db.get_bind().dialect.name
+        hits: list[tuple[int, SearchHitSchema]] = []
+
+        for rank in RANKS:
+            for kind in sorted(kinds):
+                # One extra row tells us whether another page exists.
+                wanted = limit + 1 - len(hits)
+                if wanted <= 0:
+                    break
+                if after is not None and (rank, kind) < after[:2]:
+                    continue
+                resuming = after is not None and (rank, kind) == after[:2]
+                after_id = after[2] if resuming else 0
+
+                result = await db.execute(
+                    self._tier(dialect, kind, rank, q, after_id).limit(wanted)
+                )
+                hits.extend(
+                    (
+                        rank,
+                        SearchHitSchema(
+                            kind=kind, id=row.id, label=row.label, email=row.email
+                        ),
+                    )
+                    for row in result.all()
+                )
+
+        has_more = len(hits) > limit
+        hits = hits[:limit]
+
+        next_cursor = None
+        if has_more:
+            last_rank, last = hits[-1]
+            next_cursor = encode_cursor({"rank": last_rank, "kind": last.kind, "id": last.id})
+
+        return SearchPageSchema(items=[hit for _, hit in hits], next=next_cursor)
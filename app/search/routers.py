@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import get_db
+from app.responses import ValidatedResponseRoute
+
+from app.search.repo import MIN_QUERY_LENGTH, SEARCH_SOURCES, SearchRepo
+from app.search.schemas import SearchKind, SearchPageSchema
+
+from typing import Optional
+
+router = APIRouter(route_class=ValidatedResponseRoute)
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+
+search_repo = SearchRepo()
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+MAX_QUERY_LENGTH = 100
+
+QUERY_DESCRIPTION = (
+    "Text to find anywhere in an organization's name, portal name or email, "
+    "or a user's username or email"
+)
+
+
+@router.get(
+    "/search",
+    response_model=SearchPageSchema,
+    status_code=200,
+)
+async def search(
+    q: str = Query(
+        min_length=MIN_QUERY_LENGTH,
+        max_length=MAX_QUERY_LENGTH,
+        description=QUERY_DESCRIPTION,
+    ),
+    kind: Optional[SearchKind] = None,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    token: str = Depends(oauth2_scheme),
+):
+    results = await search_repo.search(
+        db=db,
+        q=q,
+        limit=limit,
+        kinds=(kind,) if kind is not None else tuple(SEARCH_SOURCES),
+        cursor=cursor,
+    )
+
+    return results
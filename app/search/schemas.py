@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+
+SearchKind = Literal["organization", "user"]
+
+
+class SearchHitSchema(BaseModel):
+    kind: SearchKind
+    id: int
+    # Organization name or username; usernames may be NULL.
+    label: Optional[str] = None
+    email: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class SearchPageSchema(BaseModel):
+    items: List[SearchHitSchema]
+    next: Optional[str] = None
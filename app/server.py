@@ -0,0 +1,192 @@
+import asyncio
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+
+import uvicorn
+
+from app.revocation import revoked_tokens
+from app.settings import load_env
+
+load_env()
+
+SERVER_HOST: str = os.getenv(
+    "SERVER_HOST",
+    default="127.0.0.1",
+)
+SERVER_PORT: str | int = os.getenv(
+    "SERVER_PORT",
+    default=8000,
+)
+# Same variable uvicorn and gunicorn read for their worker count.
+SERVER_WORKERS: str | int = os.getenv(
+    "WEB_CONCURRENCY",
+    default=1,
+)
+
+# Exit code of a worker whose lifespan startup failed, as used by uvicorn.
+STARTUP_FAILURE = 3
+
+# A worker that dies sooner than this after being forked is not restarted.
+MIN_WORKER_LIFETIME_SECONDS = 1.0
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def _run_worker(config: uvicorn.Config, sock: socket.socket) -> int:
+    """Body of a forked worker; returns its exit code."""
+    from app.db import async_engine, engine
+
+    # The supervisor's handlers would otherwise run here until uvicorn
+    # installs its own.
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    # Pooled connections must never be shared between processes. Warm-up
+    # already disposed the pool; close=False only drops references, so a
+    # connection the parent still had open is left to the parent.
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+
+    gc.enable()
+
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+    return 0 if server.started else STARTUP_FAILURE
+
+
+class PreforkServer:
+    """
+    Serves the app from `workers` processes forked from one warmed parent.
+
+    The parent imports the app, runs the warm-up, binds the socket and
+    freezes the garbage collector, so everything built so far stays in
+    pages the workers share copy-on-write. It then forks the workers and
+    supervises them: a worker that exits is replaced by a fresh fork of the
+    same warm parent, and SIGINT or SIGTERM stops them all. A worker that
+    fails its startup stops the whole server rather than being restarted
+    in a loop.
+    """
+
+    def __init__(self, host: str, port: int, workers: int, log_level: str) -> None:
+        if workers < 1:
+            raise ValueError("WEB_CONCURRENCY must be at least 1")
+        if workers > 1 and not hasattr(os, "fork"):
+            raise RuntimeError("Multiple workers need os.fork, run a single worker")
+
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.log_level = log_level
+
+        self._children: dict[int, float] = {}
+        self._stopping = False
+        self._exit_code = 0
+
+    def _preload(self) -> uvicorn.Config:
+        # Collections would touch the header of every object built during
+        # import and warm-up, which defeats copy-on-write in the workers.
+        gc.disable()
+
+        from app.main import app
+        from app.warmup import warm_up
+
+        # Built first because it configures uvicorn's logging.
+        config = uvicorn.Config(
+            app,
+            host=self.host,
+            port=self.port,
+            log_level=self.log_level,
+            lifespan="on",
+        )
+
+        started = time.perf_counter()
+        asyncio.run(warm_up(app))
+        logger.info("Warm-up took %.0f ms", (time.perf_counter() - started) * 1000)
+
+        return config
+
+    def _spawn(self, config: uvicorn.Config, sock: socket.socket) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                code = _run_worker(config, sock)
+            except Exception:
+                logger.exception("Worker [%d] crashed", os.getpid())
+            finally:
+                os._exit(code)
+
+        self._children[pid] = time.monotonic()
+        logger.info("Started worker [%d]", pid)
+
+    def _stop(self, signum: int, frame: object) -> None:
+        self._stopping = True
+        for pid in self._children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _reap(self, config: uvicorn.Config, sock: socket.socket) -> None:
+        while self._children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+
+            started_at = self._children.pop(pid, None)
+            if started_at is None:
+                continue
+
+            code = os.waitstatus_to_exitcode(status)
+            if self._stopping:
+                continue
+
+            lifetime = time.monotonic() - started_at
+            if code == STARTUP_FAILURE or lifetime < MIN_WORKER_LIFETIME_SECONDS:
+                logger.error("Worker [%d] failed to start, shutting down", pid)
+                self._exit_code = STARTUP_FAILURE
+                self._stop(signal.SIGTERM, None)
+                continue
+
+            logger.warning("Worker [%d] exited with code %d, replacing it", pid, code)
+            self._spawn(config, sock)
+
+    def run(self) -> int:
+        config = self._preload()
+        sock = config.bind_socket()
+
+        # Everything allocated so far is permanent for the server's lifetime.
+        gc.freeze()
+
+        if self.workers == 1:
+            gc.enable()
+            server = uvicorn.Server(config)
+            server.run(sockets=[sock])
+            return 0 if server.started else STARTUP_FAILURE
+
+        if revoked_tokens.path is None:
+            logger.warning(
+                "TOKEN_REVOCATION_LOG is not set, so each of the %d workers keeps "
+                "its own revocations and a refresh token can be redeemed once per worker",
+                self.workers,
+            )
+
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGTERM, self._stop)
+
+        for _ in range(self.workers):
+            self._spawn(config, sock)
+
+        gc.enable()
+        try:
+            self._reap(config, sock)
+        finally:
+            sock.close()
+
+        return self._exit_code
+
@@ -0,0 +1,55 @@
+import functools
+import os
+
+from dotenv import load_dotenv
+
+# How the database schema is brought up to date when a worker starts:
+# "create_all" creates missing tables (local development), "alembic" only
+# checks that `alembic upgrade head` has been run, "none" does nothing.
+SCHEMA_MANAGEMENT_MODES = ("create_all", "alembic", "none")
+
+
+@functools.lru_cache(maxsize=None)
+def load_env() -> None:
+    """
+    Reads the .env file into the environment, once per process.
+
+    Modules that read settings at import time call this first, so the order
+    in which they are imported does not matter. Variables already set in the
+    environment win over the file.
+    """
+    load_dotenv()
+
+
+class Settings:
+    """Settings needed to start the application."""
+
+    def __init__(self) -> None:
+        load_env()
+
+        self.database_url: str = os.getenv(
+            "DATABASE_URL",
+            default="sqlite:///test.db",
+        )
+        # Comma separated URLs of read replicas of DATABASE_URL; read-only
+        # repo calls are spread over them (see app.replicas).
+        self.database_read_urls: list[str] = [
+            url.strip()
+            for url in os.getenv("DATABASE_READ_URLS", default="").split(",")
+            if url.strip()
+        ]
+        self.schema_management: str = os.getenv(
+            "SCHEMA_MANAGEMENT",
+            default="create_all",
+        )
+
+        if self.schema_management not in SCHEMA_MANAGEMENT_MODES:
+            raise ValueError(
+                "SCHEMA_MANAGEMENT must be one of "
+                f"{', '.join(SCHEMA_MANAGEMENT_MODES)}, got {self.schema_management!r}"
+            )
+
+
+@functools.lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    return Settings()
@@ -0,0 +1,197 @@
+"""
+Imports users from a CSV, NDJSON or JSON Lines file, sets a user's role, or
+calibrates password hashing.
+
+    python -m app.users import users.csv
+    python -m app.users import users.ndjson --batch-size 2000 --workers 8
+    python -m app.users set-role alice admin
+    python -m app.users calibrate-hash --budget-ms 250
+
+CSV files need a header row naming the columns: username, email,
+first_name, last_name and password, plus optionally role, organization and
+isActive. Passwords are hashed across --workers processes. Rows whose
+username or email already exists are skipped and reported.
+
+set-role sets a user's role, or clears it given `none`. Registration no
+longer grants roles, so this is how the first administrator is made, and
+how accounts registered when it defaulted to admin are demoted.
+
+calibrate-hash times password hashes on this machine and prints the
+PASSWORD_HASH_SCHEME and PASSWORD_HASH_ROUNDS whose hash takes at most
+--budget-ms. Run it on the hardware that serves logins, while it is idle.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from typing import Optional
+
+from sqlalchemy import update
+
+from app.authentication import (
+    PASSWORD_HASH_SCHEME,
+    PASSWORD_HASH_SCHEMES,
+    PASSWORD_HASH_WORKERS,
+    calibrate_rounds,
+)
+from app.bulk import (
+    FILE_CONTENT_TYPES,
+    MAX_BULK_BATCH_SIZE,
+    iter_file_rows,
+    resolve_batch_size,
+)
+from app.db import async_engine, async_session_local, manage_schema
+from app.settings import get_settings
+from app.users.importer import USER_IMPORT_WORKERS, UserImporter
+from app.users.models import UserModel
+from app.users.schemas import UserImportResultSchema
+
+# Errors printed in full; the rest are only counted.
+MAX_PRINTED_ERRORS = 20
+
+
+def print_progress(result: UserImportResultSchema) -> None:
+    print(
+        f"{result.received} rows read, {result.inserted} inserted, "
+        f"{result.duplicates} duplicates, {result.failed} failed",
+        file=sys.stderr,
+    )
+
+
+async def import_users(
+    path: str,
+    batch_size: int,
+    workers: int,
+) -> UserImportResultSchema:
+    await manage_schema(get_settings().schema_management)
+
+    importer = UserImporter(workers=workers)
+    try:
+        async with async_session_local() as db:
+            return await importer.run(
+                db=db,
+                rows=iter_file_rows(path),
+                batch_size=batch_size,
+                progress=print_progress,
+            )
+    finally:
+        importer.shutdown()
+        await async_engine.dispose()
+
+
+async def set_role(username: str, role: Optional[str]) -> bool:
+    await manage_schema(get_settings().schema_management)
+
+    try:
+        async with async_session_local() as db:
+            result = await db.execute(
+                update(UserModel)
+                .where(UserModel.username == username)
+                .values(role=role)
+            )
+            await db.commit()
+    finally:
+        await async_engine.dispose()
+
+    return result.rowcount > 0
+
+
+def calibrate_hash(scheme: str, budget_ms: float, samples: int) -> None:
+    rounds, seconds = calibrate_rounds(scheme, budget_ms / 1000, samples)
+    workers = int(PASSWORD_HASH_WORKERS)
+
+    print(
+        f"{scheme} at {rounds} rounds: {seconds * 1000:.0f} ms per hash "
+        f"(budget {budget_ms:.0f} ms), about {workers / seconds:.1f} logins/s "
+        f"per process at PASSWORD_HASH_WORKERS={workers}",
+        file=sys.stderr,
+    )
+    print(f"PASSWORD_HASH_SCHEME={scheme}")
+    print(f"PASSWORD_HASH_ROUNDS={rounds}")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.users",
+        description=__doc__.split("\n\n")[0].strip(),
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="import users from a file")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--batch-size", type=int, default=None)
+    import_parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(USER_IMPORT_WORKERS),
+        help="password hashing processes (default: USER_IMPORT_WORKERS)",
+    )
+
+    role_parser = commands.add_parser("set-role", help="set or clear a user's role")
+    role_parser.add_argument("username")
+    role_parser.add_argument("role", help="the role, or 'none' to clear it")
+
+    calibrate_parser = commands.add_parser(
+        "calibrate-hash",
+        help="pick password hashing rounds for a latency budget",
+    )
+    calibrate_parser.add_argument("--budget-ms", type=float, default=250.0)
+    calibrate_parser.add_argument(
+        "--scheme",
+        choices=PASSWORD_HASH_SCHEMES,
+        default=PASSWORD_HASH_SCHEME,
+        help="(default: PASSWORD_HASH_SCHEME)",
+    )
+    calibrate_parser.add_argument(
+        "--samples",
+        type=int,
+        default=5,
+        help="hashes timed per candidate; the median counts",
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "calibrate-hash":
+        if args.budget_ms <= 0:
+            parser.error("--budget-ms must be positive")
+        if args.samples < 1:
+            parser.error("--samples must be at least 1")
+
+        calibrate_hash(args.scheme, args.budget_ms, args.samples)
+        return 0
+
+    if args.command == "set-role":
+        role = None if args.role == "none" else args.role
+        if not asyncio.run(set_role(args.username, role)):
+            print(f"No user named {args.username!r}", file=sys.stderr)
+            return 1
+
+        print(f"{args.username}: role {role!r}")
+        return 0
+
+    if args.batch_size is not None and not 1 <= args.batch_size <= MAX_BULK_BATCH_SIZE:
+        parser.error(f"--batch-size must be between 1 and {MAX_BULK_BATCH_SIZE}")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if os.path.splitext(args.path)[1].lower() not in FILE_CONTENT_TYPES:
+        parser.error(f"path must end in one of {', '.join(FILE_CONTENT_TYPES)}")
+
+    result = asyncio.run(
+        import_users(args.path, resolve_batch_size(args.batch_size), args.workers)
+    )
+
+    for error in result.errors[:MAX_PRINTED_ERRORS]:
+        print(f"row {error.row}: {error.errors}", file=sys.stderr)
+    if len(result.errors) > MAX_PRINTED_ERRORS:
+        print(f"... and {len(result.errors) - MAX_PRINTED_ERRORS} more errors", file=sys.stderr)
+
+    print(
+        f"Imported {result.inserted} of {result.received} users in "
+        f"{result.elapsed_seconds:.1f} s ({result.users_per_second:.1f} users/s); "
+        f"{result.duplicates} duplicates, {result.failed} failed"
+    )
+    return 0 if result.failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
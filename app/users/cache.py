@@ -0,0 +1,121 @@
+import hashlib
+import os
+import time
+from typing import Any, Optional
+
+from app.cache import TTLCache
+from app.settings import load_env
+from app.users.schemas import OutputUserModelSchema
+
+load_env()
+
+AUTH_CACHE_MAX_ENTRIES: str | int = os.getenv(
+    "AUTH_CACHE_MAX_ENTRIES",
+    default=10000,
+)
+AUTH_CACHE_TTL_SECONDS: str | int = os.getenv(
+    "AUTH_CACHE_TTL_SECONDS",
+    default=60,
+)
+
+
+class CurrentUserCache:
+    """
+    Maps a token digest to its decoded claims and the user it resolves to.
+
+    Entries never outlive the token's `exp`. Every invalidation bumps a
+    version, and an entry is only served if its user has not been
+    invalidated since the version its load started at, so a load racing an
+    update is never trusted.
+
+    Invalidations are remembered for `ttl`, as long as any entry can live;
+    an entry loaded before an invalidation that has been forgotten has
+    expired by then.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.ttl = ttl
+
+        self._entries: TTLCache[
+            str, tuple[int, dict[str, Any], OutputUserModelSchema]
+        ] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._version = 0
+        # user id -> (version, monotonic time) of its last invalidation,
+        # oldest first.
+        self._invalidated: dict[int, tuple[int, float]] = {}
+        # Loads that started before this version are too old to write back.
+        self._forgotten = 0
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @property
+    def version(self) -> int:
+        """Taken before loading a user, and passed to set()."""
+        return self._version
+
+    def _invalidated_since(self, user_id: int, version: int) -> bool:
+        invalidated = self._invalidated.get(user_id)
+        return invalidated is not None and invalidated[0] > version
+
+    def get(
+        self, token: str
+    ) -> Optional[tuple[dict[str, Any], OutputUserModelSchema]]:
+        entry = self._entries.get(self.digest(token))
+
+        if entry is None:
+            return None
+
+        version, claims, user = entry
+        if self._invalidated_since(user.id, version):
+            return None
+
+        return claims, user
+
+    def set(
+        self,
+        token: str,
+        claims: dict[str, Any],
+        user: OutputUserModelSchema,
+        version: int,
+    ) -> None:
+        if version < self._forgotten or self._invalidated_since(user.id, version):
+            return
+
+        expires_in = float(claims.get("exp", 0)) - time.time()
+        if expires_in <= 0:
+            return
+
+        self._entries.set(
+            self.digest(token),
+            (version, claims, user),
+            ttl=expires_in,
+        )
+
+    def _forget_expired(self, now: float) -> None:
+        while self._invalidated:
+            user_id = next(iter(self._invalidated))
+            version, invalidated_at = self._invalidated[user_id]
+            if now - invalidated_at < self.ttl:
+                return
+            del self._invalidated[user_id]
+            self._forgotten = version
+
+    def invalidate_user(self, user_id: int) -> None:
+        now = time.monotonic()
+        self._forget_expired(now)
+
+        self._version += 1
+        # Moved to the end, keeping the oldest first.
+        self._invalidated.pop(user_id, None)
+        self._invalidated[user_id] = (self._version, now)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+current_user_cache = CurrentUserCache(
+    maxsize=int(AUTH_CACHE_MAX_ENTRIES),
+    ttl=float(AUTH_CACHE_TTL_SECONDS),
+)
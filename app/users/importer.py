@@ -0,0 +1,294 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, AsyncIterator, Callable, Optional, Sequence
+
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.authentication import Authenticator
+from app.schemas import BulkRowErrorSchema
+from app.settings import load_env
+from app.users.models import UserModel
+from app.users.schemas import InputUserModelSchema, UserImportResultSchema
+
+load_env()
+
+# Processes that hash passwords during imports. Separate from the password
+# hashing pool that serves logins, which stays bounded.
+USER_IMPORT_WORKERS: str | int = os.getenv(
+    "USER_IMPORT_WORKERS",
+    default=os.cpu_count() or 1,
+)
+
+
+def hash_passwords(passwords: Sequence[str]) -> list[str]:
+    # Module level so the process pool can pickle it.
+    return [Authenticator.get_password_hash(password) for password in passwords]
+
+
+class UserImporter:
+    """
+    Imports users in batches, hashing their passwords on a process pool.
+
+    The pool's processes are spawned rather than forked: the web worker
+    forking them already runs threads (the database driver, the password
+    hashing pool), and a forked child may inherit a lock one of them held.
+
+    Each batch is checked for usernames and emails that already exist, or
+    that appeared earlier in the same import, with one query; those rows
+    are reported as duplicates and never hashed. The rest are hashed across
+    every worker process and inserted with one executemany and one commit.
+    While a batch is being inserted the next one is already hashing, so
+    the pool stays busy for the whole import.
+    """
+
+    def __init__(self, workers: int) -> None:
+        if workers < 1:
+            raise ValueError("USER_IMPORT_WORKERS must be at least 1")
+
+        self.workers = workers
+
+        # Created by start(), or on first use, so nothing is started at
+        # import time.
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def start(self) -> None:
+        self._get_executor()
+
+    async def _hash(self, passwords: list[str]) -> list[str]:
+        # One chunk per worker: bcrypt dwarfs the cost of shipping a chunk.
+        size = -(-len(passwords) // self.workers)
+        loop = asyncio.get_running_loop()
+        chunks = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    self._get_executor(), hash_passwords, passwords[start:start + size]
+                )
+                for start in range(0, len(passwords), size)
+            )
+        )
+        return [hashed for chunk in chunks for hashed in chunk]
+
+    @staticmethod
+    async def _existing(
+        db: AsyncSession,
+        batch: Sequence[tuple[int, dict[str, Any]]],
+    ) -> tuple[set[str], set[str]]:
+        usernames = {values["username"] for _, values in batch}
+        emails = {values["email"] for _, values in batch}
+
+        result = await db.execute(
+            select(UserModel.username, UserModel.email).where(
+                or_(UserModel.username.in_(usernames), UserModel.email.in_(emails))
+            )
+        )
+        rows = result.all()
+
+        return {row.username for row in rows}, {row.email for row in rows}
+
+    @staticmethod
+    def _duplicate(
+        values: dict[str, Any],
+        usernames: set[str],
+        emails: set[str],
+    ) -> Optional[str]:
+        if values["username"] in usernames:
+            return f"Username {values['username']!r} already exists"
+        if values["email"] in emails:
+            return f"Email {values['email']!r} already exists"
+        return None
+
+    async def _drop_duplicates(
+        self,
+        db: AsyncSession,
+        batch: list[tuple[int, dict[str, Any]]],
+        seen_usernames: set[str],
+        seen_emails: set[str],
+        result: UserImportResultSchema,
+    ) -> list[tuple[int, dict[str, Any]]]:
+        usernames, emails = await self._existing(db, batch)
+        usernames |= seen_usernames
+        emails |= seen_emails
+
+        unique = []
+        for row, values in batch:
+            duplicate = self._duplicate(values, usernames, emails)
+            if duplicate is not None:
+                result.duplicates += 1
+                result.errors.append(BulkRowErrorSchema(row=row, errors=[duplicate]))
+                continue
+
+            usernames.add(values["username"])
+            emails.add(values["email"])
+            seen_usernames.add(values["username"])
+            seen_emails.add(values["email"])
+            unique.append((row, values))
+
+        return unique
+
+    async def _insert(
+        self,
+        db: AsyncSession,
+        batch: list[tuple[int, dict[str, Any]]],
+        result: UserImportResultSchema,
+    ) -> None:
+        if not batch:
+            return
+
+        try:
+            await db.execute(insert(UserModel), [values for _, values in batch])
+            await db.commit()
+            result.inserted += len(batch)
+            return
+        except IntegrityError:
+            # Someone else registered one of these users since the batch
+            # was checked; drop what exists now and try the rest once more.
+            await db.rollback()
+        except SQLAlchemyError as e:
+            await db.rollback()
+            self._fail(batch, e, result)
+            return
+
+        usernames, emails = await self._existing(db, batch)
+        remaining = []
+        for row, values in batch:
+            duplicate = self._duplicate(values, usernames, emails)
+            if duplicate is not None:
+                result.duplicates += 1
+                result.errors.append(BulkRowErrorSchema(row=row, errors=[duplicate]))
+            else:
+                remaining.append((row, values))
+
+        try:
+            if remaining:
+                await db.execute(insert(UserModel), [values for _, values in remaining])
+                await db.commit()
+                result.inserted += len(remaining)
+        except SQLAlchemyError as e:
+            await db.rollback()
+            self._fail(remaining, e, result)
+
+    @staticmethod
+    def _fail(
+        batch: Sequence[tuple[int, dict[str, Any]]],
+        error: Exception,
+        result: UserImportResultSchema,
+    ) -> None:
+        result.failed += len(batch)
+        result.errors.extend(
+            BulkRowErrorSchema(row=row, errors=[str(getattr(error, "orig", None) or error)])
+            for row, _ in batch
+        )
+
+    async def run(
+        self,
+        db: AsyncSession,
+        rows: AsyncIterator[tuple[int, Any, Optional[str]]],
+        batch_size: int,
+        progress: Optional[Callable[[UserImportResultSchema], None]] = None,
+    ) -> UserImportResultSchema:
+        started = time.perf_counter()
+        result = UserImportResultSchema()
+
+        seen_usernames: set[str] = set()
+        seen_emails: set[str] = set()
+
+        batch: list[tuple[int, dict[str, Any]]] = []
+        # The previous batch and its hashing, still running in the pool.
+        hashing: Optional[tuple[list[tuple[int, dict[str, Any]]], asyncio.Future]] = None
+
+        async def finish_hashing() -> None:
+            nonlocal hashing
+            if hashing is None:
+                return
+
+            pending, hashed = hashing
+            hashing = None
+            hash_started = time.perf_counter()
+            passwords = await hashed
+            result.hash_wait_seconds += time.perf_counter() - hash_started
+
+            for (_, values), password in zip(pending, passwords):
+                values["password"] = password
+            await self._insert(db, pending, result)
+
+            if progress is not None:
+                progress(result)
+
+        async def flush() -> None:
+            nonlocal hashing
+            unique = await self._drop_duplicates(
+                db, batch, seen_usernames, seen_emails, result
+            )
+            batch.clear()
+
+            # Started before the previous batch is inserted, so the pool
+            # never waits on the database.
+            hashed = None
+            if unique:
+                hashed = asyncio.ensure_future(
+                    self._hash([values["password"] for _, values in unique])
+                )
+
+            await finish_hashing()
+            if hashed is not None:
+                hashing = (unique, hashed)
+
+        try:
+            async for row, payload, error in rows:
+                result.received += 1
+
+                if error is not None:
+                    result.failed += 1
+                    result.errors.append(BulkRowErrorSchema(row=row, errors=[error]))
+                    continue
+
+                try:
+                    user = InputUserModelSchema.model_validate(payload)
+                except ValidationError as e:
+                    result.failed += 1
+                    result.errors.append(
+                        BulkRowErrorSchema(row=row, errors=json.loads(e.json(include_url=False)))
+                    )
+                    continue
+
+                batch.append((row, user.model_dump()))
+                if len(batch) >= batch_size:
+                    await flush()
+
+            if batch:
+                await flush()
+            await finish_hashing()
+        finally:
+            if hashing is not None:
+                hashing[1].cancel()
+
+        # Duplicates are found a batch at a time, after later rows' errors.
+        result.errors.sort(key=lambda error: error.row)
+        result.elapsed_seconds = time.perf_counter() - started
+        result.users_per_second = (
+            result.inserted / result.elapsed_seconds if result.elapsed_seconds else 0.0
+        )
+        return result
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+user_importer = UserImporter(workers=int(USER_IMPORT_WORKERS))
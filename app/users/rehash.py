@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import os
+from typing import Any
+
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.authentication import Authenticator
+from app.db import async_session_local
+from app.settings import load_env
+from app.users.models import UserModel
+
+load_env()
+
+logger = logging.getLogger(__name__)
+
+# Rehashes waiting or running at once; logins beyond that skip theirs and
+# leave it to the user's next login. 0 turns rehashing off.
+PASSWORD_REHASH_MAX_PENDING: str | int = os.getenv(
+    "PASSWORD_REHASH_MAX_PENDING",
+    default=16,
+)
+
+
+class PasswordRehasher:
+    """
+    Replaces a password hash that is not in the configured scheme and rounds
+    after its user logs in, which is the only time the password is known.
+
+    The new hash is computed on the password hashing pool in a background
+    task, so the login response does not wait for it. It is written only if
+    the stored hash is still the one that was verified, so a password
+    changed in the meantime is kept. A rehash that cannot run (too many
+    pending, pool full, database error) is dropped; the next login retries.
+    """
+
+    def __init__(self, max_pending: int) -> None:
+        if max_pending < 0:
+            raise ValueError("PASSWORD_REHASH_MAX_PENDING must not be negative")
+
+        self.max_pending = max_pending
+
+        self._tasks: dict[int, asyncio.Task] = {}
+
+        self.scheduled = 0
+        self.rehashed = 0
+        self.skipped = 0
+        self.failed = 0
+
+    def schedule(self, user_id: int, password: str, hashed_password: str) -> bool:
+        """Starts rehashing the user's password unless it is already running."""
+        if user_id in self._tasks:
+            return False
+
+        if len(self._tasks) >= self.max_pending:
+            self.skipped += 1
+            return False
+
+        self.scheduled += 1
+        task = asyncio.create_task(self._rehash(user_id, password, hashed_password))
+        self._tasks[user_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(user_id, None))
+        return True
+
+    async def _rehash(self, user_id: int, password: str, hashed_password: str) -> None:
+        try:
+            new_hash = await Authenticator.get_password_hash_async(password)
+
+            async with async_session_local() as db:
+                result = await db.execute(
+                    update(UserModel)
+                    .where(
+                        UserModel.id == user_id,
+                        UserModel.password == hashed_password,
+                    )
+                    .values(password=new_hash)
+                )
+                await db.commit()
+        except (HTTPException, SQLAlchemyError) as e:
+            # The hashing pool sheds load with a 503; either way the old
+            # hash still works.
+            self.failed += 1
+            logger.warning("Could not rehash the password of user %s: %s", user_id, e)
+            return
+
+        if result.rowcount:
+            self.rehashed += 1
+        else:
+            self.skipped += 1
+
+    async def drain(self) -> None:
+        """Waits for the rehashes already started."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "max_pending": self.max_pending,
+            "pending": len(self._tasks),
+            "scheduled": self.scheduled,
+            "rehashed": self.rehashed,
+            "skipped": self.skipped,
+            "failed": self.failed,
+        }
+
+
+password_rehasher = PasswordRehasher(max_pending=int(PASSWORD_REHASH_MAX_PENDING))
@@ -1,14 +1,21 @@
-from sqlalchemy.orm import Session
+from typing import Any, AsyncIterator, Callable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import status
 from fastapi.exceptions import HTTPException
 
 from app.authentication import Authenticator
 
+from app.users.cache import current_user_cache
+from app.users.importer import user_importer
 from app.users.models import UserModel
+from app.users.rehash import password_rehasher
 from app.users.schemas import (
     InputUserModelSchema,
     OutputUserModelSchema,
     UpdateUserModelSchema,
+    UserImportResultSchema,
 )
 
 
@@ -16,12 +23,12 @@ class UserRepo:
     def __init__(self) -> None:
         pass
 
-    def create(
+    async def create(
         self,
-        db: Session,
+        db: AsyncSession,
         user: InputUserModelSchema,
     ):
-        hashed_password = Authenticator.get_password_hash(user.password)
+        hashed_password = await Authenticator.get_password_hash_async(user.password)
 
         user_in_db = UserModel()
 
@@ -31,18 +38,35 @@ class UserRepo:
         setattr(user_in_db, "password", hashed_password)
 
         db.add(user_in_db)
-        db.commit()
-        db.refresh(user_in_db)
+        await db.commit()
+        await db.refresh(user_in_db)
 
         return OutputUserModelSchema.model_validate(user_in_db)
 
-    def login(
+    async def bulk_create(
+        self,
+        db: AsyncSession,
+        rows: AsyncIterator[tuple[int, Any, Optional[str]]],
+        batch_size: int,
+        progress: Optional[Callable[[UserImportResultSchema], None]] = None,
+    ):
+        return await user_importer.run(
+            db=db,
+            rows=rows,
+            batch_size=batch_size,
+            progress=progress,
+        )
+
+    async def login(
         self,
-        db: Session,
+        db: AsyncSession,
         username: str,
         password: str,
     ):
-        user_in_db = db.query(UserModel).filter(UserModel.username == username).first()
+        result = await db.execute(
+            select(UserModel).filter(UserModel.username == username)
+        )
+        user_in_db = result.scalars().first()
 
         if user_in_db is None:
             raise HTTPException(
@@ -52,7 +76,7 @@ class UserRepo:
 
         hashed_password: str = str(user_in_db.password)
 
-        is_valid = Authenticator.verify_password(
+        is_valid = await Authenticator.verify_password_async(
             plain_password=password,
             hashed_password=hashed_password,
         )
@@ -63,14 +87,22 @@ class UserRepo:
                 detail="User credential mismatch",
             )
 
+        # Hashes made under an older scheme or cost are upgraded now that
+        # the password is known, after the response is sent.
+        if Authenticator.password_needs_rehash(hashed_password):
+            password_rehasher.schedule(user_in_db.id, password, hashed_password)
+
         return OutputUserModelSchema.model_validate(user_in_db)
 
-    def fetch_user_by_username(
+    async def fetch_user_by_username(
         self,
-        db: Session,
+        db: AsyncSession,
         username: str,
     ):
-        user_in_db = db.query(UserModel).filter(UserModel.username == username).first()
+        result = await db.execute(
+            select(UserModel).filter(UserModel.username == username)
+        )
+        user_in_db = result.scalars().first()
 
         if user_in_db is None:
             raise HTTPException(
@@ -80,12 +112,15 @@ class UserRepo:
 
         return OutputUserModelSchema.model_validate(user_in_db)
 
-    def fetch_user_by_id(
+    async def fetch_user_by_id(
         self,
-        db: Session,
+        db: AsyncSession,
         id: int,
     ):
-        user_in_db = db.query(UserModel).filter(UserModel.id == id).first()
+        result = await db.execute(
+            select(UserModel).filter(UserModel.id == id)
+        )
+        user_in_db = result.scalars().first()
 
         if user_in_db is None:
             raise HTTPException(
@@ -95,13 +130,16 @@ class UserRepo:
 
         return OutputUserModelSchema.model_validate(user_in_db)
 
-    def update_user(
+    async def update_user(
         self,
-        db: Session,
+        db: AsyncSession,
         user: UpdateUserModelSchema,
         id: int,
     ):
-        user_in_db = db.query(UserModel).filter(UserModel.id == id).first()
+        result = await db.execute(
+            select(UserModel).filter(UserModel.id == id)
+        )
+        user_in_db = result.scalars().first()
 
         if user_in_db is None:
             raise HTTPException(
@@ -114,8 +152,9 @@ class UserRepo:
         try:
             for key, value in update_data.items():
                 setattr(user_in_db, key, value)
-            db.commit()
-            db.refresh(user_in_db)
+            await db.commit()
+            await db.refresh(user_in_db)
+            current_user_cache.invalidate_user(id)
 
         except Exception as e:
             raise HTTPException(
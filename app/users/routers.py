@@ -1,28 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm.session import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import authentication as auth
+from app.bulk import (
+    BULK_REQUEST_BODY,
+    MAX_BULK_BATCH_SIZE,
+    iter_request_rows,
+    resolve_batch_size,
+)
 from app.db import get_db
+from app.responses import ValidatedResponseRoute
 
+from app.jobs.queue import job_queue
+from app.organizations.jobs import PROVISION_DEFAULT_ORGANIZATION
 from app.organizations.schemas import OrganizationCreateSchema
-import app.organizations.routers as org_routers
 
 from app.users.schemas import(
     InputUserModelSchema,
     UpdateUserModelSchema,
     OutputUserModelSchema,
+    UserImportResultSchema,
 )
 from app.users.repo import UserRepo
+from app.users.cache import current_user_cache
 
 import jwt
+from typing import Optional
 
-router = APIRouter()
+router = APIRouter(route_class=ValidatedResponseRoute)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 user_repo = UserRepo()
 
+ADMIN_ROLE = "admin"
+
 
 # TODO: Typically we should perform a login right after the user has been created, i.e. return the JWT
 @router.post(
@@ -30,33 +43,50 @@ user_repo = UserRepo()
     response_model=OutputUserModelSchema, 
     status_code=201
 )
-def register_user(
+async def register_user(
     request_user: InputUserModelSchema,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> OutputUserModelSchema:
-    user = user_repo.create(db=db, user=request_user)
+    # Anyone can register, so nobody can grant themselves a role here; an
+    # administrator assigns it afterwards.
+    if request_user.role is not None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can assign roles",
+        )
 
-    if user.organization is not None:
+    if request_user.organization is not None:
         default_org = OrganizationCreateSchema(
-            name=user.organization,
+            name=request_user.organization,
         )
     else:
-        default_org = OrganizationCreateSchema(name=f"{user.username}'s Organization")
+        default_org = OrganizationCreateSchema(
+            name=f"{request_user.username}'s Organization"
+        )
 
-    background_tasks.add_task(org_routers.create_organization, default_org, db)
+    # Enqueued first so the job is committed with the user: it exists
+    # exactly when the user does, and job workers create the organization
+    # outside this request.
+    job_queue.enqueue(
+        db,
+        PROVISION_DEFAULT_ORGANIZATION,
+        default_org.model_dump(mode="json"),
+    )
+    user = await user_repo.create(db=db, user=request_user)
+    job_queue.notify()
 
     return user
 
 
-@router.get(
-    "/users/me/", 
-    response_model=OutputUserModelSchema
-)
-async def fetch_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> OutputUserModelSchema:
+async def resolve_user_from_token(
+    token: str,
+    db: AsyncSession,
+) -> tuple[dict, OutputUserModelSchema]:
+    cached = current_user_cache.get(token)
+    if cached is not None:
+        return cached
+    version = current_user_cache.version
+
     try:
         authenticator = auth.Authenticator()
         payload = authenticator.decode_access_token(token)
@@ -75,7 +105,60 @@ async def fetch_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = user_repo.fetch_user_by_username(db=db, username=username)
+    user = await user_repo.fetch_user_by_username(db=db, username=username)
+
+    current_user_cache.set(token, payload, user, version=version)
+
+    return payload, user
+
+
+async def require_admin(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+) -> OutputUserModelSchema:
+    _, user = await resolve_user_from_token(token=token, db=db)
+
+    if user.role != ADMIN_ROLE:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can do this",
+        )
+
+    return user
+
+
+@router.post(
+    "/users/bulk",
+    response_model=UserImportResultSchema,
+    status_code=200,
+    openapi_extra=BULK_REQUEST_BODY,
+)
+async def import_users(
+    request: Request,
+    batch_size: Optional[int] = Query(default=None, ge=1, le=MAX_BULK_BATCH_SIZE),
+    db: AsyncSession = Depends(get_db),
+    admin: OutputUserModelSchema = Depends(require_admin),
+) -> UserImportResultSchema:
+    # Imported users join organizations that already exist, so unlike
+    # registration this does not provision one per user.
+    result = await user_repo.bulk_create(
+        db=db,
+        rows=iter_request_rows(request),
+        batch_size=resolve_batch_size(batch_size),
+    )
+
+    return result
+
+
+@router.get(
+    "/users/me/", 
+    response_model=OutputUserModelSchema
+)
+async def fetch_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+) -> OutputUserModelSchema:
+    _, user = await resolve_user_from_token(token=token, db=db)
 
     return user
 
@@ -88,9 +171,12 @@ async def fetch_current_user(
 async def update_user_profile(
     id: int,
     request_user: UpdateUserModelSchema,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme),
 ) -> OutputUserModelSchema:
-    updated_user = user_repo.update_user(db=db, id=id, user=request_user)
+    if request_user.role is not None:
+        await require_admin(token=token, db=db)
+
+    updated_user = await user_repo.update_user(db=db, id=id, user=request_user)
 
     return updated_user
\ No newline at end of file
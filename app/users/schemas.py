@@ -2,13 +2,15 @@ from datetime import datetime
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 
+from app.schemas import BulkIngestResultSchema
+
 
 class BaseUserModelSchema(BaseModel):
     username: str
     email: EmailStr
     first_name: Optional[str]
     last_name: Optional[str]
-    role: Optional[str] = "admin"
+    role: Optional[str] = None
     organization: Optional[str] = None
     isActive: bool | None = False
 
@@ -41,3 +43,12 @@ class UpdateUserModelSchema(BaseModel):
     isActive: Optional[bool] = None
     password: Optional[str] = None
     updatedAt: Optional[datetime] = None
+
+
+class UserImportResultSchema(BulkIngestResultSchema):
+    # Rows whose username or email already exists; listed in `errors` too.
+    duplicates: int = 0
+    elapsed_seconds: float = 0.0
+    # Time spent waiting for password hashing rather than overlapping it.
+    hash_wait_seconds: float = 0.0
+    users_per_second: float = 0.0
@@ -0,0 +1,80 @@
+from fastapi import FastAPI, HTTPException
+from pydantic import EmailStr, TypeAdapter
+from sqlalchemy.orm import configure_mappers
+
+from app import authentication as auth
+from app.db import async_engine, async_session_local, manage_schema
+from app.organizations.fieldsets import ORGANIZATION_RELATIONSHIPS
+from app.organizations.repo import OrganizationRepo
+from app.settings import get_settings
+from app.users.repo import UserRepo
+
+user_repo = UserRepo()
+org_repo = OrganizationRepo()
+
+
+async def _compile_read_statements() -> None:
+    """
+    Runs each hot read once so SQLAlchemy compiles and caches its SQL.
+
+    The compiled statement cache belongs to the engine rather than to a
+    connection, so it outlives the pool disposal below. Lookups that find
+    nothing compile the same statements as ones that do. The organization
+    cache is bypassed so nothing is cached and no Redis client is created.
+    """
+    async with async_session_local() as db:
+        page = await org_repo.fetch_organizations(db=db, limit=1)
+        org_id = page.items[0].id if page.items else 0
+
+        reads = [
+            lambda: org_repo._fetch_detail(db=db, org_id=org_id),
+            lambda: org_repo.ensure_exists(db=db, org_id=org_id),
+            lambda: user_repo.fetch_user_by_id(db=db, id=0),
+            lambda: user_repo.fetch_user_by_username(db=db, username=""),
+        ]
+        # The address and custom field routes read a single relationship.
+        reads += [
+            lambda relationship=relationship: org_repo._fetch_detail(
+                db=db,
+                org_id=org_id,
+                fields=("id",),
+                expand=(relationship,),
+            )
+            for relationship in ORGANIZATION_RELATIONSHIPS
+        ]
+
+        for read in reads:
+            try:
+                await read()
+            except HTTPException:
+                pass
+
+        await db.rollback()
+
+
+async def warm_up(app: FastAPI) -> None:
+    """
+    Does the work a fresh worker would otherwise do on its first requests.
+
+    Meant to run once in the parent process before workers are forked, so
+    they inherit the result through shared copy-on-write pages:
+
+    - SQLAlchemy mappers are configured
+    - the OpenAPI document and every model's JSON schema are built
+    - pydantic imports email-validator, which it defers to the first EmailStr
+    - passlib loads its bcrypt backend
+    - the SQL for the read endpoints is compiled
+
+    Schema management runs first, because the reads need the tables. The
+    pool is disposed at the end, so no connection is shared with a child.
+    """
+    configure_mappers()
+    app.openapi()
+    TypeAdapter(EmailStr).validate_python("warm-up@example.com")
+    auth.pwd_context.handler().get_backend()
+
+    await manage_schema(get_settings().schema_management)
+    try:
+        await _compile_read_statements()
+    finally:
+        await async_engine.dispose()
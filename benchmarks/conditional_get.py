@@ -0,0 +1,173 @@
+"""
+Conditional GETs: full responses against 304s on the polled endpoints.
+
+    python -m benchmarks.conditional_get
+    python -m benchmarks.conditional_get --orgs 2000 --addresses 10 --requests 1000
+
+Seeds --orgs organizations with children, then times each endpoint twice:
+plain GETs, and GETs sending the ETag the endpoint returned in
+If-None-Match, which should come back 304 without a body. Reports p50/p95
+latency and bytes per response for both.
+
+It then writes to an organization through the API (an address, a custom
+field and a PATCH) and checks that every endpoint covering it stops
+matching the old ETag. Exits non-zero if a revalidation is not a 304, or a
+write leaves an ETag unchanged.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from typing import Optional
+
+from benchmarks import support  # noqa: F401  (selects the benchmark database)
+
+import httpx
+
+from app.main import app
+from benchmarks.http_suite import BENCH_PASSWORD, percentile, seed
+
+
+def endpoints(org_id: int) -> dict[str, str]:
+    return {
+        "organizations": "/organizations?expand=addresses,custom_fields",
+        "organization": f"/organizations/{org_id}?expand=addresses,custom_fields",
+        "addresses": f"/address/{org_id}",
+        "custom_fields": f"/custom_fields/{org_id}",
+    }
+
+
+async def timed(
+    client: httpx.AsyncClient,
+    path: str,
+    headers: dict[str, str],
+    requests: int,
+) -> tuple[list[float], int, set[int]]:
+    latencies = []
+    size = 0
+    statuses = set()
+
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = await client.get(path, headers=headers)
+        latencies.append(time.perf_counter() - started)
+        size = len(response.content)
+        statuses.add(response.status_code)
+
+    latencies.sort()
+    return latencies, size, statuses
+
+
+async def bench(
+    client: httpx.AsyncClient,
+    headers: dict[str, str],
+    org_id: int,
+    requests: int,
+) -> list[str]:
+    failures = []
+
+    print(
+        f"{'endpoint':<16}{'request':<14}{'status':>7}{'p50 ms':>9}{'p95 ms':>9}{'bytes':>8}"
+    )
+    for name, path in endpoints(org_id).items():
+        response = await client.get(path, headers=headers)
+        etag = response.headers.get("etag")
+        if etag is None:
+            failures.append(f"{name}: no ETag")
+            continue
+
+        runs = {
+            "plain": headers,
+            "If-None-Match": {**headers, "If-None-Match": etag},
+        }
+        for label, run_headers in runs.items():
+            latencies, size, statuses = await timed(client, path, run_headers, requests)
+            print(
+                f"{name:<16}{label:<14}{'/'.join(map(str, sorted(statuses))):>7}"
+                f"{percentile(latencies, 50) * 1000:>9.2f}"
+                f"{percentile(latencies, 95) * 1000:>9.2f}{size:>8}"
+            )
+
+            expected = 200 if label == "plain" else 304
+            if statuses != {expected}:
+                failures.append(f"{name} ({label}): status {sorted(statuses)}")
+
+    return failures
+
+
+async def check_writes(
+    client: httpx.AsyncClient,
+    headers: dict[str, str],
+    org_id: int,
+) -> list[str]:
+    failures = []
+
+    writes = {
+        "POST /address": lambda: client.post(
+            f"/address?org_id={org_id}", json={"city": "Nashik"}, headers=headers
+        ),
+        "POST /custom_fields": lambda: client.post(
+            f"/custom_fields?org_id={org_id}",
+            json={"index": 99, "label": "added"},
+            headers=headers,
+        ),
+        "PATCH /organizations": lambda: client.patch(
+            f"/organizations/{org_id}", json={"website": "example.com"}, headers=headers
+        ),
+    }
+
+    for write, send in writes.items():
+        etags = {}
+        for name, path in endpoints(org_id).items():
+            response = await client.get(path, headers=headers)
+            etags[name] = response.headers["etag"]
+
+        response = await send()
+        if response.status_code >= 400:
+            failures.append(f"{write}: status {response.status_code}")
+            continue
+
+        for name, path in endpoints(org_id).items():
+            response = await client.get(
+                path, headers={**headers, "If-None-Match": etags[name]}
+            )
+            if response.status_code != 200:
+                failures.append(f"{write} left {name} at {response.status_code}")
+
+    print(f"writes checked: {', '.join(writes)}")
+    return failures
+
+
+async def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--orgs", type=int, default=200)
+    parser.add_argument("--addresses", type=int, default=5)
+    parser.add_argument("--custom-fields", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args(argv)
+
+    # Runs the app's own startup, which also creates the schema.
+    async with app.router.lifespan_context(app):
+        username, org_ids = await seed(args.orgs, args.addresses, args.custom_fields)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.post(
+                "/token",
+                data={"username": username, "password": BENCH_PASSWORD},
+            )
+            response.raise_for_status()
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            failures = await bench(client, headers, org_ids[0], args.requests)
+            failures.extend(await check_writes(client, headers, org_ids[0]))
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,371 @@
+"""
+End-to-end latency and throughput of the API's hot endpoints.
+
+    python -m benchmarks.http_suite
+    python -m benchmarks.http_suite --orgs 500 --addresses 5 --custom-fields 5
+    python -m benchmarks.http_suite --update-baseline
+    python -m benchmarks.http_suite --baseline benchmarks/baseline.json
+
+Seeds a user and --orgs organizations (each with --addresses addresses and
+--custom-fields custom fields), then drives the ASGI app in-process with an
+async HTTP client. Every scenario reports throughput and p50/p95/p99 latency.
+
+With a baseline file present the run is compared against it and exits
+non-zero if any scenario's p95 grew, or its throughput dropped, by more than
+--tolerance. A run whose parameters or database differ from the baseline's
+is not compared at all and exits 2. Baselines are machine specific: record
+one with --update-baseline on the machine that will run the comparison.
+"""
+
+import argparse
+import asyncio
+from dataclasses import asdict, dataclass
+import json
+import os
+import platform
+import secrets
+import sys
+import time
+from typing import Any, Callable, Optional
+
+from benchmarks import support  # noqa: F401  (selects the benchmark database)
+
+# The /token scenario measures password hashing, not the login limits.
+os.environ.setdefault("LOGIN_RATE_LIMIT_BACKEND", "none")
+os.environ.setdefault("LOGIN_MAX_IN_FLIGHT", "0")
+
+import httpx
+from sqlalchemy import insert
+
+from app.authentication import Authenticator
+from app.db import async_engine, async_session_local
+from app.main import app
+from app.models import CustomFieldModel
+from app.addresses.models import AddressModel
+from app.organizations.models import OrganizationModel
+from app.users.models import UserModel
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+SEED_BATCH_SIZE = 1000
+BENCH_PASSWORD = "bench-password"
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: Callable[[int], str]
+    # bcrypt dominates /token, so it runs a fraction of the requests.
+    share: float = 1.0
+    authenticated: bool = True
+    form: Optional[dict[str, str]] = None
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    requests: int
+    errors: int
+    seconds: float
+    throughput: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+def percentile(ordered: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+async def seed(orgs: int, addresses: int, custom_fields: int) -> tuple[str, list[int]]:
+    username = f"bench-{secrets.token_hex(4)}"
+
+    async with async_session_local() as db:
+        await db.execute(
+            insert(UserModel),
+            [
+                {
+                    "username": username,
+                    "email": f"{username}@example.com",
+                    "password": Authenticator.get_password_hash(BENCH_PASSWORD),
+                    "first_name": "Bench",
+                    "last_name": "User",
+                    "role": "admin",
+                    "organization": "Bench",
+                }
+            ],
+        )
+
+        org_ids: list[int] = []
+        for start in range(0, orgs, SEED_BATCH_SIZE):
+            rows = [
+                {"name": f"Bench Org {i}", "industry_type": "retail"}
+                for i in range(start, min(start + SEED_BATCH_SIZE, orgs))
+            ]
+            result = await db.execute(
+                insert(OrganizationModel).returning(OrganizationModel.id),
+                rows,
+            )
+            batch_ids = list(result.scalars())
+            org_ids.extend(batch_ids)
+
+            if addresses:
+                await db.execute(
+                    insert(AddressModel),
+                    [
+                        {"organization_id": org_id, "city": "Pune", "zip": f"{j:06d}"}
+                        for org_id in batch_ids
+                        for j in range(addresses)
+                    ],
+                )
+            if custom_fields:
+                await db.execute(
+                    insert(CustomFieldModel),
+                    [
+                        {
+                            "organization_id": org_id,
+                            "index": j,
+                            "label": f"field {j}",
+                            "value": "value",
+                        }
+                        for org_id in batch_ids
+                        for j in range(custom_fields)
+                    ],
+                )
+
+        await db.commit()
+
+    return username, org_ids
+
+
+def build_scenarios(username: str, org_ids: list[int]) -> list[Scenario]:
+    def org_path(template: str) -> Callable[[int], str]:
+        return lambda i: template.format(org_id=org_ids[i % len(org_ids)])
+
+    return [
+        Scenario(
+            "token",
+            "POST",
+            lambda i: "/token",
+            share=0.05,
+            authenticated=False,
+            form={"username": username, "password": BENCH_PASSWORD},
+        ),
+        Scenario("users_me", "GET", lambda i: "/users/me/"),
+        Scenario("organizations", "GET", lambda i: "/organizations"),
+        Scenario("addresses", "GET", org_path("/address/{org_id}")),
+        Scenario("custom_fields", "GET", org_path("/custom_fields/{org_id}")),
+    ]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    headers: dict[str, str],
+) -> ScenarioResult:
+    request_headers = headers if scenario.authenticated else {}
+
+    async def send(i: int) -> httpx.Response:
+        return await client.request(
+            scenario.method,
+            scenario.path(i),
+            headers=request_headers,
+            data=scenario.form,
+        )
+
+    for i in range(warmup):
+        await send(i)
+
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            response = await send(i)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    seconds = time.perf_counter() - started
+
+    latencies.sort()
+    return ScenarioResult(
+        name=scenario.name,
+        requests=requests,
+        errors=errors,
+        seconds=round(seconds, 4),
+        throughput=round(requests / seconds, 2) if seconds else 0.0,
+        p50_ms=round(percentile(latencies, 50) * 1000, 3),
+        p95_ms=round(percentile(latencies, 95) * 1000, 3),
+        p99_ms=round(percentile(latencies, 99) * 1000, 3),
+    )
+
+
+async def run_scenarios(
+    args: argparse.Namespace,
+    username: str,
+    org_ids: list[int],
+) -> list[ScenarioResult]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post(
+            "/token",
+            data={"username": username, "password": BENCH_PASSWORD},
+        )
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        results = []
+        for scenario in build_scenarios(username, org_ids):
+            requests = max(args.concurrency, int(args.requests * scenario.share))
+            warmup = max(1, int(args.warmup * scenario.share))
+            results.append(
+                await run_scenario(
+                    client,
+                    scenario,
+                    requests=requests,
+                    concurrency=args.concurrency,
+                    warmup=warmup,
+                    headers=headers,
+                )
+            )
+
+    return results
+
+
+def compare(
+    results: list[ScenarioResult],
+    baseline: dict[str, Any],
+    tolerance: float,
+) -> list[str]:
+    regressions = []
+    previous = baseline.get("scenarios", {})
+
+    for result in results:
+        before = previous.get(result.name)
+        if before is None:
+            continue
+
+        if result.p95_ms > before["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{result.name}: p95 {result.p95_ms:.2f}ms vs "
+                f"baseline {before['p95_ms']:.2f}ms"
+            )
+        if result.throughput < before["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{result.name}: {result.throughput:.1f} req/s vs "
+                f"baseline {before['throughput']:.1f} req/s"
+            )
+
+    return regressions
+
+
+def print_report(results: list[ScenarioResult]) -> None:
+    print(
+        f"{'scenario':<16}{'requests':>10}{'errors':>8}{'req/s':>10}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    )
+    for r in results:
+        print(
+            f"{r.name:<16}{r.requests:>10}{r.errors:>8}{r.throughput:>10.1f}"
+            f"{r.p50_ms:>10.2f}{r.p95_ms:>10.2f}{r.p99_ms:>10.2f}"
+        )
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--orgs", type=int, default=200)
+    parser.add_argument("--addresses", type=int, default=3)
+    parser.add_argument("--custom-fields", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="allowed relative p95/throughput regression (default: 0.2)",
+    )
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="also write the results as JSON here")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.orgs < 1:
+        print("--orgs must be at least 1")
+        return 2
+
+    # Runs the app's own startup, which also creates the schema.
+    async with app.router.lifespan_context(app):
+        username, org_ids = await seed(args.orgs, args.addresses, args.custom_fields)
+        results = await run_scenarios(args, username, org_ids)
+
+    print_report(results)
+
+    report = {
+        "python": platform.python_version(),
+        "database": async_engine.url.get_backend_name(),
+        "params": {
+            "orgs": args.orgs,
+            "addresses": args.addresses,
+            "custom_fields": args.custom_fields,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "scenarios": {r.name: asdict(r) for r in results},
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failures = [f"{r.name}: {r.errors} error responses" for r in results if r.errors]
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        mismatched = [
+            key
+            for key in ("database", "params")
+            if baseline.get(key) != report[key]
+        ]
+        if mismatched:
+            # Latencies from a different workload say nothing about a regression.
+            for key in mismatched:
+                print(f"baseline {key}: {baseline.get(key)}, this run: {report[key]}")
+            print(
+                f"refusing to compare against {args.baseline}: rerun with its "
+                "parameters, or record a new baseline with --update-baseline"
+            )
+            return 2
+        failures.extend(compare(results, baseline, args.tolerance))
+    else:
+        print(f"no baseline at {args.baseline}; run with --update-baseline to record one")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,199 @@
+"""
+Login admission control: what POST /token sheds, and how cheaply.
+
+    python -m benchmarks.login_limits
+    LOGIN_RATE_LIMIT_BACKEND=redis python -m benchmarks.login_limits
+
+Drives POST /token from several client addresses:
+
+- credential stuffing: one address guessing one username's password. After
+  LOGIN_USERNAME_BURST attempts the rest get 429.
+- spraying: one address trying many usernames. After LOGIN_IP_BURST
+  attempts the rest get 429.
+- retry storm: --storm users logging in at once, each from its own
+  address. Beyond LOGIN_MAX_IN_FLIGHT verifications they get 429.
+- another user logging in from elsewhere afterwards, who should get in.
+  The stuffed username itself stays refused until its bucket refills,
+  whoever asks.
+
+Reports the status counts, p50 latency of refused and admitted attempts,
+and how many passwords were actually verified. Exits non-zero if a 429
+comes without Retry-After, if a refused attempt reached bcrypt, or if the
+other user is refused.
+
+With LOGIN_RATE_LIMIT_BACKEND=redis, LOGIN_RATE_LIMIT_URL must point at a
+running server.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+from typing import Optional
+
+from benchmarks import support  # noqa: F401  (selects the benchmark database)
+
+os.environ["JOB_WORKERS"] = "0"
+os.environ.setdefault("LOGIN_USERNAME_BURST", "5")
+os.environ.setdefault("LOGIN_IP_BURST", "20")
+os.environ.setdefault("LOGIN_MAX_IN_FLIGHT", "4")
+
+import httpx
+from sqlalchemy import insert
+
+from app import authentication as auth
+from app.db import async_session_local
+from app.main import app
+from app.ratelimit import login_limiter
+from app.users.models import UserModel
+from benchmarks.http_suite import BENCH_PASSWORD, percentile, seed
+
+
+async def seed_storm_users(count: int) -> list[str]:
+    usernames = [f"storm-{i}" for i in range(count)]
+    hashed = auth.Authenticator.get_password_hash(BENCH_PASSWORD)
+
+    async with async_session_local() as db:
+        await db.execute(
+            insert(UserModel),
+            [
+                {
+                    "username": username,
+                    "email": f"{username}@example.com",
+                    "password": hashed,
+                    "first_name": "Storm",
+                    "last_name": "User",
+                }
+                for username in usernames
+            ],
+        )
+        await db.commit()
+
+    return usernames
+
+
+def client_from(address: str) -> httpx.AsyncClient:
+    transport = httpx.ASGITransport(app=app, client=(address, 40000))
+    return httpx.AsyncClient(transport=transport, base_url="http://bench")
+
+
+class Attempts:
+    def __init__(self) -> None:
+        self.statuses: Counter[int] = Counter()
+        self.latencies: dict[int, list[float]] = {}
+        self.failures: list[str] = []
+
+    async def login(self, client: httpx.AsyncClient, username: str, password: str) -> int:
+        started = time.perf_counter()
+        response = await client.post(
+            "/token",
+            data={"username": username, "password": password},
+        )
+        elapsed = time.perf_counter() - started
+
+        self.statuses[response.status_code] += 1
+        self.latencies.setdefault(response.status_code, []).append(elapsed)
+        if response.status_code == 429 and not response.headers.get("retry-after"):
+            self.failures.append("429 without Retry-After")
+        return response.status_code
+
+    def report(self, name: str, verified: int) -> None:
+        counts = ", ".join(f"{count}x {code}" for code, count in sorted(self.statuses.items()))
+        refused = sorted(self.latencies.get(429, []))
+        admitted = sorted(
+            latency
+            for code, latencies in self.latencies.items()
+            if code != 429
+            for latency in latencies
+        )
+        print(
+            f"{name:<20}{counts:<26}{percentile(refused, 50) * 1000:>16.2f}"
+            f"{percentile(admitted, 50) * 1000:>17.2f}{verified:>8}"
+        )
+
+
+async def scenario(name: str, run) -> list[str]:
+    attempts = Attempts()
+    verified = auth.hash_pool.completed
+
+    await run(attempts)
+
+    verified = auth.hash_pool.completed - verified
+    attempts.report(name, verified)
+
+    failures = [f"{name}: {failure}" for failure in sorted(set(attempts.failures))]
+    admitted = sum(count for code, count in attempts.statuses.items() if code != 429)
+    if verified > admitted:
+        failures.append(f"{name}: {verified} verifications for {admitted} admitted attempts")
+    if not attempts.statuses[429]:
+        failures.append(f"{name}: nothing was refused")
+    return failures
+
+
+async def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--attempts", type=int, default=60)
+    parser.add_argument("--storm", type=int, default=40)
+    args = parser.parse_args(argv)
+
+    failures = []
+
+    # Runs the app's own startup, which also creates the schema.
+    async with app.router.lifespan_context(app):
+        username, _ = await seed(orgs=0, addresses=0, custom_fields=0)
+        other_username, _ = await seed(orgs=0, addresses=0, custom_fields=0)
+        storm_usernames = await seed_storm_users(args.storm)
+
+        async def stuffing(attempts: Attempts) -> None:
+            async with client_from("203.0.113.1") as client:
+                for i in range(args.attempts):
+                    await attempts.login(client, username, f"guess-{i}")
+
+        async def spraying(attempts: Attempts) -> None:
+            async with client_from("203.0.113.2") as client:
+                for i in range(args.attempts):
+                    await attempts.login(client, f"sprayed-{i}", "guess")
+
+        async def storm(attempts: Attempts) -> None:
+            clients = [client_from(f"198.51.100.{i}") for i in range(args.storm)]
+            try:
+                await asyncio.gather(
+                    *(
+                        attempts.login(client, storm_username, BENCH_PASSWORD)
+                        for storm_username, client in zip(storm_usernames, clients)
+                    )
+                )
+            finally:
+                for client in clients:
+                    await client.aclose()
+
+        print(
+            f"{'scenario':<20}{'statuses':<26}{'refused p50 ms':>16}"
+            f"{'admitted p50 ms':>17}{'bcrypt':>8}"
+        )
+        failures.extend(await scenario("credential stuffing", stuffing))
+        failures.extend(await scenario("spraying", spraying))
+        failures.extend(await scenario("retry storm", storm))
+
+        others = Attempts()
+        async with client_from("192.0.2.10") as client:
+            status = await others.login(client, other_username, BENCH_PASSWORD)
+            stuffed = await others.login(client, username, BENCH_PASSWORD)
+        print(f"another user: {status}; the stuffed username, right password: {stuffed}")
+        if status != 200:
+            failures.append(f"another user's login: status {status}")
+        if stuffed != 429:
+            failures.append(f"stuffed username let through: status {stuffed}")
+
+        print(f"limiter: {login_limiter.stats()}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
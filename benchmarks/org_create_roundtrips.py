@@ -0,0 +1,80 @@
+"""
+Counts database round trips for OrganizationRepo.create as the number of
+nested addresses and custom fields grows.
+
+    python -m benchmarks.org_create_roundtrips
+
+Runs against a throwaway database (see benchmarks.support) and exits
+non-zero if the number of statements or commits per create changes with
+the number of children.
+"""
+
+import asyncio
+import time
+
+from benchmarks.support import QueryCounter
+
+from app.db import Base, async_session_local, async_engine, engine
+from app.addresses.schemas import AddressBaseSchema
+from app.organizations.repo import OrganizationRepo
+from app.organizations.schemas import OrganizationCreateSchema
+from app.schemas import CustomFieldBaseSchema
+
+CHILD_COUNTS = [0, 1, 10, 50, 200]
+
+
+def build_org(children: int) -> OrganizationCreateSchema:
+    return OrganizationCreateSchema(
+        name=f"Bench org with {children} children",
+        addresses=[
+            AddressBaseSchema(street_address1=f"{i} Main St", city="Pune")
+            for i in range(children)
+        ],
+        custom_fields=[
+            CustomFieldBaseSchema(index=i, label=f"label-{i}", value=f"value-{i}")
+            for i in range(children)
+        ],
+    )
+
+
+async def main() -> int:
+    Base.metadata.create_all(bind=engine)
+
+    counter = QueryCounter()
+    counter.attach(async_engine.sync_engine)
+
+    repo = OrganizationRepo()
+    results = []
+
+    for children in CHILD_COUNTS:
+        org = build_org(children)
+
+        async with async_session_local() as db:
+            counter.reset()
+            started = time.perf_counter()
+            created = await repo.create(db=db, org=org)
+            elapsed = time.perf_counter() - started
+
+        assert len(created.addresses) == children
+        assert len(created.custom_fields) == children
+        results.append((children, counter.statements, counter.commits, elapsed))
+
+    print(f"{'children':>10} {'statements':>12} {'commits':>8} {'ms':>10}")
+    for children, statements, commits, elapsed in results:
+        print(f"{children:>10} {statements:>12} {commits:>8} {elapsed * 1000:>10.2f}")
+
+    await async_engine.dispose()
+
+    # Children go out in one executemany per table, so only the empty case
+    # (which skips both) may differ from the rest.
+    with_children = {(s, c) for n, s, c, _ in results if n > 0}
+    if len(with_children) != 1:
+        print("FAIL: round trips per create grow with the number of children")
+        return 1
+
+    print("OK: round trips per create are constant")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
@@ -0,0 +1,84 @@
+"""
+Checks that organization reads issue a fixed number of queries.
+
+    python -m benchmarks.org_read_querycount
+
+Seeds organizations with addresses and custom fields, then counts the
+statements behind OrganizationRepo.fetch_organizations for pages of
+different sizes and behind fetch_organizations_by_id. Exits non-zero if
+any count depends on the number of organizations read.
+"""
+
+import asyncio
+import os
+
+from benchmarks.support import QueryCounter
+
+# Counts the detail load itself; with the cache on, the version lookup that
+# keys it adds a query.
+os.environ["ORG_CACHE_BACKEND"] = "none"
+
+from app.db import Base, async_session_local, async_engine, engine
+from app.addresses.schemas import AddressBaseSchema
+from app.organizations.repo import OrganizationRepo
+from app.organizations.schemas import OrganizationCreateSchema
+from app.schemas import CustomFieldBaseSchema
+
+PAGE_SIZES = [1, 10, 100]
+LIST_QUERIES = 3
+DETAIL_QUERIES = 2
+
+
+async def seed(repo: OrganizationRepo, count: int) -> None:
+    async with async_session_local() as db:
+        for i in range(count):
+            await repo.create(
+                db=db,
+                org=OrganizationCreateSchema(
+                    name=f"Org {i}",
+                    addresses=[AddressBaseSchema(city="Pune") for _ in range(3)],
+                    custom_fields=[
+                        CustomFieldBaseSchema(index=j, label="k", value="v")
+                        for j in range(3)
+                    ],
+                ),
+            )
+
+
+async def main() -> int:
+    Base.metadata.create_all(bind=engine)
+
+    repo = OrganizationRepo()
+    await seed(repo, max(PAGE_SIZES))
+
+    counter = QueryCounter()
+    counter.attach(async_engine.sync_engine)
+    failures = []
+
+    for size in PAGE_SIZES:
+        async with async_session_local() as db:
+            counter.reset()
+            page = await repo.fetch_organizations(db=db, limit=size)
+
+        print(f"list {len(page.items):>4} orgs: {counter.statements} queries")
+        if counter.statements != LIST_QUERIES:
+            failures.append(f"listing {size} orgs took {counter.statements} queries")
+
+    async with async_session_local() as db:
+        counter.reset()
+        org = await repo.fetch_organizations_by_id(db=db, org_id=1)
+
+    print(f"detail ({len(org.addresses)} addresses): {counter.statements} queries")
+    if counter.statements != DETAIL_QUERIES:
+        failures.append(f"org detail took {counter.statements} queries")
+
+    await async_engine.dispose()
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
@@ -0,0 +1,164 @@
+"""
+Password hashes upgraded on login, off the request path.
+
+    python -m benchmarks.password_rehash
+    python -m benchmarks.password_rehash --rounds 8 --logins 20
+
+Configures bcrypt at --rounds and seeds users whose hashes predate it: one
+bcrypt hash a cost below, one pbkdf2_sha256 hash, and one already current.
+Each logs in through POST /token --logins times. The first login of an
+outdated user should cost what a current user's does, because the new
+hash is computed after the response; later logins verify the new hash.
+
+Also checks that a rehash whose stored hash changed in the meantime (a
+password change racing it) leaves the row alone.
+
+Exits non-zero if an outdated hash is not replaced, a current one is, or a
+login fails.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Optional
+
+from benchmarks import support  # noqa: F401  (selects the benchmark database)
+
+os.environ["JOB_WORKERS"] = "0"
+# Logs the same users in repeatedly.
+os.environ["LOGIN_RATE_LIMIT_BACKEND"] = "none"
+
+
+def parse_args(argv: Optional[list[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--rounds", type=int, default=8)
+    parser.add_argument("--logins", type=int, default=10)
+    return parser.parse_args(argv)
+
+
+ARGS = parse_args(None if __name__ == "__main__" else [])
+
+# Read when app.authentication is imported.
+os.environ["PASSWORD_HASH_SCHEME"] = "bcrypt"
+os.environ["PASSWORD_HASH_ROUNDS"] = str(ARGS.rounds)
+
+import httpx
+from passlib.context import CryptContext
+from sqlalchemy import insert, select
+
+from app.authentication import pwd_context
+from app.db import async_session_local
+from app.main import app
+from app.users.models import UserModel
+from app.users.rehash import password_rehasher
+from benchmarks.http_suite import BENCH_PASSWORD, percentile
+
+LEGACY_CONTEXT = CryptContext(schemes=["bcrypt", "pbkdf2_sha256"])
+
+
+def seeded_hashes(rounds: int) -> dict[str, str]:
+    return {
+        "current": pwd_context.hash(BENCH_PASSWORD),
+        "cheaper-bcrypt": LEGACY_CONTEXT.hash(
+            BENCH_PASSWORD, scheme="bcrypt", rounds=rounds - 1
+        ),
+        "pbkdf2": LEGACY_CONTEXT.hash(BENCH_PASSWORD, scheme="pbkdf2_sha256"),
+    }
+
+
+async def stored_hash(username: str) -> str:
+    async with async_session_local() as db:
+        result = await db.execute(
+            select(UserModel.password).where(UserModel.username == username)
+        )
+        return result.scalar_one()
+
+
+async def login(client: httpx.AsyncClient, username: str) -> tuple[int, float]:
+    started = time.perf_counter()
+    response = await client.post(
+        "/token",
+        data={"username": username, "password": BENCH_PASSWORD},
+    )
+    return response.status_code, time.perf_counter() - started
+
+
+async def check_race(user_id: int, username: str) -> list[str]:
+    before = await stored_hash(username)
+    skipped = password_rehasher.skipped
+
+    # The hash that was verified is no longer the stored one.
+    password_rehasher.schedule(user_id, BENCH_PASSWORD, "stale-hash")
+    await password_rehasher.drain()
+
+    if await stored_hash(username) != before or password_rehasher.skipped != skipped + 1:
+        return ["a rehash overwrote a hash that changed after it was verified"]
+    print("race: a rehash of a hash changed meanwhile left the row alone")
+    return []
+
+
+async def main(args: argparse.Namespace) -> int:
+    failures = []
+    hashes = seeded_hashes(args.rounds)
+
+    # Runs the app's own startup, which also creates the schema.
+    async with app.router.lifespan_context(app):
+        async with async_session_local() as db:
+            result = await db.execute(
+                insert(UserModel).returning(UserModel.id, UserModel.username),
+                [
+                    {
+                        "username": f"rehash-{name}",
+                        "email": f"rehash-{name}@example.com",
+                        "password": hashed,
+                        "first_name": "Rehash",
+                        "last_name": name,
+                    }
+                    for name, hashed in hashes.items()
+                ],
+            )
+            user_ids = {username: user_id for user_id, username in result.all()}
+            await db.commit()
+
+        print(f"{'user':<22}{'first ms':>10}{'p50 ms':>9}{'stored hash':>28}")
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, seeded in hashes.items():
+                username = f"rehash-{name}"
+
+                status, first = await login(client, username)
+                await password_rehasher.drain()
+
+                latencies = []
+                for _ in range(args.logins - 1):
+                    status_later, seconds = await login(client, username)
+                    status = max(status, status_later)
+                    latencies.append(seconds)
+                latencies.sort()
+
+                stored = await stored_hash(username)
+                print(
+                    f"{username:<22}{first * 1000:>10.1f}"
+                    f"{percentile(latencies, 50) * 1000:>9.1f}{stored[:24]:>28}"
+                )
+
+                if status != 200:
+                    failures.append(f"{username}: login status {status}")
+                if name == "current" and stored != seeded:
+                    failures.append(f"{username}: a current hash was replaced")
+                if name != "current" and (stored == seeded or pwd_context.needs_update(stored)):
+                    failures.append(f"{username}: hash not upgraded ({stored[:24]})")
+
+        failures.extend(await check_race(user_ids["rehash-current"], "rehash-current"))
+        print(f"rehasher: {password_rehasher.stats()}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(ARGS)))
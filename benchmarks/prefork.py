@@ -0,0 +1,245 @@
+"""
+Worker memory and first-request latency: `python -m app` against uvicorn.
+
+    python -m benchmarks.prefork
+    python -m benchmarks.prefork --workers 8 --requests 50
+
+Seeds a user and a few organizations, then starts real servers on a local
+port in two ways:
+
+- uvicorn: `uvicorn app.main:app --workers N`, where each worker imports
+  the app on its own
+- prefork: `python -m app --workers N`, where one warmed parent forks the
+  workers
+
+With N workers it reads each worker's memory from /proc (Linux only):
+
+- RSS
+- PSS, where shared pages are split between their users
+- USS, the pages only that worker holds
+
+With one worker it times the first request to each hot endpoint against
+the median of --requests later ones. The organization cache is off and
+every request presents a new token, so later requests do the same work as
+the first. Exits non-zero if prefork workers do
+not hold less private memory than uvicorn workers, or if any prefork first
+request is slower than --spike-factor times that endpoint's median.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Iterator, Optional
+
+from benchmarks import support  # noqa: F401  (selects the benchmark database)
+
+# Servers inherit the environment, so they share support's SECRET_KEY with
+# the tokens minted here, and their workers one revocation log. First
+# requests must not be answered from a cache.
+os.environ.setdefault(
+    "TOKEN_REVOCATION_LOG",
+    os.path.join(support.WORKDIR, "revoked_tokens.log"),
+)
+os.environ["ORG_CACHE_BACKEND"] = "none"
+
+import httpx
+
+from app.authentication import Authenticator
+from app.db import async_engine, create_schema
+from benchmarks.http_suite import BENCH_PASSWORD, seed
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAUNCHERS = {
+    "uvicorn": ["-m", "uvicorn", "app.main:app"],
+    "prefork": ["-m", "app"],
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def running_server(launcher: str, workers: int) -> Iterator[tuple[int, str]]:
+    """Starts a server and yields (pid, base url) once it answers."""
+    port = free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            *LAUNCHERS[launcher],
+            "--port", str(port),
+            "--workers", str(workers),
+            "--log-level", "warning",
+        ],
+        cwd=PROJECT_ROOT,
+        env=os.environ.copy(),
+    )
+    base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"{launcher} exited with {process.returncode}")
+            try:
+                # Every worker must have started, not just the first one. A
+                # single worker runs in the launched process itself.
+                if workers == 1 or len(worker_pids(process.pid)) >= workers:
+                    httpx.get(f"{base_url}/docs").raise_for_status()
+                    break
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{launcher} did not start within 60 s")
+            time.sleep(0.2)
+
+        yield process.pid, base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def worker_pids(parent: int) -> list[int]:
+    pids = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                fields = stat.read().rsplit(")", 1)[1].split()
+            with open(f"/proc/{entry}/cmdline", "rb") as cmdline:
+                command = cmdline.read()
+        except OSError:
+            continue
+        # fields[1] is the parent pid; multiprocessing helpers are not workers.
+        if int(fields[1]) == parent and b"resource_tracker" not in command:
+            pids.append(int(entry))
+    return pids
+
+
+def memory_kb(pid: int) -> dict[str, int]:
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as rollup:
+        for line in rollup:
+            key, _, rest = line.partition(":")
+            if rest.strip().endswith("kB"):
+                values[key] = int(rest.split()[0])
+
+    return {
+        "rss": values["Rss"],
+        "pss": values["Pss"],
+        "uss": values["Private_Clean"] + values["Private_Dirty"],
+    }
+
+
+def measure_memory(launcher: str, workers: int) -> dict[str, float]:
+    with running_server(launcher, workers) as (pid, _):
+        # Let workers settle after startup.
+        time.sleep(1)
+        samples = [memory_kb(worker) for worker in worker_pids(pid)]
+        parent = memory_kb(pid)
+
+    report = {key: statistics.mean(s[key] for s in samples) for key in parent}
+    report["total_pss"] = parent["pss"] + sum(s["pss"] for s in samples)
+    return report
+
+
+def measure_first_requests(
+    launcher: str,
+    username: str,
+    org_id: int,
+    requests: int,
+) -> dict[str, tuple[float, float]]:
+    """Returns {endpoint: (first ms, median ms)} on a fresh single worker."""
+    paths = [
+        "/users/me/",
+        "/organizations",
+        f"/organizations/{org_id}",
+        f"/address/{org_id}",
+        f"/custom_fields/{org_id}",
+        "/openapi.json",
+    ]
+    timings: dict[str, tuple[float, float]] = {}
+
+    with running_server(launcher, 1) as (_, base_url), httpx.Client(base_url=base_url) as client:
+
+        def timed(method: str, path: str, **kwargs) -> float:
+            started = time.perf_counter()
+            client.request(method, path, **kwargs).raise_for_status()
+            return (time.perf_counter() - started) * 1000
+
+        form = {"username": username, "password": BENCH_PASSWORD}
+        token_times = [timed("POST", "/token", data=form) for _ in range(3)]
+        timings["/token"] = (token_times[0], statistics.median(token_times[1:]))
+
+        def fresh_token() -> dict[str, str]:
+            # A new token per request, so the current-user cache never hits.
+            tokens = Authenticator().create_tokens(data={"sub": username})
+            return {"Authorization": f"Bearer {tokens['access']}"}
+
+        for path in paths:
+            first = timed("GET", path, headers=fresh_token())
+            later = [timed("GET", path, headers=fresh_token()) for _ in range(requests)]
+            timings[path] = (first, statistics.median(later))
+
+    return timings
+
+
+async def prepare() -> tuple[str, int]:
+    await create_schema()
+    username, org_ids = await seed(orgs=20, addresses=2, custom_fields=2)
+    await async_engine.dispose()
+    return username, org_ids[0]
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--spike-factor", type=float, default=3.0)
+    args = parser.parse_args(argv)
+
+    username, org_id = asyncio.run(prepare())
+
+    failures = []
+
+    memory = {launcher: measure_memory(launcher, args.workers) for launcher in LAUNCHERS}
+
+    print(f"{args.workers} workers, mean per worker (MiB):")
+    print(f"{'':<10}{'rss':>9}{'pss':>9}{'uss':>9}{'total pss':>12}")
+    for launcher, report in memory.items():
+        print(
+            f"{launcher:<10}"
+            + "".join(f"{report[key] / 1024:>9.1f}" for key in ("rss", "pss", "uss"))
+            + f"{report['total_pss'] / 1024:>12.1f}"
+        )
+
+    if memory["prefork"]["uss"] >= memory["uvicorn"]["uss"]:
+        failures.append("prefork workers do not hold less private memory")
+
+    print(f"\nfirst request / median of the next {args.requests} (ms), one worker:")
+    for launcher in LAUNCHERS:
+        timings = measure_first_requests(launcher, username, org_id, args.requests)
+        print(launcher)
+        for path, (first, median) in timings.items():
+            print(f"  {path:<22}{first:>9.2f}{median:>9.2f}{first / median:>8.1f}x")
+            if launcher == "prefork" and first > args.spike_factor * median:
+                failures.append(f"prefork first request to {path} is {first / median:.1f}x")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
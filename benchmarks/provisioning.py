@@ -0,0 +1,189 @@
+"""
+Registration latency and background provisioning throughput.
+
+    python -m benchmarks.provisioning
+    python -m benchmarks.provisioning --users 100 --jobs 20000 --batch-sizes 1,10,100
+
+Registers --users users through the ASGI app with the job workers running,
+and reports registration p50/p95 (mostly password hashing) and how long
+after each registration its default organization existed.
+
+It then enqueues --jobs organization provisioning jobs at once and times
+how long workers take to drain them at each --batch-sizes value, to show
+what grouping jobs into one transaction buys.
+
+Exits non-zero if a registration's organization is not created, or a
+queue is not drained.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from typing import Optional
+
+from benchmarks import support  # noqa: F401  (selects the benchmark database)
+
+import httpx
+from sqlalchemy import delete, func, select
+
+from app.db import async_engine, async_session_local, create_schema
+from app.jobs.models import JobModel
+from app.jobs.queue import JobQueue, job_queue
+from app.main import app
+from app.organizations.jobs import (
+    PROVISION_DEFAULT_ORGANIZATION,
+    provision_default_organizations,
+)
+from app.organizations.models import OrganizationModel
+from benchmarks.http_suite import percentile
+
+DRAIN_TIMEOUT_SECONDS = 120
+
+
+async def count_organizations() -> int:
+    async with async_session_local() as db:
+        result = await db.execute(select(func.count()).select_from(OrganizationModel))
+        return result.scalar_one()
+
+
+async def bench_registration(users: int, concurrency: int) -> list[str]:
+    latencies: list[float] = []
+    registered_at: dict[str, float] = {}
+    provisioned_at: dict[str, float] = {}
+    slots = asyncio.Semaphore(concurrency)
+
+    async def register(client: httpx.AsyncClient, i: int) -> None:
+        async with slots:
+            started = time.perf_counter()
+            response = await client.post(
+                "/users",
+                json={
+                    "username": f"bench{i}",
+                    "email": f"bench{i}@example.com",
+                    "first_name": "Bench",
+                    "last_name": str(i),
+                    "organization": f"Bench Org {i}",
+                    "password": "bench-password",
+                },
+            )
+            finished = time.perf_counter()
+            response.raise_for_status()
+            latencies.append(finished - started)
+            registered_at[f"Bench Org {i}"] = finished
+
+    async def watch(done: asyncio.Event) -> None:
+        while not done.is_set() or len(provisioned_at) < len(registered_at):
+            async with async_session_local() as db:
+                result = await db.execute(
+                    select(OrganizationModel.name).where(
+                        OrganizationModel.name.in_(set(registered_at) - set(provisioned_at))
+                    )
+                )
+                now = time.perf_counter()
+                for name in result.scalars():
+                    provisioned_at[name] = now
+            if time.perf_counter() - started > DRAIN_TIMEOUT_SECONDS:
+                return
+            await asyncio.sleep(0.01)
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            started = time.perf_counter()
+            done = asyncio.Event()
+            watcher = asyncio.create_task(watch(done))
+            await asyncio.gather(*(register(client, i) for i in range(users)))
+            done.set()
+            await watcher
+
+    latencies.sort()
+    lags = sorted(
+        provisioned_at[name] - registered_at[name]
+        for name in provisioned_at
+    )
+
+    print(
+        f"registration: {users} users, p50 {percentile(latencies, 50) * 1000:.1f} ms, "
+        f"p95 {percentile(latencies, 95) * 1000:.1f} ms"
+    )
+    if lags:
+        print(
+            f"organization created after registration: "
+            f"p50 {percentile(lags, 50) * 1000:.1f} ms, p95 {percentile(lags, 95) * 1000:.1f} ms "
+            f"(polled every 10 ms), worker batches {job_queue.batches}"
+        )
+
+    missing = users - len(provisioned_at)
+    return [f"{missing} registrations never got an organization"] if missing else []
+
+
+async def bench_drain(jobs: int, batch_size: int, workers: int) -> Optional[float]:
+    queue = JobQueue(
+        batch_size=batch_size,
+        poll_seconds=0.05,
+        max_attempts=1,
+        retry_base_seconds=1,
+        retry_max_seconds=1,
+        lease_seconds=300,
+    )
+    queue.register(PROVISION_DEFAULT_ORGANIZATION, provision_default_organizations)
+
+    async with async_session_local() as db:
+        await db.execute(delete(JobModel))
+        for i in range(jobs):
+            queue.enqueue(db, PROVISION_DEFAULT_ORGANIZATION, {"name": f"Drained {i}"})
+        await db.commit()
+
+    before = await count_organizations()
+    started = time.perf_counter()
+    queue.start(workers)
+
+    while queue.completed + queue.failed < jobs:
+        if time.perf_counter() - started > DRAIN_TIMEOUT_SECONDS:
+            await queue.stop()
+            return None
+        await asyncio.sleep(0.01)
+
+    elapsed = time.perf_counter() - started
+    await queue.stop()
+
+    if await count_organizations() - before != jobs:
+        return None
+    return elapsed
+
+
+async def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--batch-sizes", default="1,100")
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args(argv)
+
+    await create_schema()
+
+    failures = await bench_registration(args.users, args.concurrency)
+
+    print(f"{'batch size':>10}{'workers':>9}{'jobs':>8}{'seconds':>10}{'jobs/s':>10}")
+    for batch_size in [int(size) for size in args.batch_sizes.split(",")]:
+        elapsed = await bench_drain(args.jobs, batch_size, args.workers)
+        if elapsed is None:
+            failures.append(f"batch size {batch_size}: queue not drained")
+            continue
+        print(
+            f"{batch_size:>10}{args.workers:>9}{args.jobs:>8}"
+            f"{elapsed:>10.2f}{args.jobs / elapsed:>10.0f}"
+        )
+
+    await async_engine.dispose()
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
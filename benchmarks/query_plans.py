@@ -0,0 +1,339 @@
+"""
+Fails when a repository query plans a full table scan.
+
+    python -m benchmarks.query_plans
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.query_plans
+
+Migrates a throwaway database to head with alembic, then drives every
+method of UserRepo, OrganizationRepo, AddressRepo, CustomFieldRepo and
+SearchRepo, a job queue batch and a tenant export, recording each SELECT,
+UPDATE and DELETE they emit. Each statement is then run through EXPLAIN with its original
+parameters:
+
+- SQLite: EXPLAIN QUERY PLAN. A `SCAN <table>` step is a full scan. The
+  one exception is an unfiltered statement with a LIMIT whose scan already
+  produces the requested order, i.e. no temp B-tree is used for ORDER BY.
+- Postgres: EXPLAIN (FORMAT JSON) with enable_seqscan off. Any Seq Scan
+  left in the plan means no index can serve the query.
+
+Exits non-zero if any statement scans a whole table.
+"""
+
+import asyncio
+import os
+import re
+import sys
+from typing import Any, AsyncIterator, Optional
+
+from benchmarks import support  # noqa: F401  (selects the benchmark database)
+
+# Detail reads must reach the database rather than the cache.
+os.environ["ORG_CACHE_BACKEND"] = "none"
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import event
+
+from app.db import PROJECT_ROOT, async_engine, async_session_local
+from app.crud import CustomFieldRepo
+from app.pagination import encode_cursor
+from app.schemas import CustomFieldCreateSchema
+from app.addresses.repo import AddressRepo
+from app.addresses.schemas import AddressCreateSchema
+from app.jobs.queue import job_queue
+from app.organizations.export import tenant_exporter
+from app.organizations.jobs import PROVISION_DEFAULT_ORGANIZATION
+from app.organizations.repo import OrganizationRepo
+from app.organizations.schemas import OrganizationCreateSchema, OrganizationUpdateSchema
+from app.search.repo import SearchRepo
+from app.users.rehash import password_rehasher
+from app.users.repo import UserRepo
+from app.users.schemas import InputUserModelSchema, UpdateUserModelSchema
+
+EXPLAINED_STATEMENTS = ("SELECT", "UPDATE", "DELETE")
+
+# A table or whole-index scan without any constraint, e.g. "SCAN addresses"
+# or "SCAN addresses USING COVERING INDEX ix_addresses_id".
+FULL_SCAN = re.compile(r"SCAN \w+(?: USING (?:COVERING )?INDEX \w+)?$")
+
+
+class StatementRecorder:
+    """Collects the distinct statements each repository call emits."""
+
+    def __init__(self) -> None:
+        self.label = ""
+        self.statements: dict[str, tuple[str, Any]] = {}
+
+    def on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if executemany or not statement.lstrip().upper().startswith(EXPLAINED_STATEMENTS):
+            return
+        self.statements.setdefault(statement, (self.label, parameters))
+
+
+async def as_rows(payloads: list[dict]) -> AsyncIterator[tuple[int, Any, Optional[str]]]:
+    for row, payload in enumerate(payloads, start=1):
+        yield row, payload, None
+
+
+async def exercise_repos(recorder: StatementRecorder) -> None:
+    user_repo = UserRepo()
+    org_repo = OrganizationRepo()
+    address_repo = AddressRepo()
+    custom_field_repo = CustomFieldRepo()
+    search_repo = SearchRepo()
+
+    async def step(label: str, call) -> None:
+        recorder.label = label
+        async with async_session_local() as db:
+            await call(db)
+
+    user = InputUserModelSchema(
+        username="planner",
+        email="planner@example.com",
+        first_name="Plan",
+        last_name="Checker",
+        organization="Plans Inc",
+        password="planner-password",
+    )
+
+    await step("UserRepo.create", lambda db: user_repo.create(db=db, user=user))
+    await step(
+        "UserRepo.login",
+        lambda db: user_repo.login(db=db, username=user.username, password=user.password),
+    )
+    await step(
+        "UserRepo.fetch_user_by_username",
+        lambda db: user_repo.fetch_user_by_username(db=db, username=user.username),
+    )
+    await step(
+        "UserRepo.fetch_user_by_id",
+        lambda db: user_repo.fetch_user_by_id(db=db, id=1),
+    )
+    await step(
+        "UserRepo.update_user",
+        lambda db: user_repo.update_user(
+            db=db, user=UpdateUserModelSchema(last_name="Planner"), id=1
+        ),
+    )
+    await step(
+        "UserRepo.bulk_create",
+        lambda db: user_repo.bulk_create(
+            db=db,
+            rows=as_rows(
+                [
+                    {**user.model_dump(), "username": "bulk-planner", "email": "bulk@example.com"},
+                    user.model_dump(),
+                ]
+            ),
+            batch_size=10,
+        ),
+    )
+
+    for i in range(3):
+        await step(
+            "OrganizationRepo.create",
+            lambda db: org_repo.create(
+                db=db,
+                org=OrganizationCreateSchema(
+                    name=f"Plans {i}",
+                    industry_type="retail",
+                    addresses=[{"city": "Pune"}],
+                    custom_fields=[{"index": 1, "label": "k", "value": "v"}],
+                ),
+            ),
+        )
+
+    listings = {
+        "unfiltered": {},
+        "cursor": {"cursor": encode_cursor({"id": 1})},
+        "is_org_active": {"is_org_active": True},
+        "industry_type": {"industry_type": "retail"},
+        "currency_code": {"currency_code": "INR"},
+        "all filters": {
+            "is_org_active": True,
+            "industry_type": "retail",
+            "currency_code": "INR",
+        },
+    }
+    for name, filters in listings.items():
+        await step(
+            f"OrganizationRepo.fetch_organizations ({name})",
+            lambda db: org_repo.fetch_organizations(db=db, limit=10, **filters),
+        )
+        await step(
+            f"OrganizationRepo.fetch_listing_versions ({name})",
+            lambda db: org_repo.fetch_listing_versions(db=db, limit=10, **filters),
+        )
+
+    await step(
+        "OrganizationRepo.fetch_version",
+        lambda db: org_repo.fetch_version(db=db, org_id=1),
+    )
+
+    await step(
+        "OrganizationRepo.fetch_organizations_by_id",
+        lambda db: org_repo.fetch_organizations_by_id(db=db, org_id=1),
+    )
+    await step(
+        "OrganizationRepo.ensure_exists",
+        lambda db: org_repo.ensure_exists(db=db, org_id=1),
+    )
+    await step(
+        "OrganizationRepo.update_organization",
+        lambda db: org_repo.update_organization(
+            db=db, id=1, usr_id=1, org=OrganizationUpdateSchema(name="Renamed")
+        ),
+    )
+
+    # Only the single tenant export; exporting every tenant reads whole
+    # tables by design.
+    async def export_one(db):
+        async for _ in tenant_exporter.lines(db, org_id=1):
+            pass
+
+    await step("TenantExporter.lines", export_one)
+
+    await step(
+        "SearchRepo.search",
+        lambda db: search_repo.search(db=db, q="plan", limit=10),
+    )
+    first_page = None
+    async with async_session_local() as db:
+        first_page = await search_repo.search(db=db, q="plan", limit=1)
+    await step(
+        "SearchRepo.search (cursor)",
+        lambda db: search_repo.search(db=db, q="plan", limit=1, cursor=first_page.next),
+    )
+
+    await step(
+        "AddressRepo.create",
+        lambda db: address_repo.create(
+            db=db, org_id=1, addr=AddressCreateSchema(city="Mumbai")
+        ),
+    )
+    await step(
+        "AddressRepo.bulk_create",
+        lambda db: address_repo.bulk_create(
+            db=db, org_id=1, rows=as_rows([{"city": "Delhi"}]), batch_size=10
+        ),
+    )
+    await step(
+        "CustomFieldRepo.create",
+        lambda db: custom_field_repo.create(
+            db=db, org_id=1, custom_field=CustomFieldCreateSchema(index=2, label="a")
+        ),
+    )
+    await step(
+        "CustomFieldRepo.bulk_create",
+        lambda db: custom_field_repo.bulk_create(
+            db=db, org_id=1, rows=as_rows([{"index": 3, "label": "b"}]), batch_size=10
+        ),
+    )
+
+    # Claims and finishes a batch of jobs, in sessions of its own.
+    async with async_session_local() as db:
+        job_queue.enqueue(db, PROVISION_DEFAULT_ORGANIZATION, {"name": "Queued Plans"})
+        await db.commit()
+    await step(
+        "JobQueue.run_once",
+        lambda db: job_queue.run_once(PROVISION_DEFAULT_ORGANIZATION),
+    )
+
+    # Writes through a session of its own, like the job queue.
+    async def rehash(db):
+        password_rehasher.schedule(1, user.password, "outdated-hash")
+        await password_rehasher.drain()
+
+    await step("PasswordRehasher.schedule", rehash)
+
+
+def sqlite_full_scans(statement: str, plan: list[tuple]) -> list[str]:
+    details = [row[-1] for row in plan]
+
+    # An unfiltered page read in index order stops after LIMIT rows; any
+    # WHERE clause could make the same scan walk the whole table.
+    bounded_in_order = (
+        re.search(r"\bLIMIT\b", statement, re.IGNORECASE)
+        and not re.search(r"\bWHERE\b", statement, re.IGNORECASE)
+        and not any("TEMP B-TREE FOR ORDER BY" in detail for detail in details)
+    )
+
+    return [
+        detail
+        for detail in details
+        if FULL_SCAN.match(detail) and not bounded_in_order
+    ]
+
+
+def postgres_full_scans(plan: Any) -> list[str]:
+    scans = []
+
+    def walk(node: dict) -> None:
+        if node.get("Node Type") == "Seq Scan":
+            scans.append(f"Seq Scan on {node.get('Relation Name')}")
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan[0]["Plan"])
+    return scans
+
+
+async def explain(recorder: StatementRecorder) -> list[str]:
+    dialect = async_engine.dialect.name
+    failures = []
+
+    async with async_engine.connect() as conn:
+        if dialect == "postgresql":
+            await conn.exec_driver_sql("SET enable_seqscan = off")
+
+        for statement, (label, parameters) in recorder.statements.items():
+            if dialect == "sqlite":
+                result = await conn.exec_driver_sql(
+                    "EXPLAIN QUERY PLAN " + statement, parameters
+                )
+                plan = result.fetchall()
+                scans = sqlite_full_scans(statement, plan)
+                summary = "; ".join(row[-1] for row in plan)
+            elif dialect == "postgresql":
+                result = await conn.exec_driver_sql(
+                    "EXPLAIN (FORMAT JSON) " + statement, parameters
+                )
+                plan = result.scalar()
+                scans = postgres_full_scans(plan)
+                summary = plan[0]["Plan"]["Node Type"]
+            else:
+                raise RuntimeError(f"EXPLAIN is not supported for {dialect}")
+
+            print(f"{'FULL SCAN' if scans else 'ok':<10}{label}")
+            print(f"{'':<10}{summary}")
+
+            for scan in scans:
+                failures.append(f"{label}: {scan}\n    {' '.join(statement.split())}")
+
+        await conn.rollback()
+
+    return failures
+
+
+async def main() -> int:
+    recorder = StatementRecorder()
+    sync_engine = async_engine.sync_engine
+
+    event.listen(sync_engine, "before_cursor_execute", recorder.on_execute)
+    try:
+        await exercise_repos(recorder)
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", recorder.on_execute)
+
+    failures = await explain(recorder)
+    await async_engine.dispose()
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    command.upgrade(Config(os.path.join(PROJECT_ROOT, "alembic.ini")), "head")
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,258 @@
+"""
+Read replicas: routing, read-your-writes, failover and query spread.
+
+    python -m benchmarks.read_replicas
+    python -m benchmarks.read_replicas --orgs 2000 --requests 500
+
+Runs against two SQLite files standing in for replicas of the benchmark
+database. They are opened read-only and "replicate" only when the benchmark
+copies the primary into them, so a replica that serves a read is visible
+by what it returns, and a write routed to one would fail.
+
+- Listings and details are timed, and the statements each request runs on
+  the primary and on the replicas are counted; reads should leave the
+  primary alone but for the token lookup, and take turns between replicas.
+- One client creates an organization through the API. It reads it back at
+  once (from the primary), while a second client, reading from a replica
+  that has not caught up, does not see it; nor does the writer once
+  READ_YOUR_WRITES_SECONDS has passed.
+- One replica's file is taken away: a probe takes it out of rotation and
+  reads carry on from the other; once it is back, a probe restores it.
+
+Exits non-zero if any of these does not hold.
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import time
+from typing import Optional
+
+from benchmarks import support  # noqa: F401  (selects the benchmark database)
+
+if os.getenv("BENCH_DATABASE_URL"):
+    sys.exit("benchmarks.read_replicas replicates by copying SQLite files; unset BENCH_DATABASE_URL")
+
+PRIMARY_PATH = os.environ["DATABASE_URL"].removeprefix("sqlite:///")
+REPLICA_PATHS = [
+    os.path.join(support.WORKDIR, f"replica-{index}.db") for index in range(2)
+]
+STICKY_SECONDS = 1.0
+
+os.environ["DATABASE_READ_URLS"] = ",".join(
+    f"sqlite:///file:{path}?mode=ro&uri=true" for path in REPLICA_PATHS
+)
+os.environ["READ_YOUR_WRITES_SECONDS"] = str(STICKY_SECONDS)
+# Probes run when the benchmark asks for them, not on a timer.
+os.environ["REPLICA_CHECK_INTERVAL_SECONDS"] = "3600"
+os.environ["ORG_CACHE_BACKEND"] = "none"
+os.environ["JOB_WORKERS"] = "0"
+
+import httpx
+from sqlalchemy import insert
+
+from app.authentication import Authenticator
+from app.db import async_engine, async_session_local, read_router
+from app.main import app
+from app.users.models import UserModel
+from benchmarks.http_suite import BENCH_PASSWORD, percentile, seed
+from benchmarks.support import QueryCounter
+
+
+def replicate() -> None:
+    """Copies the primary into every replica, like replication catching up."""
+    source = sqlite3.connect(PRIMARY_PATH)
+    try:
+        for path in REPLICA_PATHS:
+            target = sqlite3.connect(path)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+    finally:
+        source.close()
+
+
+async def token_for(client: httpx.AsyncClient, username: str) -> dict[str, str]:
+    response = await client.post(
+        "/token",
+        data={"username": username, "password": BENCH_PASSWORD},
+    )
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def bench(
+    client: httpx.AsyncClient,
+    headers: dict[str, str],
+    org_id: int,
+    requests: int,
+) -> list[str]:
+    failures = []
+
+    primary = QueryCounter()
+    primary.attach(async_engine.sync_engine)
+    replicas = []
+    for replica in read_router.replicas:
+        counter = QueryCounter()
+        counter.attach(replica.engine.sync_engine)
+        replicas.append(counter)
+
+    paths = {
+        "organizations": "/organizations?expand=addresses,custom_fields",
+        "organization": f"/organizations/{org_id}?expand=addresses,custom_fields",
+        "search": "/search?q=Bench",
+    }
+
+    print(
+        f"{'endpoint':<15}{'p50 ms':>9}{'p95 ms':>9}"
+        f"{'primary/req':>13}{'replicas/req':>14}{'spread':>12}"
+    )
+    for name, path in paths.items():
+        primary.reset()
+        for counter in replicas:
+            counter.reset()
+
+        latencies = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                failures.append(f"{name}: status {response.status_code}")
+                break
+        latencies.sort()
+
+        on_replicas = [counter.statements for counter in replicas]
+        print(
+            f"{name:<15}{percentile(latencies, 50) * 1000:>9.2f}"
+            f"{percentile(latencies, 95) * 1000:>9.2f}"
+            f"{primary.statements / requests:>13.2f}{sum(on_replicas) / requests:>14.2f}"
+            f"{'/'.join(map(str, on_replicas)):>12}"
+        )
+
+        # Only the token's user is looked up on the primary, and it is cached.
+        if primary.statements > requests:
+            failures.append(f"{name}: {primary.statements} statements on the primary")
+        if min(on_replicas) == 0:
+            failures.append(f"{name}: a replica served no reads ({on_replicas})")
+
+    return failures
+
+
+async def check_read_your_writes(
+    client: httpx.AsyncClient,
+    writer: dict[str, str],
+    reader: dict[str, str],
+) -> list[str]:
+    failures = []
+
+    response = await client.post(
+        "/organizations",
+        json={"name": "Written after replication"},
+        headers=writer,
+    )
+    response.raise_for_status()
+    path = f"/organizations/{response.json()['id']}"
+
+    expected = {"writer, at once": (writer, 200), "other client": (reader, 404)}
+    for label, (headers, status) in expected.items():
+        response = await client.get(path, headers=headers)
+        print(f"{label}: GET {path} -> {response.status_code}")
+        if response.status_code != status:
+            failures.append(f"{label}: status {response.status_code}, expected {status}")
+
+    await asyncio.sleep(STICKY_SECONDS * 1.2)
+    response = await client.get(path, headers=writer)
+    print(f"writer, after {STICKY_SECONDS}s: GET {path} -> {response.status_code}")
+    if response.status_code != 404:
+        failures.append(f"writer still on the primary after {STICKY_SECONDS}s")
+
+    replicate()
+    response = await client.get(path, headers=reader)
+    print(f"other client, once replicated: GET {path} -> {response.status_code}")
+    if response.status_code != 200:
+        failures.append(f"replicated organization: status {response.status_code}")
+
+    return failures
+
+
+async def check_failover(client: httpx.AsyncClient, headers: dict[str, str]) -> list[str]:
+    failures = []
+    down = read_router.replicas[1]
+    moved = REPLICA_PATHS[1] + ".away"
+
+    os.rename(REPLICA_PATHS[1], moved)
+    await down.engine.dispose()
+    await read_router.check()
+    print(f"{down.name} taken away: healthy={down.healthy} ({down.last_error})")
+    if down.healthy:
+        failures.append(f"{down.name} stayed in rotation without its file")
+
+    reads = down.reads
+    for _ in range(10):
+        response = await client.get("/organizations", headers=headers)
+        if response.status_code != 200:
+            failures.append(f"listing with {down.name} down: status {response.status_code}")
+            break
+    if down.reads != reads:
+        failures.append(f"{down.name} was picked while down")
+
+    os.rename(moved, REPLICA_PATHS[1])
+    await read_router.check()
+    print(f"{down.name} back: healthy={down.healthy}")
+    if not down.healthy:
+        failures.append(f"{down.name} did not rejoin the rotation")
+
+    return failures
+
+
+async def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--orgs", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    # Runs the app's own startup, which also creates the schema.
+    async with app.router.lifespan_context(app):
+        username, org_ids = await seed(args.orgs, addresses=3, custom_fields=3)
+
+        async with async_session_local() as db:
+            await db.execute(
+                insert(UserModel),
+                [
+                    {
+                        "username": "replica-reader",
+                        "email": "replica-reader@example.com",
+                        "password": Authenticator.get_password_hash(BENCH_PASSWORD),
+                        "first_name": "Replica",
+                        "last_name": "Reader",
+                    }
+                ],
+            )
+            await db.commit()
+
+        replicate()
+        await read_router.check()
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            writer = await token_for(client, username)
+            reader = await token_for(client, "replica-reader")
+
+            failures = await bench(client, reader, org_ids[0], args.requests)
+            failures.extend(await check_read_your_writes(client, writer, reader))
+            failures.extend(await check_failover(client, reader))
+
+        print(f"router: {read_router.stats()}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
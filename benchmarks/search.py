@@ -0,0 +1,191 @@
+"""
+Latency of GET /search against a large organizations table.
+
+    python -m benchmarks.search
+    python -m benchmarks.search --orgs 1000000 --requests 50
+
+Seeds --orgs organizations and --users users with generated names, portal
+names and emails, then times a set of searches through the ASGI app. The
+queries range from one exact row to a word that a twentieth of all rows
+contain. Each query reports how many rows matched and its p50/p95 latency
+for a first page and for the page after it.
+
+Exits non-zero if any query's p95 exceeds --max-p95-ms.
+"""
+
+import argparse
+import asyncio
+import itertools
+import sys
+import time
+from typing import Optional
+
+from benchmarks import support  # noqa: F401  (selects the benchmark database)
+
+import httpx
+from sqlalchemy import insert
+
+from app.authentication import Authenticator
+from app.db import async_engine, async_session_local, create_schema
+from app.main import app
+from app.organizations.models import OrganizationModel
+from app.users.models import UserModel
+from benchmarks.http_suite import percentile
+
+SEED_BATCH_SIZE = 5000
+
+PREFIXES = ["North", "Blue", "Silver", "Bright", "Grand", "Pioneer", "Summit", "Harbor"]
+SECTORS = [
+    "Logistics", "Foods", "Textiles", "Motors", "Pharma", "Systems", "Traders",
+    "Builders", "Energy", "Media", "Farms", "Labs", "Works", "Holdings",
+    "Ventures", "Metals", "Plastics", "Imports", "Exports", "Retail",
+]
+DOMAINS = ["example.com", "example.org", "example.net", "mail.example"]
+
+
+def org_row(i: int) -> dict:
+    prefix = PREFIXES[i % len(PREFIXES)]
+    sector = SECTORS[(i // len(PREFIXES)) % len(SECTORS)]
+    return {
+        "name": f"{prefix} {sector} {i}",
+        "portal_name": f"{prefix.lower()}-{sector.lower()}-{i}",
+        "email": f"accounts{i}@{DOMAINS[i % len(DOMAINS)]}",
+    }
+
+
+async def seed(orgs: int, users: int) -> None:
+    async with async_session_local() as db:
+        for start in range(0, orgs, SEED_BATCH_SIZE):
+            await db.execute(
+                insert(OrganizationModel),
+                [org_row(i) for i in range(start, min(start + SEED_BATCH_SIZE, orgs))],
+            )
+        for start in range(0, users, SEED_BATCH_SIZE):
+            await db.execute(
+                insert(UserModel),
+                [
+                    {
+                        "username": f"user{i}",
+                        "email": f"user{i}@{DOMAINS[i % len(DOMAINS)]}",
+                        "password": "not-a-hash",
+                    }
+                    for i in range(start, min(start + SEED_BATCH_SIZE, users))
+                ],
+            )
+        await db.commit()
+
+
+def queries(orgs: int, users: int) -> dict[str, str]:
+    middle = orgs // 2
+    return {
+        "exact name": org_row(middle)["name"],
+        "portal prefix": org_row(middle)["portal_name"][:-1],
+        "email": f"accounts{middle}@",
+        "username": f"user{users // 2}",
+        "rare substring": f"s {middle}",
+        "name prefix (1/8 rows)": PREFIXES[0],
+        "sector word (1/20 rows)": "Logistics",
+    }
+
+
+async def time_query(
+    client: httpx.AsyncClient,
+    q: str,
+    requests: int,
+) -> tuple[int, list[float], list[float]]:
+    def token() -> dict[str, str]:
+        tokens = Authenticator().create_tokens(data={"sub": "bench"})
+        return {"Authorization": f"Bearer {tokens['access']}"}
+
+    headers = token()
+    first_page: list[float] = []
+    next_page: list[float] = []
+    matched = 0
+
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = await client.get("/search", params={"q": q}, headers=headers)
+        first_page.append(time.perf_counter() - started)
+        response.raise_for_status()
+        page = response.json()
+
+        if page["next"] is not None:
+            started = time.perf_counter()
+            response = await client.get(
+                "/search",
+                params={"q": q, "cursor": page["next"]},
+                headers=headers,
+            )
+            next_page.append(time.perf_counter() - started)
+            response.raise_for_status()
+
+    # Counted once, outside the timings.
+    cursor = None
+    for count in itertools.count():
+        response = await client.get(
+            "/search",
+            params={"q": q, "limit": 100, **({"cursor": cursor} if cursor else {})},
+            headers=headers,
+        )
+        page = response.json()
+        matched += len(page["items"])
+        cursor = page["next"]
+        if cursor is None or count >= 10:
+            break
+
+    return matched, sorted(first_page), sorted(next_page)
+
+
+async def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--orgs", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--max-p95-ms", type=float, default=100.0)
+    args = parser.parse_args(argv)
+
+    await create_schema()
+
+    started = time.perf_counter()
+    await seed(args.orgs, args.users)
+    print(
+        f"seeded {args.orgs} organizations and {args.users} users "
+        f"in {time.perf_counter() - started:.1f} s"
+    )
+
+    failures = []
+
+    print(f"{'query':<26}{'matched':>9}{'p50 ms':>9}{'p95 ms':>9}{'next p50':>10}{'next p95':>10}")
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            # The token's user must exist for the route to resolve it.
+            async with async_session_local() as db:
+                await db.execute(
+                    insert(UserModel),
+                    [{"username": "bench", "email": "bench@bench.test", "password": "-"}],
+                )
+                await db.commit()
+
+            for name, q in queries(args.orgs, args.users).items():
+                matched, first, after = await time_query(client, q, args.requests)
+                p95 = percentile(first, 95) * 1000
+                print(
+                    f"{name:<26}{matched if matched < 1100 else '>1100':>9}"
+                    f"{percentile(first, 50) * 1000:>9.2f}{p95:>9.2f}"
+                    f"{percentile(after, 50) * 1000:>10.2f}{percentile(after, 95) * 1000:>10.2f}"
+                )
+                if p95 > args.max_p95_ms:
+                    failures.append(f"{name}: p95 {p95:.1f} ms")
+
+    await async_engine.dispose()
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,175 @@
+"""
+CPU cost of returning organization listings, per request.
+
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --sizes 50,500 --requests 200
+
+The same OrganizationPageSchema is served from two routers, one on the
+default APIRoute and one on ValidatedResponseRoute. CPU time per request is
+measured end to end through the ASGI app. It also times building the page
+from ORM rows with model_validate against OrganizationRepo's model_construct
+path. Exits non-zero if the validated route is not cheaper.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import sys
+import time
+from types import SimpleNamespace
+from typing import Callable, Optional
+
+from benchmarks import support  # noqa: F401  (selects the benchmark database)
+
+from fastapi import APIRouter, FastAPI
+import httpx
+
+from app.organizations.fieldsets import ORGANIZATION_FIELDS, ORGANIZATION_RELATIONSHIPS
+from app.organizations.repo import OrganizationRepo
+from app.organizations.schemas import (
+    OrganizationPageSchema,
+    OutputOrganizationModelSchema,
+)
+from app.responses import ValidatedResponseRoute
+
+CHILDREN_PER_ORG = 3
+
+
+def orm_rows(size: int) -> list[SimpleNamespace]:
+    """Stand-ins for loaded OrganizationModel rows with their relationships."""
+    now = datetime.datetime.now()
+    rows = []
+    for i in range(size):
+        row = SimpleNamespace(**{name: None for name in ORGANIZATION_FIELDS})
+        row.id = i + 1
+        row.name = f"Org {i}"
+        row.currency_code = "INR"
+        row.account_created_date = now
+        row.is_org_active = True
+        row.email = f"org{i}@example.com"
+        row.addresses = [
+            SimpleNamespace(
+                street_address1="1 Main St",
+                street_address2=None,
+                city="Pune",
+                state="MH",
+                country="IN",
+                zip=f"{j:06d}",
+            )
+            for j in range(CHILDREN_PER_ORG)
+        ]
+        row.custom_fields = [
+            SimpleNamespace(index=j, label=f"field {j}", value="value")
+            for j in range(CHILDREN_PER_ORG)
+        ]
+        rows.append(row)
+    return rows
+
+
+def validated_output(row: SimpleNamespace) -> OutputOrganizationModelSchema:
+    data = {name: getattr(row, name) for name in ORGANIZATION_FIELDS}
+    for name in ORGANIZATION_RELATIONSHIPS:
+        data[name] = getattr(row, name)
+    return OutputOrganizationModelSchema.model_validate(data, from_attributes=True)
+
+
+def cpu_ms(fn: Callable[[], object], repeat: int) -> float:
+    fn()
+    started = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - started) / repeat * 1000
+
+
+def build_app(page: OrganizationPageSchema) -> FastAPI:
+    app = FastAPI()
+
+    routers = {
+        "/default": APIRouter(),
+        "/validated": APIRouter(route_class=ValidatedResponseRoute),
+    }
+
+    for prefix, router in routers.items():
+
+        @router.get(
+            "/organizations",
+            response_model=OrganizationPageSchema,
+            response_model_exclude_unset=True,
+        )
+        async def fetch_organizations():
+            return page
+
+        app.include_router(router, prefix=prefix)
+
+    return app
+
+
+async def request_cpu_ms(app: FastAPI, path: str, requests: int) -> tuple[float, bytes]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        body = (await client.get(path)).content
+
+        started = time.process_time()
+        for _ in range(requests):
+            await client.get(path)
+        elapsed = time.process_time() - started
+
+    return elapsed / requests * 1000, body
+
+
+async def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--sizes", default="50,500")
+    parser.add_argument("--requests", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    failures = []
+
+    print(f"{'orgs':>6}{'validate ms':>14}{'construct ms':>14}"
+          f"{'default ms':>13}{'validated ms':>14}{'saved':>8}")
+
+    for size in (int(s) for s in args.sizes.split(",")):
+        rows = orm_rows(size)
+        repeat = max(1, args.requests // 4)
+
+        validate = cpu_ms(lambda: [validated_output(r) for r in rows], repeat)
+        construct = cpu_ms(
+            lambda: [
+                OrganizationRepo._to_output(r, None, ORGANIZATION_RELATIONSHIPS)
+                for r in rows
+            ],
+            repeat,
+        )
+
+        page = OrganizationPageSchema(
+            items=[
+                OrganizationRepo._to_output(r, None, ORGANIZATION_RELATIONSHIPS)
+                for r in rows
+            ],
+        )
+        app = build_app(page)
+        default, default_body = await request_cpu_ms(
+            app, "/default/organizations", args.requests
+        )
+        fast, fast_body = await request_cpu_ms(
+            app, "/validated/organizations", args.requests
+        )
+
+        saved = 1 - fast / default
+        print(f"{size:>6}{validate:>14.2f}{construct:>14.2f}"
+              f"{default:>13.2f}{fast:>14.2f}{saved:>8.0%}")
+
+        if json.loads(default_body) != json.loads(fast_body):
+            failures.append(f"{size} orgs: response bodies differ")
+        if fast >= default:
+            failures.append(f"{size} orgs: validated route is not cheaper")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,123 @@
+"""
+Reports what a fresh worker spends its time on before serving a request.
+
+    python -m benchmarks.startup_profile
+    python -m benchmarks.startup_profile --runs 10 --top 30
+
+Each run starts a new interpreter, as a uvicorn worker would. It reports:
+
+- time to import app.main
+- time to run the lifespan startup
+- time to answer a first GET /
+- the median of those over --runs
+- the modules with the largest cumulative import time, from `python -X importtime`
+
+SCHEMA_MANAGEMENT and the other settings are taken from the environment, so
+startup modes can be compared directly.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Optional
+
+from benchmarks import support  # noqa: F401  (selects the benchmark database)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; prints one JSON line of timings in seconds.
+FIRST_REQUEST_PROBE = """
+import time
+started = time.perf_counter()
+
+import asyncio, json
+import httpx
+from app.main import app
+imported = time.perf_counter()
+
+async def probe():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://probe") as c:
+            response = await c.get("/")
+            response.raise_for_status()
+        answered = time.perf_counter()
+    return ready, answered
+
+ready, answered = asyncio.run(probe())
+print(json.dumps({
+    "import": imported - started,
+    "startup": ready - imported,
+    "first_request": answered - ready,
+    "total": answered - started,
+}))
+"""
+
+
+def run_child(args: list[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=PROJECT_ROOT,
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def measure_first_request(runs: int) -> dict[str, float]:
+    samples: dict[str, list[float]] = {}
+    for _ in range(runs):
+        output = run_child(["-c", FIRST_REQUEST_PROBE]).stdout
+        timings = json.loads(output.splitlines()[-1])
+        for key, value in timings.items():
+            samples.setdefault(key, []).append(value)
+
+    return {key: statistics.median(values) for key, values in samples.items()}
+
+
+def profile_imports() -> list[tuple[str, int, int]]:
+    """Returns (module, self us, cumulative us) for every import of app.main."""
+    stderr = run_child(["-X", "importtime", "-c", "import app.main"]).stderr
+
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(own), int(cumulative)))
+
+    return modules
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    timings = measure_first_request(args.runs)
+    print(f"median of {args.runs} fresh workers:")
+    for key in ("import", "startup", "first_request", "total"):
+        print(f"  {key:<14}{timings[key] * 1000:>9.1f} ms")
+
+    modules = profile_imports()
+    app_modules = [m for m in modules if m[0] == "app" or m[0].startswith("app.")]
+
+    print(f"\nslowest imports (cumulative, top {args.top}):")
+    for name, own, cumulative in sorted(modules, key=lambda m: -m[2])[: args.top]:
+        print(f"  {cumulative / 1000:>9.1f} ms  {own / 1000:>9.1f} ms self  {name}")
+
+    print("\napp modules by self time:")
+    for name, own, cumulative in sorted(app_modules, key=lambda m: -m[1]):
+        print(f"  {own / 1000:>9.1f} ms self  {name}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+"""
+Shared setup for the benchmarks.
+
+Importing this module points the app at a throwaway SQLite database (or at
+BENCH_DATABASE_URL when set) and gives it a signing key when there is no
+.env, so it must be imported before anything from app/.
+"""
+
+import os
+import tempfile
+
+WORKDIR = tempfile.mkdtemp(prefix="riffraff-bench-")
+
+os.environ["DATABASE_URL"] = os.getenv(
+    "BENCH_DATABASE_URL",
+    f"sqlite:///{os.path.join(WORKDIR, 'bench.db')}",
+)
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+
+class QueryCounter:
+    """Counts statements and commits seen by an engine's event hooks."""
+
+    def __init__(self) -> None:
+        self.statements = 0
+        self.commits = 0
+
+    def reset(self) -> None:
+        self.statements = 0
+        self.commits = 0
+
+    def on_execute(self, *args) -> None:
+        self.statements += 1
+
+    def on_commit(self, *args) -> None:
+        self.commits += 1
+
+    def attach(self, engine) -> None:
+        from sqlalchemy import event
+
+        event.listen(engine, "before_cursor_execute", self.on_execute)
+        event.listen(engine, "commit", self.on_commit)
@@ -0,0 +1,255 @@
+"""
+Streaming tenant export: memory, throughput and an import round trip.
+
+    python -m benchmarks.tenant_export
+    python -m benchmarks.tenant_export --rows 50000,200000
+
+Creates one organization per --rows value, each with that many addresses
+and as many custom fields, and streams its export:
+
+- once under tracemalloc, reporting the peak Python memory the export held.
+  It should not grow with the size of the tenant.
+- once for throughput, plain and gzipped.
+
+Then it goes through the API: the smallest tenant is exported over HTTP,
+gzipped, and posted back to POST /organizations/import. The copy is
+exported again and compared record by record, ids aside. GET
+/organizations/export is also checked to refuse users without the admin
+role.
+
+Exits non-zero if memory grows with the tenant, or the round trip or the
+admin check fails.
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Optional
+
+from benchmarks import support  # noqa: F401  (selects the benchmark database)
+
+# Nothing here queues jobs, and idle workers would show up in the memory trace.
+os.environ["JOB_WORKERS"] = "0"
+
+import httpx
+from sqlalchemy import func, insert, select
+
+from app.addresses.models import AddressModel
+from app.authentication import Authenticator
+from app.db import async_session_local
+from app.main import app
+from app.models import CustomFieldModel
+from app.organizations.export import tenant_exporter
+from app.organizations.models import OrganizationModel
+from app.users.models import UserModel
+from benchmarks.http_suite import BENCH_PASSWORD, seed
+
+SEED_BATCH_SIZE = 5000
+
+# Peak memory may vary this much between tenant sizes and still count as flat.
+MEMORY_TOLERANCE = 1.5
+
+
+async def seed_tenant(rows: int) -> int:
+    async with async_session_local() as db:
+        result = await db.execute(
+            insert(OrganizationModel).returning(OrganizationModel.id),
+            [{"name": f"Tenant of {rows}", "email": "tenant@example.com"}],
+        )
+        org_id = result.scalar_one()
+
+        for start in range(0, rows, SEED_BATCH_SIZE):
+            count = min(SEED_BATCH_SIZE, rows - start)
+            await db.execute(
+                insert(AddressModel),
+                [
+                    {
+                        "organization_id": org_id,
+                        "street_address1": f"{start + i} Export Lane",
+                        "city": "Pune",
+                        "zip": f"{start + i:06d}",
+                    }
+                    for i in range(count)
+                ],
+            )
+            await db.execute(
+                insert(CustomFieldModel),
+                [
+                    {
+                        "organization_id": org_id,
+                        "index": start + i,
+                        "label": f"field {start + i}",
+                        "value": "value",
+                    }
+                    for i in range(count)
+                ],
+            )
+
+        await db.commit()
+
+    return org_id
+
+
+async def drain(org_id: Optional[int], compress: bool) -> int:
+    size = 0
+    async for chunk in tenant_exporter.stream(org_id, compress):
+        size += len(chunk)
+    return size
+
+
+async def peak_memory(org_id: int) -> int:
+    tracemalloc.start()
+    try:
+        await drain(org_id, compress=False)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def normalized(body: bytes) -> list[dict]:
+    records = []
+    for line in body.splitlines():
+        record = json.loads(line)
+        record.pop("id")
+        record.pop("organization_id", None)
+        records.append(record)
+    return records
+
+
+async def token_for(client: httpx.AsyncClient, username: str) -> dict[str, str]:
+    response = await client.post(
+        "/token",
+        data={"username": username, "password": BENCH_PASSWORD},
+    )
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def check_api(admin_username: str, org_id: int) -> list[str]:
+    failures = []
+
+    async with async_session_local() as db:
+        await db.execute(
+            insert(UserModel),
+            [
+                {
+                    "username": "export-viewer",
+                    "email": "export-viewer@example.com",
+                    "password": Authenticator.get_password_hash(BENCH_PASSWORD),
+                    "first_name": "Export",
+                    "last_name": "Viewer",
+                    "role": "viewer",
+                }
+            ],
+        )
+        await db.commit()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        headers = await token_for(client, admin_username)
+
+        response = await client.get(
+            f"/organizations/{org_id}/export",
+            headers={**headers, "Accept-Encoding": "gzip"},
+        )
+        response.raise_for_status()
+        if response.headers.get("content-encoding") != "gzip":
+            failures.append("export ignored Accept-Encoding: gzip")
+        exported = response.content
+
+        async with async_session_local() as db:
+            last_id = (await db.execute(select(func.max(OrganizationModel.id)))).scalar()
+
+        response = await client.post(
+            "/organizations/import",
+            content=gzip.compress(exported),
+            headers={
+                **headers,
+                "Content-Type": "application/x-ndjson",
+                "Content-Encoding": "gzip",
+            },
+        )
+        response.raise_for_status()
+        imported = response.json()
+        print(
+            f"import: {imported['organizations']} organizations, "
+            f"{imported['addresses']} addresses, {imported['custom_fields']} custom fields, "
+            f"{imported['failed']} failed"
+        )
+        if imported["failed"]:
+            failures.append(f"import failed {imported['failed']} rows: {imported['errors'][:3]}")
+
+        response = await client.get(f"/organizations/{last_id + 1}/export", headers=headers)
+        if response.status_code != 200:
+            failures.append(f"imported organization export: status {response.status_code}")
+        elif normalized(response.content) != normalized(exported):
+            failures.append("re-exported tenant differs from the original export")
+        else:
+            print(f"round trip: {len(exported.splitlines())} records identical")
+
+        response = await client.get("/organizations/export", headers=headers)
+        if response.status_code != 200:
+            failures.append(f"admin export: status {response.status_code}")
+
+        viewer = await token_for(client, "export-viewer")
+        response = await client.get("/organizations/export", headers=viewer)
+        if response.status_code != 403:
+            failures.append(f"non-admin export: status {response.status_code}, expected 403")
+
+    return failures
+
+
+async def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--rows", default="20000,80000")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.rows.split(",")]
+    failures = []
+
+    # Runs the app's own startup, which also creates the schema.
+    async with app.router.lifespan_context(app):
+        username, _ = await seed(orgs=10, addresses=2, custom_fields=2)
+        tenants = {size: await seed_tenant(size) for size in sizes}
+
+        print(
+            f"{'rows':>9}{'records':>9}{'peak MiB':>10}{'seconds':>9}"
+            f"{'records/s':>11}{'MiB':>8}{'gzip MiB':>10}"
+        )
+        peaks = {}
+        for size, org_id in tenants.items():
+            peaks[size] = await peak_memory(org_id)
+
+            started = time.perf_counter()
+            plain = await drain(org_id, compress=False)
+            seconds = time.perf_counter() - started
+            compressed = await drain(org_id, compress=True)
+
+            records = 1 + 2 * size
+            print(
+                f"{size:>9}{records:>9}{peaks[size] / 2**20:>10.2f}{seconds:>9.2f}"
+                f"{records / seconds:>11.0f}{plain / 2**20:>8.1f}{compressed / 2**20:>10.1f}"
+            )
+
+        smallest, largest = min(peaks), max(peaks)
+        if peaks[largest] > peaks[smallest] * MEMORY_TOLERANCE:
+            failures.append(
+                f"peak memory grew from {peaks[smallest] / 2**20:.2f} MiB at {smallest} rows "
+                f"to {peaks[largest] / 2**20:.2f} MiB at {largest} rows"
+            )
+
+        failures.extend(await check_api(username, tenants[smallest]))
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,126 @@
+"""
+Bulk user import throughput compared with creating users one at a time.
+
+    python -m benchmarks.user_import
+    python -m benchmarks.user_import --users 2000 --workers 1,4,8
+
+Creates --serial users through UserRepo.create, the path behind POST /users,
+which hashes each password and commits each user alone. Then it writes
+--users users to a CSV file and imports it with each --workers count,
+through the same code as `python -m app.users import`.
+
+Reports users/s and the time 100k users would take at that rate. bcrypt
+dominates both paths, so the bulk import scales with the cores it is given;
+"hash wait" is the part of the import spent waiting for hashes.
+
+Exits non-zero if an import does not insert every user.
+"""
+
+import argparse
+import asyncio
+import csv
+import os
+import sys
+import time
+from typing import Optional
+
+from benchmarks import support  # noqa: F401  (selects the benchmark database)
+
+from sqlalchemy import delete
+
+from app.bulk import iter_file_rows
+from app.db import async_engine, async_session_local, create_schema
+from app.users.importer import UserImporter
+from app.users.models import UserModel
+from app.users.repo import UserRepo
+from app.users.schemas import InputUserModelSchema
+
+PROJECTED_USERS = 100_000
+
+
+def user_row(prefix: str, i: int) -> dict:
+    return {
+        "username": f"{prefix}{i}",
+        "email": f"{prefix}{i}@example.com",
+        "first_name": "Imported",
+        "last_name": str(i),
+        "password": f"password-{i}",
+    }
+
+
+def projected(users_per_second: float) -> str:
+    seconds = PROJECTED_USERS / users_per_second
+    return f"{seconds / 3600:.1f} h" if seconds >= 3600 else f"{seconds / 60:.1f} min"
+
+
+async def reset_users() -> None:
+    async with async_session_local() as db:
+        await db.execute(delete(UserModel))
+        await db.commit()
+
+
+async def bench_serial(users: int) -> float:
+    repo = UserRepo()
+    started = time.perf_counter()
+    for i in range(users):
+        async with async_session_local() as db:
+            await repo.create(db=db, user=InputUserModelSchema(**user_row("serial", i)))
+    return users / (time.perf_counter() - started)
+
+
+async def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--serial", type=int, default=20)
+    parser.add_argument("--workers", default=str(os.cpu_count() or 1))
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    await create_schema()
+
+    path = os.path.join(support.WORKDIR, "users.csv")
+    with open(path, "w", newline="") as target:
+        writer = csv.DictWriter(target, fieldnames=list(user_row("", 0)))
+        writer.writeheader()
+        writer.writerows(user_row("bulk", i) for i in range(args.users))
+
+    failures = []
+
+    print(f"{'path':<24}{'users':>7}{'users/s':>10}{'hash wait':>11}{'100k users':>12}")
+
+    rate = await bench_serial(args.serial)
+    print(f"{'one at a time':<24}{args.serial:>7}{rate:>10.1f}{'':>11}{projected(rate):>12}")
+
+    for workers in [int(count) for count in args.workers.split(",")]:
+        await reset_users()
+
+        importer = UserImporter(workers=workers)
+        try:
+            async with async_session_local() as db:
+                result = await importer.run(
+                    db=db,
+                    rows=iter_file_rows(path),
+                    batch_size=args.batch_size,
+                )
+        finally:
+            importer.shutdown()
+
+        label = f"bulk, {workers} worker{'s' if workers > 1 else ''}"
+        print(
+            f"{label:<24}{result.inserted:>7}{result.users_per_second:>10.1f}"
+            f"{result.hash_wait_seconds / result.elapsed_seconds:>10.0%} "
+            f"{projected(result.users_per_second):>12}"
+        )
+        if result.inserted != args.users:
+            failures.append(f"{workers} workers: inserted {result.inserted} of {args.users}")
+
+    await async_engine.dispose()
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
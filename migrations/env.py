@@ -0,0 +1,90 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from app.db import Base
+from app.settings import get_settings
+
+# Every model module must be imported so its tables are on Base.metadata.
+import app.models  # noqa: F401
+import app.addresses.models  # noqa: F401
+import app.jobs.models  # noqa: F401
+import app.organizations.models  # noqa: F401
+import app.search.models  # noqa: F401
+import app.users.models  # noqa: F401
+from app.search.models import SEARCH_COLUMNS, search_table_name
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+database_url = get_settings().database_url
+
+# On SQLite each search table is an FTS5 virtual table plus the shadow
+# tables FTS5 keeps its index in, all created by raw DDL and so missing
+# from the metadata.
+FTS5_SHADOW_SUFFIXES = ("", "_data", "_idx", "_docsize", "_config", "_content")
+SEARCH_TABLES = {
+    search_table_name(table) + suffix
+    for table in SEARCH_COLUMNS
+    for suffix in FTS5_SHADOW_SUFFIXES
+}
+# In the metadata, but only ever created on Postgres.
+TRIGRAM_INDEXES = {
+    f"ix_{table}_{column}_trgm"
+    for table, columns in SEARCH_COLUMNS.items()
+    for column in columns
+}
+
+
+def include_object_for(dialect: str):
+    """Keeps autogenerate from dropping or adding the search indexes."""
+
+    def include_object(object, name, type_, reflected, compare_to) -> bool:
+        if type_ == "table" and name in SEARCH_TABLES:
+            return False
+        if type_ == "index" and name in TRIGRAM_INDEXES and dialect != "postgresql":
+            return False
+        return True
+
+    return include_object
+
+
+def run_migrations_offline() -> None:
+    """Emits the migration SQL to stdout instead of running it."""
+    context.configure(
+        url=database_url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=True,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connectable = create_engine(database_url, poolclass=pool.NullPool)
+
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object_for(connection.dialect.name),
+            # SQLite cannot ALTER most constraints in place.
+            render_as_batch=True,
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,45 @@
+"""index child foreign keys
+
+Every relationship load filters addresses and custom fields by
+organization_id, which had no index.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 07:05:00.814860
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps the tables writable on Postgres while the index
+    # builds; it cannot run inside a transaction. Other dialects ignore it.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_addresses_organization_id',
+            'addresses',
+            ['organization_id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_custom_fields_organization_id',
+            'custom_fields',
+            ['organization_id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_custom_fields_organization_id', table_name='custom_fields')
+    op.drop_index('ix_addresses_organization_id', table_name='addresses')
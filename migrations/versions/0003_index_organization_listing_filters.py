@@ -0,0 +1,45 @@
+"""index organization listing filters
+
+OrganizationRepo.fetch_organizations filters on is_org_active,
+industry_type or currency_code and pages by id. Each index leads with the
+filter column and ends with id, so a filtered page is a bounded index range
+scan already in keyset order.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 07:06:12.402187
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    'ix_organizations_is_org_active_id': ['is_org_active', 'id'],
+    'ix_organizations_industry_type_id': ['industry_type', 'id'],
+    'ix_organizations_currency_code_id': ['currency_code', 'id'],
+}
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.create_index(
+                name,
+                'organizations',
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    for name in reversed(INDEXES):
+        op.drop_index(name, table_name='organizations')
@@ -0,0 +1,125 @@
+"""search indexes for organizations and users
+
+GET /search finds text anywhere in an organization's name, portal_name or
+email, or a user's username or email.
+
+- SQLite: an external-content FTS5 table per searched table, using the
+  trigram tokenizer, with triggers that keep it in sync.
+- Postgres: a pg_trgm GIN index on every searched column.
+- Both: an index on lower(column) for every searched column, for exact
+  matches, and on Postgres also for prefix matches.
+
+Batch migrations on SQLite recreate a table and drop its triggers, so any
+later batch alteration of these tables must recreate the triggers.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 07:24:41.530912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = {
+    'organizations': ('name', 'portal_name', 'email'),
+    'user_accounts': ('username', 'email'),
+}
+
+
+def sqlite_upgrade(table: str, columns: Sequence[str]) -> None:
+    search_table = f'{table}_search'
+    names = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+
+    insert_new = (
+        f'INSERT INTO {search_table}(rowid, {names}) VALUES (new.id, {new_values});'
+    )
+    delete_old = (
+        f'INSERT INTO {search_table}({search_table}, rowid, {names}) '
+        f"VALUES ('delete', old.id, {old_values});"
+    )
+
+    op.execute(
+        f'CREATE VIRTUAL TABLE {search_table} USING fts5({names}, '
+        f"content='{table}', content_rowid='id', tokenize='trigram')"
+    )
+    op.execute(
+        f'CREATE TRIGGER {search_table}_insert AFTER INSERT ON {table} '
+        f'BEGIN {insert_new} END'
+    )
+    op.execute(
+        f'CREATE TRIGGER {search_table}_delete AFTER DELETE ON {table} '
+        f'BEGIN {delete_old} END'
+    )
+    op.execute(
+        f'CREATE TRIGGER {search_table}_update AFTER UPDATE OF {names} ON {table} '
+        f'BEGIN {delete_old} {insert_new} END'
+    )
+    op.execute(f"INSERT INTO {search_table}({search_table}) VALUES ('rebuild')")
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        for table, columns in SEARCH_COLUMNS.items():
+            sqlite_upgrade(table, columns)
+            for column in columns:
+                op.create_index(
+                    f'ix_{table}_{column}_lower',
+                    table,
+                    [sa.text(f'lower({column})')],
+                    unique=False,
+                )
+
+    elif dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        with op.get_context().autocommit_block():
+            for table, columns in SEARCH_COLUMNS.items():
+                for column in columns:
+                    op.create_index(
+                        f'ix_{table}_{column}_lower',
+                        table,
+                        [sa.text(f'lower({column}) text_pattern_ops')],
+                        unique=False,
+                        postgresql_concurrently=True,
+                    )
+                    op.create_index(
+                        f'ix_{table}_{column}_trgm',
+                        table,
+                        [column],
+                        unique=False,
+                        postgresql_using='gin',
+                        postgresql_ops={column: 'gin_trgm_ops'},
+                        postgresql_concurrently=True,
+                    )
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+
+    for table, columns in reversed(SEARCH_COLUMNS.items()):
+        for column in reversed(columns):
+            op.drop_index(f'ix_{table}_{column}_lower', table_name=table)
+
+    if dialect == 'sqlite':
+        for table in reversed(SEARCH_COLUMNS):
+            # Dropping the FTS table leaves triggers that write to it.
+            for trigger in ('update', 'delete', 'insert'):
+                op.execute(f'DROP TRIGGER IF EXISTS {table}_search_{trigger}')
+            op.execute(f'DROP TABLE IF EXISTS {table}_search')
+
+    elif dialect == 'postgresql':
+        for table, columns in reversed(SEARCH_COLUMNS.items()):
+            for column in reversed(columns):
+                op.drop_index(f'ix_{table}_{column}_trgm', table_name=table)
@@ -0,0 +1,38 @@
+"""version and updated_at on organizations
+
+Repos bump an organization's version on every write to it or to its
+addresses and custom fields, so those need no version of their own;
+conditional GETs read only that column to answer If-None-Match.
+Plain ADD COLUMN keeps the search triggers from 0004 in place.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 10:41:37.225906
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    op.add_column(
+        'organizations',
+        sa.Column('version', sa.Integer(), server_default='1', nullable=False),
+    )
+    # SQLite cannot add a column defaulting to CURRENT_TIMESTAMP, so
+    # existing rows are stamped separately.
+    op.add_column('organizations', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute('UPDATE organizations SET updated_at = CURRENT_TIMESTAMP')
+
+
+def downgrade() -> None:
+    op.drop_column('organizations', 'updated_at')
+    op.drop_column('organizations', 'version')
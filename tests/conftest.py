@@ -0,0 +1,13 @@
+"""
+Settings shared by every test, applied before any test module imports app.
+"""
+
+import os
+
+from benchmarks import support  # noqa: F401  (selects the test database)
+
+# Query counts cover the reads themselves; with the organization cache on,
+# the version lookup that keys it adds a query.
+os.environ["ORG_CACHE_BACKEND"] = "none"
+# Nothing here runs the job queue.
+os.environ["JOB_WORKERS"] = "0"
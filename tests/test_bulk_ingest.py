@@ -0,0 +1,132 @@
+"""
+Bulk ingestion reports every bad row by its number and still inserts the
+rest, for NDJSON and CSV bodies alike.
+"""
+
+import asyncio
+import gzip
+
+import httpx
+import pytest
+
+from app.db import Base, async_engine, async_session_local, engine
+from app.main import app
+from app.organizations.repo import OrganizationRepo
+from app.organizations.schemas import OrganizationCreateSchema
+
+repo = OrganizationRepo()
+
+
+def run(coro):
+    async def run_and_dispose():
+        try:
+            return await coro
+        finally:
+            # Pooled connections belong to this event loop.
+            await async_engine.dispose()
+
+    return asyncio.run(run_and_dispose())
+
+
+@pytest.fixture
+def org_id() -> int:
+    Base.metadata.create_all(bind=engine)
+
+    async def create() -> int:
+        async with async_session_local() as db:
+            org = await repo.create(db=db, org=OrganizationCreateSchema(name="Bulk"))
+            return org.id
+
+    return run(create())
+
+
+def post_then_get(path: str, body: bytes, headers: dict[str, str], listing: str):
+    """The bulk response and the records listed afterwards."""
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            auth = {"Authorization": "Bearer any"}
+            posted = await client.post(path, content=body, headers={**auth, **headers})
+            listed = await client.get(listing, headers=auth)
+            return posted, listed.json()
+
+    return run(scenario())
+
+
+def error_rows(result: dict) -> list[int]:
+    return [error["row"] for error in result["errors"]]
+
+
+def test_ndjson_rows_fail_one_by_one(org_id):
+    body = b"\n".join(
+        [
+            b'{"city": "Pune"}',
+            b'{"city": ',
+            b'{"city": 5}',
+            b"",
+            b'{"city": "Nashik"}',
+        ]
+    )
+
+    posted, addresses = post_then_get(
+        f"/address/bulk?org_id={org_id}&batch_size=1",
+        body,
+        {"Content-Type": "application/x-ndjson"},
+        f"/address/{org_id}",
+    )
+
+    assert posted.status_code == 200
+    result = posted.json()
+    # Blank lines are not rows.
+    assert (result["received"], result["inserted"], result["failed"]) == (4, 2, 2)
+    assert error_rows(result) == [2, 3]
+    assert result["errors"][0]["errors"][0].startswith("Invalid JSON")
+    assert result["errors"][1]["errors"][0]["loc"] == ["city"]
+    assert sorted(address["city"] for address in addresses) == ["Nashik", "Pune"]
+
+
+def test_gzipped_ndjson_is_read_like_plain_ndjson(org_id):
+    body = gzip.compress(b'{"city": "Pune"}\nnot json\n')
+
+    posted, addresses = post_then_get(
+        f"/address/bulk?org_id={org_id}",
+        body,
+        {"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"},
+        f"/address/{org_id}",
+    )
+
+    result = posted.json()
+    assert (result["received"], result["inserted"], result["failed"]) == (2, 1, 1)
+    assert error_rows(result) == [2]
+    assert [address["city"] for address in addresses] == ["Pune"]
+
+
+def test_csv_rows_fail_one_by_one(org_id):
+    body = (
+        "\ufeffindex,label,value\n"  # spreadsheets often start with a BOM
+        '1,Plan,"Gold, yearly"\n'
+        "two,Seats,10\n"
+        "3,Region\n"
+        '4,Notes,"line one\nline two"\n'
+        '5,Broken,"never closed\n'
+    ).encode()
+
+    posted, fields = post_then_get(
+        f"/custom_fields/bulk?org_id={org_id}",
+        body,
+        {"Content-Type": "text/csv"},
+        f"/custom_fields/{org_id}",
+    )
+
+    assert posted.status_code == 200
+    result = posted.json()
+    assert (result["received"], result["inserted"], result["failed"]) == (5, 2, 3)
+    assert error_rows(result) == [2, 3, 5]
+    assert result["errors"][0]["errors"][0]["loc"] == ["index"]
+    assert result["errors"][1]["errors"] == ["Expected 3 columns, got 2"]
+    assert result["errors"][2]["errors"] == ["Unterminated quoted field"]
+    assert sorted((field["index"], field["value"]) for field in fields) == [
+        (1, "Gold, yearly"),
+        (4, "line one\nline two"),
+    ]
@@ -0,0 +1,72 @@
+"""
+The cached current user follows writes to the user, including renaming
+the organization they belong to.
+"""
+
+import asyncio
+
+import httpx
+from sqlalchemy import func, insert, select
+
+from app.authentication import Authenticator
+from app.db import Base, async_engine, async_session_local, engine
+from app.main import app
+from app.organizations.models import OrganizationModel
+from app.users.models import UserModel
+
+
+async def add_user_and_organization(username: str) -> int:
+    """Renaming an organization renames it on the user sharing its id."""
+    async with async_session_local() as db:
+        taken = [
+            await db.scalar(select(func.max(model.id))) or 0
+            for model in (UserModel, OrganizationModel)
+        ]
+        shared_id = max(taken) + 1
+
+        await db.execute(
+            insert(UserModel),
+            [
+                {
+                    "id": shared_id,
+                    "username": username,
+                    "email": f"{username}@example.com",
+                    "password": "not used",
+                    "organization": "Before",
+                }
+            ],
+        )
+        await db.execute(insert(OrganizationModel), [{"id": shared_id, "name": "Before"}])
+        await db.commit()
+
+    return shared_id
+
+
+def test_renaming_the_organization_refreshes_the_cached_user():
+    async def scenario():
+        org_id = await add_user_and_organization("cached-member")
+        token = Authenticator().create_tokens(data={"sub": "cached-member"})["access"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            before = (await client.get("/users/me/", headers=headers)).json()
+            renamed = await client.patch(
+                f"/organizations/{org_id}", json={"name": "Renamed"}, headers=headers
+            )
+            after = (await client.get("/users/me/", headers=headers)).json()
+
+        return before, renamed, after
+
+    async def run_and_dispose():
+        try:
+            return await scenario()
+        finally:
+            await async_engine.dispose()
+
+    Base.metadata.create_all(bind=engine)
+    before, renamed, after = asyncio.run(run_and_dispose())
+
+    assert before["organization"] == "Before"
+    assert renamed.status_code == 200
+    assert after["organization"] == "Renamed"
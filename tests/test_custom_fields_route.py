@@ -0,0 +1,39 @@
+"""
+GET /custom_fields/{org_id} answers 200 with the organization's custom
+fields, which carry no id of their own, like GET /address/{org_id}.
+"""
+
+import asyncio
+
+import httpx
+
+from app.authentication import Authenticator
+from app.db import Base, async_engine, engine
+from app.main import app
+from benchmarks.http_suite import seed
+
+
+async def fetch_custom_fields() -> tuple[httpx.Response, httpx.Response]:
+    try:
+        username, org_ids = await seed(orgs=1, addresses=2, custom_fields=2)
+        token = Authenticator().create_tokens(data={"sub": username})["access"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return (
+                await client.get(f"/custom_fields/{org_ids[0]}", headers=headers),
+                await client.get(f"/address/{org_ids[0]}", headers=headers),
+            )
+    finally:
+        await async_engine.dispose()
+
+
+def test_custom_fields_route_matches_address_route():
+    Base.metadata.create_all(bind=engine)
+
+    custom_fields, addresses = asyncio.run(fetch_custom_fields())
+
+    assert custom_fields.status_code == addresses.status_code == 200
+    assert [field["index"] for field in custom_fields.json()] == [0, 1]
+    assert all("id" not in field for field in custom_fields.json())
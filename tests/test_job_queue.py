@@ -0,0 +1,161 @@
+"""
+Jobs run once their enqueue commits, are handed over when a worker's lease
+runs out, and fail alone: retried with backoff, then kept as failed.
+"""
+
+import asyncio
+import itertools
+
+import pytest
+from sqlalchemy import select
+
+from app.db import Base, async_engine, async_session_local, engine
+from app.jobs.models import JOB_FAILED, JOB_PENDING, JobModel
+from app.jobs.queue import JobQueue
+
+# Every test registers its own kind, so jobs left by another never show up.
+kinds = (f"test-{i}" for i in itertools.count())
+
+
+def run(coro):
+    async def run_and_dispose():
+        try:
+            return await coro
+        finally:
+            # Pooled connections belong to this event loop.
+            await async_engine.dispose()
+
+    return asyncio.run(run_and_dispose())
+
+
+def make_queue(**overrides) -> JobQueue:
+    settings = {
+        "batch_size": 10,
+        "poll_seconds": 1,
+        "max_attempts": 3,
+        "retry_base_seconds": 0,
+        "retry_max_seconds": 0,
+        "lease_seconds": 60,
+        **overrides,
+    }
+    return JobQueue(**settings)
+
+
+def recording_handler(seen: list, failing: tuple = ()):
+    async def handle(db, payloads):
+        seen.append(list(payloads))
+        if any(payload in failing for payload in payloads):
+            raise RuntimeError("bad payload")
+
+    return handle
+
+
+async def enqueue(queue: JobQueue, kind: str, *payloads) -> None:
+    async with async_session_local() as db:
+        for payload in payloads:
+            queue.enqueue(db, kind, payload)
+        await db.commit()
+
+
+async def jobs_of(kind: str) -> list:
+    async with async_session_local() as db:
+        result = await db.execute(
+            select(JobModel).where(JobModel.kind == kind).order_by(JobModel.id)
+        )
+        return list(result.scalars())
+
+
+@pytest.fixture(autouse=True)
+def schema():
+    Base.metadata.create_all(bind=engine)
+
+
+def test_enqueued_jobs_run_in_one_batch_and_are_removed():
+    kind, seen = next(kinds), []
+    queue = make_queue()
+    queue.register(kind, recording_handler(seen))
+
+    async def scenario():
+        await enqueue(queue, kind, {"n": 1}, {"n": 2})
+        claimed = await queue.run_once(kind)
+        return claimed, await queue.run_once(kind), await jobs_of(kind)
+
+    claimed, claimed_again, left = run(scenario())
+
+    assert (claimed, claimed_again) == (2, 0)
+    assert seen == [[{"n": 1}, {"n": 2}]]
+    assert left == []
+    assert queue.stats()["completed"] == 2
+
+
+def test_enqueue_needs_a_registered_handler():
+    async def scenario():
+        async with async_session_local() as db:
+            make_queue().enqueue(db, next(kinds), {})
+
+    with pytest.raises(ValueError):
+        run(scenario())
+
+
+def test_expired_lease_hands_the_job_to_another_worker():
+    kind, seen = next(kinds), []
+    dead = make_queue(lease_seconds=0.2)
+    alive = make_queue(lease_seconds=0.2)
+    for queue in (dead, alive):
+        queue.register(kind, recording_handler(seen))
+
+    async def scenario():
+        await enqueue(alive, kind, "payload")
+
+        # Claimed by a worker that then stalls, as if its process died.
+        token, jobs = await dead._claim(kind)
+        assert len(jobs) == 1
+        leased = await alive.run_once(kind)
+
+        await asyncio.sleep(0.3)
+        taken_over = await alive.run_once(kind)
+
+        # The stalled worker wakes up, but no longer holds the lease.
+        await dead._process(kind, token, jobs)
+        return leased, taken_over, await jobs_of(kind)
+
+    leased, taken_over, left = run(scenario())
+
+    assert (leased, taken_over) == (0, 1)
+    assert alive.stats()["completed"] == 1
+    assert dead.stats()["completed"] == 0
+    assert left == []
+
+
+def test_a_failing_job_is_retried_alone_then_kept_as_failed():
+    kind, seen = next(kinds), []
+    queue = make_queue(max_attempts=2, retry_base_seconds=0.1, retry_max_seconds=0.1)
+    queue.register(kind, recording_handler(seen, failing=("bad",)))
+
+    async def scenario():
+        await enqueue(queue, kind, "ok", "bad", "fine")
+
+        await queue.run_once(kind)
+        after_first = await jobs_of(kind)
+        # Backing off: not due yet.
+        backing_off = await queue.run_once(kind)
+
+        await asyncio.sleep(0.15)
+        await queue.run_once(kind)
+        return after_first, backing_off, await jobs_of(kind)
+
+    after_first, backing_off, left = run(scenario())
+
+    # The batch failed, then each job ran alone.
+    assert seen[:4] == [["ok", "bad", "fine"], ["ok"], ["bad"], ["fine"]]
+    [job] = after_first
+    assert (job.payload, job.status, job.attempts) == ("bad", JOB_PENDING, 1)
+    assert job.last_error == "RuntimeError: bad payload"
+    assert job.claim_token is None
+
+    assert backing_off == 0
+
+    [job] = left
+    assert (job.status, job.attempts) == (JOB_FAILED, 2)
+    assert queue.stats()["completed"] == 2
+    assert (queue.stats()["retried"], queue.stats()["failed"]) == (1, 1)
@@ -0,0 +1,109 @@
+"""
+POST /token turns away attempts over a rate or concurrency limit with a 429
+and Retry-After, before any password is verified.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy import insert
+
+import app.main
+from app import authentication as auth
+from app.authentication import Authenticator
+from app.db import Base, async_engine, async_session_local, engine
+from app.ratelimit import LoginLimiter, MemoryBucketStore, TokenBucket
+from app.users.models import UserModel
+
+USERNAME = "limited-login"
+
+
+def run(coro):
+    async def run_and_dispose():
+        try:
+            return await coro
+        finally:
+            # Pooled connections belong to this event loop.
+            await async_engine.dispose()
+
+    return asyncio.run(run_and_dispose())
+
+
+@pytest.fixture(scope="module", autouse=True)
+def user():
+    Base.metadata.create_all(bind=engine)
+
+    async def add_user():
+        async with async_session_local() as db:
+            await db.execute(
+                insert(UserModel),
+                [
+                    {
+                        "username": USERNAME,
+                        "email": f"{USERNAME}@example.com",
+                        "password": Authenticator.get_password_hash("right"),
+                    }
+                ],
+            )
+            await db.commit()
+
+    run(add_user())
+
+
+@pytest.fixture
+def limiter(monkeypatch) -> LoginLimiter:
+    # Its own buckets, whatever LOGIN_RATE_LIMIT_BACKEND the app was built with.
+    limiter = LoginLimiter(
+        store=MemoryBucketStore(maxsize=100),
+        per_ip=TokenBucket("ip", burst=100, per_minute=60),
+        per_username=TokenBucket("username", burst=2, per_minute=1),
+        max_in_flight=1,
+    )
+    monkeypatch.setattr(app.main, "login_limiter", limiter)
+    return limiter
+
+
+async def attempt(password: str = "wrong") -> httpx.Response:
+    transport = httpx.ASGITransport(app=app.main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.post(
+            "/token", data={"username": USERNAME, "password": password}
+        )
+
+
+def test_attempts_over_the_username_burst_are_refused_unverified(limiter):
+    async def scenario():
+        allowed = [await attempt() for _ in range(2)]
+        verified = auth.hash_pool.completed
+        refused = await attempt("right")
+        return allowed, verified, refused
+
+    allowed, verified, refused = run(scenario())
+
+    assert [response.status_code for response in allowed] == [401, 401]
+    assert refused.status_code == 429
+    # A token comes back after a minute at one per minute.
+    assert 1 <= int(refused.headers["Retry-After"]) <= 60
+    assert auth.hash_pool.completed == verified
+    assert limiter.limited["username"] == 1
+
+
+def test_attempts_over_the_in_flight_limit_are_refused_unverified(limiter):
+    async def scenario():
+        # Another login is verifying its password.
+        async with limiter.admit("10.0.0.1", "someone-else"):
+            verified = auth.hash_pool.completed
+            refused = await attempt("right")
+            still_verified = auth.hash_pool.completed
+        admitted = [await attempt("right"), await attempt()]
+        return verified, refused, still_verified, admitted
+
+    verified, refused, still_verified, admitted = run(scenario())
+
+    assert refused.status_code == 429
+    assert refused.headers["Retry-After"] == "1"
+    assert still_verified == verified
+    # The refused attempt did not spend a token from the username's bucket.
+    assert [response.status_code for response in admitted] == [200, 401]
+    assert limiter.limited == {"ip": 0, "username": 0, "in_flight": 1}
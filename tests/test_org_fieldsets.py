@@ -0,0 +1,116 @@
+"""
+`fields` and `expand` narrow organization reads to the columns and
+relationships asked for, and reject names that do not exist.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.addresses.schemas import AddressBaseSchema
+from app.db import Base, async_engine, async_session_local, engine
+from app.main import app
+from app.organizations.repo import OrganizationRepo
+from app.organizations.schemas import OrganizationCreateSchema
+from app.schemas import CustomFieldBaseSchema
+
+# Only this organization has this industry, so listings can be narrowed to it.
+INDUSTRY = "Fieldsets"
+
+repo = OrganizationRepo()
+
+
+def run(coro):
+    async def run_and_dispose():
+        try:
+            return await coro
+        finally:
+            # Pooled connections belong to this event loop.
+            await async_engine.dispose()
+
+    return asyncio.run(run_and_dispose())
+
+
+@pytest.fixture(scope="module")
+def org_id() -> int:
+    Base.metadata.create_all(bind=engine)
+
+    async def create() -> int:
+        async with async_session_local() as db:
+            org = await repo.create(
+                db=db,
+                org=OrganizationCreateSchema(
+                    name="Projected",
+                    industry_type=INDUSTRY,
+                    addresses=[AddressBaseSchema(city="Pune")],
+                    custom_fields=[CustomFieldBaseSchema(index=1, label="k", value="v")],
+                ),
+            )
+            return org.id
+
+    return run(create())
+
+
+def get(path: str, **params) -> httpx.Response:
+    async def fetch():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(
+                path, params=params, headers={"Authorization": "Bearer any"}
+            )
+
+    return run(fetch())
+
+
+def detail(org_id: int, **params) -> dict:
+    response = get(f"/organizations/{org_id}", **params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def listed(**params) -> dict:
+    response = get("/organizations", industry_type=INDUSTRY, **params)
+    assert response.status_code == 200
+    [org] = response.json()["items"]
+    return org
+
+
+def test_fields_always_include_the_id(org_id):
+    expected = {"id": org_id, "name": "Projected", "industry_type": INDUSTRY}
+
+    assert detail(org_id, fields="name,industry_type") == expected
+    assert listed(fields="name, industry_type") == expected
+
+
+def test_nothing_is_expanded_by_default(org_id):
+    for org in (detail(org_id), listed()):
+        assert org["name"] == "Projected"
+        assert "addresses" not in org
+        assert "custom_fields" not in org
+
+
+def test_expand_includes_only_the_relationships_named(org_id):
+    for org in (detail(org_id, expand="addresses"), listed(expand="addresses")):
+        assert [address["city"] for address in org["addresses"]] == ["Pune"]
+        assert "custom_fields" not in org
+
+    org = detail(org_id, fields="name", expand="addresses,custom_fields")
+    assert set(org) == {"id", "name", "addresses", "custom_fields"}
+    assert [field["value"] for field in org["custom_fields"]] == ["v"]
+
+
+@pytest.mark.parametrize(
+    "params, detail_prefix",
+    [
+        ({"fields": "name,password"}, "Unknown fields: password."),
+        ({"fields": "addresses"}, "Unknown fields: addresses."),
+        ({"expand": "users"}, "Unknown expand: users."),
+    ],
+)
+def test_unknown_names_are_a_400(org_id, params, detail_prefix):
+    for path in (f"/organizations/{org_id}", "/organizations"):
+        response = get(path, **params)
+
+        assert response.status_code == 400
+        assert response.json()["detail"].startswith(detail_prefix)
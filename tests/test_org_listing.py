@@ -0,0 +1,133 @@
+"""
+GET /organizations pages through organizations in id order with an opaque
+keyset cursor, and applies its filters in SQL before the page is cut.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.db import Base, async_engine, async_session_local, engine
+from app.main import app
+from app.organizations.repo import OrganizationRepo
+from app.organizations.schemas import OrganizationCreateSchema
+
+# Only these tests use this industry, so the other modules' organizations
+# never land on a page.
+INDUSTRY = "Keyset Listing"
+N = 9
+
+repo = OrganizationRepo()
+
+
+def run(coro):
+    async def run_and_dispose():
+        try:
+            return await coro
+        finally:
+            # Pooled connections belong to this event loop.
+            await async_engine.dispose()
+
+    return asyncio.run(run_and_dispose())
+
+
+@pytest.fixture(scope="module")
+def orgs() -> list[dict]:
+    """N organizations, every third inactive and every other one in USD."""
+    Base.metadata.create_all(bind=engine)
+
+    async def seed() -> list[dict]:
+        created = []
+        async with async_session_local() as db:
+            for i in range(N):
+                values = {
+                    "name": f"Listed {i}",
+                    "industry_type": INDUSTRY,
+                    "is_org_active": i % 3 != 0,
+                    "currency_code": "USD" if i % 2 else "INR",
+                }
+                org = await repo.create(db=db, org=OrganizationCreateSchema(**values))
+                created.append({"id": org.id, **values})
+        return created
+
+    return run(seed())
+
+
+def list_all(**params) -> tuple[list[list[int]], list[int]]:
+    """Ids on each page, following `next` to the end, and the status codes."""
+
+    async def walk():
+        pages, statuses = [], []
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            cursor = None
+            while True:
+                query = {"industry_type": INDUSTRY, **params}
+                if cursor is not None:
+                    query["cursor"] = cursor
+                response = await client.get(
+                    "/organizations",
+                    params=query,
+                    headers={"Authorization": "Bearer any"},
+                )
+                statuses.append(response.status_code)
+                body = response.json()
+                pages.append([org["id"] for org in body["items"]])
+                cursor = body.get("next")
+                if cursor is None:
+                    return pages, statuses
+
+    return run(walk())
+
+
+def test_cursor_walks_every_organization_once_in_id_order(orgs):
+    pages, statuses = list_all(limit=3)
+
+    assert statuses == [200] * 3
+    # The last page is full, and still ends the walk.
+    assert [len(page) for page in pages] == [3, 3, 3]
+    assert [id for page in pages for id in page] == [org["id"] for org in orgs]
+
+
+def test_one_page_as_large_as_the_listing_has_no_next_cursor(orgs):
+    pages, _ = list_all(limit=N)
+
+    assert pages == [[org["id"] for org in orgs]]
+
+
+@pytest.mark.parametrize(
+    "params, wanted",
+    [
+        ({"is_org_active": "false"}, lambda org: not org["is_org_active"]),
+        ({"currency_code": "USD"}, lambda org: org["currency_code"] == "USD"),
+        (
+            {"is_org_active": "true", "currency_code": "INR"},
+            lambda org: org["is_org_active"] and org["currency_code"] == "INR",
+        ),
+    ],
+)
+def test_filters_apply_across_pages(orgs, params, wanted):
+    pages, _ = list_all(limit=2, **params)
+
+    expected = [org["id"] for org in orgs if wanted(org)]
+    assert len(expected) > 2
+    assert all(len(page) <= 2 for page in pages)
+    assert [id for page in pages for id in page] == expected
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "W10"])
+def test_malformed_cursor_is_a_400(orgs, cursor):
+    async def fetch():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(
+                "/organizations",
+                params={"cursor": cursor},
+                headers={"Authorization": "Bearer any"},
+            )
+
+    response = run(fetch())
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid pagination cursor"}
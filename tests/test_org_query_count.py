@@ -0,0 +1,94 @@
+"""
+Organization reads issue a fixed number of queries, however many
+organizations, addresses and custom fields they return.
+"""
+
+import asyncio
+
+import pytest
+
+from app.addresses.schemas import AddressBaseSchema
+from app.db import Base, async_engine, async_session_local, engine
+from app.organizations.repo import OrganizationRepo
+from app.organizations.schemas import OrganizationCreateSchema
+from app.schemas import CustomFieldBaseSchema
+from benchmarks.support import QueryCounter
+
+N = 5
+LIST_QUERIES = 3
+DETAIL_QUERIES = 2
+
+repo = OrganizationRepo()
+counter = QueryCounter()
+
+
+def run(coro):
+    async def run_and_dispose():
+        try:
+            return await coro
+        finally:
+            # Pooled connections belong to this event loop.
+            await async_engine.dispose()
+
+    return asyncio.run(run_and_dispose())
+
+
+async def create_org(name: str, children: int) -> int:
+    async with async_session_local() as db:
+        org = await repo.create(
+            db=db,
+            org=OrganizationCreateSchema(
+                name=name,
+                addresses=[AddressBaseSchema(city="Pune") for _ in range(children)],
+                custom_fields=[
+                    CustomFieldBaseSchema(index=i, label="k", value="v")
+                    for i in range(children)
+                ],
+            ),
+        )
+        return org.id
+
+
+@pytest.fixture(scope="module")
+def org_ids() -> dict[int, int]:
+    """Ids of an organization with 1 and one with 10 of each child, among 10·N."""
+    Base.metadata.create_all(bind=engine)
+    counter.attach(async_engine.sync_engine)
+
+    async def seed() -> dict[int, int]:
+        ids = {}
+        for i in range(10 * N):
+            children = 10 if i == 0 else 1
+            ids.setdefault(children, await create_org(f"Org {i}", children))
+        return ids
+
+    return run(seed())
+
+
+def count_queries(read) -> int:
+    async def count() -> int:
+        async with async_session_local() as db:
+            counter.reset()
+            await read(db)
+            return counter.statements
+
+    return run(count())
+
+
+@pytest.mark.parametrize("limit", [N, 10 * N])
+def test_listing_query_count_is_fixed(org_ids, limit):
+    async def read(db):
+        page = await repo.fetch_organizations(db=db, limit=limit)
+        assert len(page.items) == limit
+
+    assert count_queries(read) == LIST_QUERIES
+
+
+@pytest.mark.parametrize("children", [1, 10])
+def test_detail_query_count_is_fixed(org_ids, children):
+    async def read(db):
+        org = await repo.fetch_organizations_by_id(db=db, org_id=org_ids[children])
+        assert len(org.addresses) == children
+        assert len(org.custom_fields) == children
+
+    assert count_queries(read) == DETAIL_QUERIES
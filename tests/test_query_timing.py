@@ -0,0 +1,36 @@
+"""
+Per-statement timing leaves nothing behind on a connection when a
+statement fails.
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.db import async_engine
+
+
+def test_failed_statement_does_not_leave_a_start_time_behind():
+    async def scenario():
+        async with async_engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                await conn.execute(text("SELECT * FROM no_such_table"))
+            after_failure = list(conn.sync_connection.info.get("query_started_at", []))
+
+            await conn.execute(text("SELECT 1"))
+            after_success = list(conn.sync_connection.info.get("query_started_at", []))
+
+        return after_failure, after_success
+
+    async def run_and_dispose():
+        try:
+            return await scenario()
+        finally:
+            await async_engine.dispose()
+
+    after_failure, after_success = asyncio.run(run_and_dispose())
+
+    assert after_failure == []
+    assert after_success == []
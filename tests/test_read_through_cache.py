@@ -0,0 +1,75 @@
+"""
+Concurrent misses on one key share a load, and survive the caller running
+it being cancelled.
+"""
+
+import asyncio
+
+from app.cache import MemoryCacheBackend, ReadThroughCache
+
+
+def new_cache() -> ReadThroughCache[str]:
+    return ReadThroughCache(MemoryCacheBackend(maxsize=10, ttl=60), ttl=60)
+
+
+def test_concurrent_misses_share_one_load():
+    cache = new_cache()
+    loads = []
+
+    async def load() -> str:
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_load("key", load) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ["value"] * 5
+    assert len(loads) == 1
+    assert cache.stats()["misses"] == 5
+
+
+def test_waiter_takes_over_a_cancelled_load():
+    cache = new_cache()
+    started = []
+
+    async def load() -> str:
+        started.append(1)
+        await asyncio.sleep(0.05)
+        return f"load {len(started)}"
+
+    async def scenario():
+        first = asyncio.create_task(cache.get_or_load("key", load))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(cache.get_or_load("key", load)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+
+        first.cancel()
+        results = await asyncio.gather(*waiters)
+        return first.cancelled(), results, await cache.get_or_load("key", load)
+
+    first_cancelled, results, cached = asyncio.run(scenario())
+
+    assert first_cancelled
+    assert results == ["load 2"] * 3
+    assert cached == "load 2"
+    assert len(started) == 2
+
+
+def test_cancelled_waiter_leaves_the_load_running():
+    cache = new_cache()
+
+    async def load() -> str:
+        await asyncio.sleep(0.02)
+        return "value"
+
+    async def scenario():
+        loader = asyncio.create_task(cache.get_or_load("key", load))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_load("key", load))
+        await asyncio.sleep(0.005)
+
+        waiter.cancel()
+        return await loader, waiter.cancelled()
+
+    assert asyncio.run(scenario()) == ("value", True)
@@ -0,0 +1,51 @@
+"""
+Search hits come from nullable columns and must still serialize.
+"""
+
+import asyncio
+
+import httpx
+from sqlalchemy import insert
+
+from app.db import Base, async_engine, async_session_local, engine
+from app.main import app
+from app.users.models import UserModel
+
+
+def test_user_without_a_username_is_found_by_email():
+    async def scenario():
+        async with async_session_local() as db:
+            await db.execute(
+                insert(UserModel),
+                [
+                    {
+                        "username": None,
+                        "email": "nameless-searcher@example.com",
+                        "password": "not used",
+                    }
+                ],
+            )
+            await db.commit()
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(
+                "/search",
+                params={"q": "nameless-searcher", "kind": "user"},
+                headers={"Authorization": "Bearer any"},
+            )
+
+    async def run_and_dispose():
+        try:
+            return await scenario()
+        finally:
+            await async_engine.dispose()
+
+    Base.metadata.create_all(bind=engine)
+    response = asyncio.run(run_and_dispose())
+
+    assert response.status_code == 200
+    [hit] = response.json()["items"]
+    assert hit["kind"] == "user"
+    assert hit["label"] is None
+    assert hit["email"] == "nameless-searcher@example.com"
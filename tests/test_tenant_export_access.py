@@ -0,0 +1,90 @@
+"""
+An organization's export is for its members and administrators; the full
+export and the import are for administrators only.
+"""
+
+import asyncio
+
+import httpx
+from sqlalchemy import insert
+
+from app.authentication import Authenticator
+from app.db import Base, async_engine, async_session_local, engine
+from app.main import app
+from app.users.models import UserModel
+from benchmarks.http_suite import seed
+
+
+def bearer(username: str) -> dict[str, str]:
+    token = Authenticator().create_tokens(data={"sub": username})["access"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def add_user(username: str, organization: str) -> None:
+    async with async_session_local() as db:
+        await db.execute(
+            insert(UserModel),
+            [
+                {
+                    "username": username,
+                    "email": f"{username}@example.com",
+                    "password": "not used",
+                    "organization": organization,
+                }
+            ],
+        )
+        await db.commit()
+
+
+def run(scenario):
+    async def run_and_dispose():
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await scenario(client)
+        finally:
+            await async_engine.dispose()
+
+    Base.metadata.create_all(bind=engine)
+    return asyncio.run(run_and_dispose())
+
+
+def test_organization_export_is_for_members_and_admins():
+    async def scenario(client):
+        admin, org_ids = await seed(orgs=2, addresses=1, custom_fields=1)
+        await add_user("export-member", organization="Bench Org 0")
+        await add_user("export-outsider", organization="Bench Org 1")
+        path = f"/organizations/{org_ids[0]}/export"
+
+        return {
+            username: await client.get(path, headers=bearer(username))
+            for username in (admin, "export-member", "export-outsider")
+        }
+
+    responses = run(scenario)
+    admin, member, outsider = responses.values()
+
+    assert admin.status_code == 200
+    assert member.status_code == 200
+    assert member.text == admin.text
+    assert outsider.status_code == 403
+
+
+def test_full_export_and_import_are_for_admins():
+    async def scenario(client):
+        await add_user("import-member", organization="Bench Org 0")
+        headers = bearer("import-member")
+
+        return (
+            await client.get("/organizations/export", headers=headers),
+            await client.post(
+                "/organizations/import",
+                content=b"",
+                headers={**headers, "Content-Type": "application/x-ndjson"},
+            ),
+        )
+
+    export, imported = run(scenario)
+
+    assert export.status_code == 403
+    assert imported.status_code == 403
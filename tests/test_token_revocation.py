@@ -0,0 +1,97 @@
+"""
+Refresh tokens are single use, revocable, and stay revoked across restarts
+and workers sharing the revocation log.
+"""
+
+import asyncio
+import time
+
+import httpx
+
+from app.authentication import Authenticator
+from app.db import Base, async_engine, engine
+from app.main import app
+from app.revocation import RevocationStore
+from benchmarks.http_suite import seed
+
+
+def run(scenario):
+    async def run_and_dispose():
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await scenario(client)
+        finally:
+            await async_engine.dispose()
+
+    Base.metadata.create_all(bind=engine)
+    return asyncio.run(run_and_dispose())
+
+
+async def refresh_token() -> str:
+    username, _ = await seed(orgs=0, addresses=0, custom_fields=0)
+    return Authenticator().create_tokens(data={"sub": username})["refresh"]
+
+
+def test_refresh_token_is_single_use():
+    async def scenario(client):
+        token = await refresh_token()
+        first = await client.post("/token/refresh", params={"token": token})
+        again = await client.post("/token/refresh", params={"token": token})
+        rotated = await client.post(
+            "/token/refresh", params={"token": first.json()["refresh_token"]}
+        )
+        return first, again, rotated
+
+    first, again, rotated = run(scenario)
+
+    assert first.status_code == 200
+    assert again.status_code == 401
+    assert rotated.status_code == 200
+
+
+def test_revoked_token_is_refused():
+    async def scenario(client):
+        token = await refresh_token()
+        revoked = await client.post("/token/revoke", params={"token": token})
+        refreshed = await client.post("/token/refresh", params={"token": token})
+        return revoked, refreshed
+
+    revoked, refreshed = run(scenario)
+
+    assert revoked.status_code == 204
+    assert refreshed.status_code == 401
+
+
+def test_log_is_reloaded_at_startup(tmp_path):
+    path = str(tmp_path / "revoked.log")
+    exp = time.time() + 600
+
+    before_restart = RevocationStore(path=path, bucket_seconds=60)
+    before_restart.load()
+    assert before_restart.claim("redeemed", exp)
+
+    after_restart = RevocationStore(path=path, bucket_seconds=60)
+    after_restart.load()
+
+    assert after_restart.is_revoked("redeemed", exp)
+    assert not after_restart.is_revoked("unused", exp)
+    assert not after_restart.claim("redeemed", exp)
+
+
+def test_concurrent_claims_have_one_winner(tmp_path):
+    path = str(tmp_path / "revoked.log")
+    exp = time.time() + 600
+    # Two workers on the host, sharing the log.
+    workers = [RevocationStore(path=path, bucket_seconds=60) for _ in range(2)]
+    for worker in workers:
+        worker.load()
+
+    async def claim_everywhere():
+        return await asyncio.gather(
+            *(worker.claim_async("contested", exp) for worker in workers for _ in range(4))
+        )
+
+    results = asyncio.run(claim_everywhere())
+
+    assert results.count(True) == 1
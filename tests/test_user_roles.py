@@ -0,0 +1,97 @@
+"""
+Only administrators grant roles: registration refuses one, and setting one
+through PATCH /users/update/{id} or POST /users/bulk needs an admin.
+"""
+
+import asyncio
+
+import httpx
+
+from app.authentication import Authenticator
+from app.db import Base, async_engine, engine
+from app.main import app
+from benchmarks.http_suite import seed
+
+
+def bearer(username: str) -> dict[str, str]:
+    token = Authenticator().create_tokens(data={"sub": username})["access"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def registration(username: str, **fields) -> dict:
+    return {
+        "username": username,
+        "email": f"{username}@example.com",
+        "first_name": "Test",
+        "last_name": "User",
+        "password": "correct horse battery staple",
+        **fields,
+    }
+
+
+def run(scenario):
+    async def run_and_dispose():
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await scenario(client)
+        finally:
+            await async_engine.dispose()
+
+    Base.metadata.create_all(bind=engine)
+    return asyncio.run(run_and_dispose())
+
+
+def test_registration_grants_no_role():
+    async def scenario(client):
+        refused = await client.post("/users", json=registration("rolling", role="admin"))
+        registered = await client.post("/users", json=registration("plain"))
+        return refused, registered
+
+    refused, registered = run(scenario)
+
+    assert refused.status_code == 403
+    assert registered.status_code == 201
+    assert registered.json()["role"] is None
+
+
+def test_only_an_admin_sets_a_role():
+    async def scenario(client):
+        admin, _ = await seed(orgs=0, addresses=0, custom_fields=0)
+        user = (await client.post("/users", json=registration("promoted"))).json()
+        path = f"/users/update/{user['id']}"
+
+        return (
+            await client.patch(path, json={"role": "admin"}, headers=bearer("promoted")),
+            await client.patch(path, json={"first_name": "Ok"}, headers=bearer("promoted")),
+            await client.patch(path, json={"role": "auditor"}, headers=bearer(admin)),
+        )
+
+    by_self, profile, by_admin = run(scenario)
+
+    assert by_self.status_code == 403
+    assert profile.status_code == 200
+    assert profile.json()["role"] is None
+    assert by_admin.status_code == 200
+    assert by_admin.json()["role"] == "auditor"
+
+
+def test_bulk_import_needs_an_admin():
+    rows = [registration("imported", role="admin")]
+
+    async def scenario(client):
+        admin, _ = await seed(orgs=0, addresses=0, custom_fields=0)
+        await client.post("/users", json=registration("importer"))
+
+        return (
+            await client.post("/users/bulk", json=rows, headers=bearer("importer")),
+            await client.post("/users/bulk", json=rows, headers={"Authorization": "Bearer junk"}),
+            await client.post("/users/bulk", json=rows, headers=bearer(admin)),
+        )
+
+    by_user, by_junk, by_admin = run(scenario)
+
+    assert by_user.status_code == 403
+    assert by_junk.status_code == 401
+    assert by_admin.status_code == 200
+    assert by_admin.json()["inserted"] == 1